@@ -0,0 +1,258 @@
+# Admission control for CPU-bound request work
+# Parsing and export generation run on a dedicated thread pool instead of
+# the event loop, at most `limit` jobs at a time with at most `queue` more
+# waiting. Work beyond that is turned away with 429 straight away, and a job
+# that waited longer than `timeout` for a slot is dropped with 503, so an
+# overload shows up as fast errors rather than an ever-growing backlog.
+# Admission and Overloaded are framework independent; main.py maps
+# Overloaded onto HTTP responses.
+
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, List, Optional
+
+# Chunks of a stream are pulled off the pool in batches of up to this many,
+# or whatever is ready after STREAM_BATCH_SECONDS, so every chunk does not
+# pay for a thread hop
+STREAM_BATCH = 64
+STREAM_BATCH_SECONDS = 0.05
+
+_DONE = object()
+
+
+class Overloaded(Exception):
+    """The server is too busy for this request: status_code is 429 or 503."""
+
+    def __init__(self, status_code: int, detail: str, retry_after: int = 1):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+        self.retry_after = retry_after
+
+
+class Admission:
+    """
+    Bounded executor for CPU-bound work called from async handlers.
+
+    run() executes a function on the pool; stream() runs a generator on it
+    chunk batch by chunk batch for a StreamingResponse. Both count as one
+    admitted job until they finish, and both raise Overloaded before any
+    work starts when the server is full.
+    """
+
+    def __init__(self, limit: int, queue: int, timeout: Optional[float] = None, name: str = "cpu"):
+        self.limit = limit
+        self.queue = queue
+        self.timeout = timeout
+        self.name = name
+        self.rejected = 0
+        self.timeouts = 0
+        self._active = 0
+        self._lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    @property
+    def active(self) -> int:
+        """Admitted jobs, running or waiting."""
+        return self._active
+
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.limit, thread_name_prefix=f"notam-{self.name}")
+            return self._executor
+
+    def stats(self) -> Dict[str, Any]:
+        return {"limit": self.limit, "queue": self.queue, "timeout": self.timeout,
+                "active": self._active, "rejected": self.rejected, "timeouts": self.timeouts}
+
+    def _admit(self):
+        with self._lock:
+            if self._active >= self.limit + self.queue:
+                self.rejected += 1
+                raise Overloaded(429, "Server busy, retry shortly")
+            self._active += 1
+
+    def _release(self):
+        with self._lock:
+            self._active -= 1
+
+    def _check_wait(self, queued_at: float):
+        # Runs on the pool thread as the job starts
+        if self.timeout is not None and time.monotonic() - queued_at > self.timeout:
+            with self._lock:
+                self.timeouts += 1
+            raise Overloaded(503, "Timed out waiting for a free worker")
+
+    def _call(self, queued_at: float, func: Callable[..., Any], args: tuple) -> Any:
+        self._check_wait(queued_at)
+        return func(*args)
+
+    async def run(self, func: Callable[..., Any], *args: Any) -> Any:
+        """func(*args) on the pool; raises Overloaded if it cannot be admitted or waits too long."""
+        self._admit()
+        try:
+            future = self.executor.submit(self._call, time.monotonic(), func, args)
+        except BaseException:
+            self._release()
+            raise
+        future.add_done_callback(lambda _: self._release())
+        return await asyncio.wrap_future(future)
+
+    async def stream(self, chunks: Iterator[Any]) -> AsyncIterator[Any]:
+        """
+        Async iterator over a (sync) generator advanced on the pool. The
+        first batch is produced before returning, so overload and parse
+        errors surface before a response has started.
+        """
+        self._admit()
+        stream = _Stream(self, chunks)
+        try:
+            await stream.prefetch(time.monotonic())
+        except BaseException:
+            stream.finish()
+            raise
+        return stream
+
+
+def _take(chunks: Iterator[Any], queued_at: Optional[float], admission: Admission) -> List[Any]:
+    if queued_at is not None:
+        admission._check_wait(queued_at)
+    batch = []
+    deadline = time.perf_counter() + STREAM_BATCH_SECONDS
+    for chunk in chunks:
+        batch.append(chunk)
+        if len(batch) >= STREAM_BATCH or time.perf_counter() > deadline:
+            return batch
+    batch.append(_DONE)
+    return batch
+
+
+class _Stream:
+    # Holds one admission slot until the generator is exhausted or dropped
+
+    def __init__(self, admission: Admission, chunks: Iterator[Any]):
+        self.admission = admission
+        self.chunks = chunks
+        self.pending: List[Any] = []
+        self.finished = False
+        self.future = None
+
+    async def prefetch(self, queued_at: Optional[float] = None):
+        self.future = self.admission.executor.submit(_take, self.chunks, queued_at, self.admission)
+        self.pending = await asyncio.wrap_future(self.future)
+
+    def finish(self):
+        if self.finished:
+            return
+        self.finished = True
+        if self.future is not None and not self.future.done():
+            # Cancelled while a batch is being produced: the generator can
+            # only be closed once the pool thread lets go of it
+            self.future.add_done_callback(lambda _: self._close())
+        else:
+            self._close()
+
+    def _close(self):
+        close = getattr(self.chunks, "close", None)
+        try:
+            if close is not None:
+                close()
+        finally:
+            self.admission._release()
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self) -> Any:
+        try:
+            if not self.pending and not self.finished:
+                await self.prefetch()
+        except BaseException:
+            self.finish()
+            raise
+        if not self.pending or self.pending[0] is _DONE:
+            self.finish()
+            raise StopAsyncIteration
+        batch = self.pending
+        self.pending = []
+        if batch[-1] is _DONE:
+            batch.pop()
+            self.pending = [_DONE]
+        return batch[0][:0].join(batch)
+
+    async def aclose(self):
+        self.finish()
+
+    def __del__(self):
+        # The response may be dropped without being iterated (client gone)
+        self.finish()
+
+
+def from_env() -> Admission:
+    """Admission configured by NOTAM_CPU_CONCURRENCY, NOTAM_CPU_QUEUE and NOTAM_CPU_TIMEOUT."""
+    timeout = os.environ.get("NOTAM_CPU_TIMEOUT", "30")
+    return Admission(
+        limit=int(os.environ.get("NOTAM_CPU_CONCURRENCY", 0)) or max(2, os.cpu_count() or 1),
+        queue=int(os.environ.get("NOTAM_CPU_QUEUE", 32)),
+        timeout=float(timeout) if float(timeout) > 0 else None,
+    )
+
+
+class BodySizeLimit:
+    """
+    ASGI middleware answering 413 for request bodies over max_bytes. The
+    Content-Length header is checked up front; a chunked body without one
+    is read (up to the limit) before the app sees it.
+    """
+
+    def __init__(self, app, max_bytes: int):
+        self.app = app
+        self.max_bytes = max_bytes
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or self.max_bytes <= 0:
+            await self.app(scope, receive, send)
+            return
+        headers = dict(scope.get("headers") or [])
+        length = headers.get(b"content-length")
+        if length is not None:
+            if length.isdigit() and int(length) > self.max_bytes:
+                await self._reject(send)
+                return
+            await self.app(scope, receive, send)
+            return
+        if b"chunked" not in headers.get(b"transfer-encoding", b""):
+            await self.app(scope, receive, send)
+            return
+
+        messages = []
+        received = 0
+        while True:
+            message = await receive()
+            messages.append(message)
+            if message["type"] != "http.request":
+                break
+            received += len(message.get("body", b""))
+            if received > self.max_bytes:
+                await self._reject(send)
+                return
+            if not message.get("more_body"):
+                break
+
+        async def replay():
+            if messages:
+                return messages.pop(0)
+            return await receive()
+
+        await self.app(scope, replay, send)
+
+    async def _reject(self, send):
+        body = b'{"detail":"Request body too large"}'
+        await send({"type": "http.response.start", "status": 413,
+                    "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())]})
+        await send({"type": "http.response.body", "body": body})
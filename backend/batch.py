@@ -0,0 +1,351 @@
+import atexit
+import json
+import os
+import re
+import sys
+import threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import List, Dict, Any, Optional, Iterable, Iterator, Sequence, Tuple, Callable, Union
+from parser_universal import NotamParser, default_parser, project
+from parse_cache import ParseCache, data_version
+from results import dumps
+import fir_data
+import waypoint_db
+
+# ICAO NOTAM header at the start of a line, e.g. "A0123/23 NOTAMN",
+# "(A0124/23 NOTAMR A0100/23" or "B0042/24 NOTAMC B0040/24"
+NOTAM_HEADER = re.compile(r'^[ \t]*\(?[A-Z]\d{4}/\d{2}\s+NOTAM[NRC]\b', re.MULTILINE)
+
+# Anything with a parse(text) method
+Parser = Union[NotamParser, ParseCache]
+
+# Below this many NOTAMs, pickling texts and results to worker processes
+# costs more than parsing them in-process
+PARALLEL_THRESHOLD = int(os.environ.get("NOTAM_PARALLEL_THRESHOLD", 200))
+# NOTAMs sent to a worker per task
+CHUNK_SIZE = 100
+
+# Fallback for feeds without headers: every "Q)" line starts a new NOTAM
+Q_LINE_START = re.compile(r'^[ \t]*Q\)', re.MULTILINE)
+
+
+def split_notams(text: str) -> List[str]:
+    """
+    Split a raw feed into individual NOTAM texts.
+
+    Entries are cut at NOTAM headers (A0123/23 NOTAMN). Feeds without any
+    header are cut at Q) lines instead. Text that matches neither is
+    returned unchanged as a single entry, so a single pasted NOTAM in any
+    format keeps working.
+    """
+    starts = [m.start() for m in NOTAM_HEADER.finditer(text)]
+    if not starts:
+        starts = [m.start() for m in Q_LINE_START.finditer(text)]
+    if not starts:
+        return [text.strip()] if text.strip() else []
+
+    entries = []
+    # Anything before the first header is kept as its own entry
+    preamble = text[:starts[0]].strip()
+    if preamble:
+        entries.append(preamble)
+
+    for i, start in enumerate(starts):
+        end = starts[i + 1] if i + 1 < len(starts) else len(text)
+        entry = text[start:end].strip()
+        if entry:
+            entries.append(entry)
+    return entries
+
+
+def iter_outcomes(
+    texts: List[str],
+    parser: Optional[Parser] = None,
+    offset: int = 0,
+    fields: Optional[Sequence[str]] = None,
+) -> Iterator[Tuple[bool, Dict[str, Any]]]:
+    """
+    Parse NOTAM texts one by one, in order, extracting only fields if given.
+
+    Yields (True, result) for parsed NOTAMs and
+    (False, {"index", "raw_text", "error"}) for NOTAMs that failed.
+    """
+    if parser is None:
+        parser = default_parser
+    for index, text in enumerate(texts, offset):
+        try:
+            yield True, parser.parse(text) if fields is None else parser.parse(text, fields)
+        except Exception as e:
+            yield False, {"index": index, "raw_text": text, "error": str(e)}
+
+
+def collect(outcomes: Iterable[Tuple[bool, Dict[str, Any]]]) -> Dict[str, Any]:
+    """Gather outcomes into the {"results": [...], "errors": [...]} response shape."""
+    results = []
+    errors = []
+    for ok, item in outcomes:
+        (results if ok else errors).append(item)
+    return {"results": results, "errors": errors}
+
+
+def parse_batch(texts: List[str], parser: Optional[Parser] = None, fields: Optional[Sequence[str]] = None) -> Dict[str, Any]:
+    """
+    Parse each NOTAM text individually.
+
+    A failing entry does not fail the batch: it is reported in "errors"
+    with its index in the input, and parsing continues with the next one.
+
+    Returns:
+        {"results": [...], "errors": [{"index", "raw_text", "error"}, ...]}
+    """
+    return collect(iter_outcomes(texts, parser, fields=fields))
+
+
+_pool: Optional[ProcessPoolExecutor] = None
+# data_version() the pool's workers were started with
+_pool_version: Optional[Tuple[Any, ...]] = None
+_pool_lock = threading.Lock()
+
+
+def _init_worker():
+    """Runs once in every worker process: load reference data up front."""
+    waypoint_db.get_store()
+    fir_data.get_store()
+
+
+def _parse_chunk(texts: List[str], offset: int) -> Tuple[Tuple[Any, ...], List[Tuple[bool, Dict[str, Any]]]]:
+    # Tagged with the worker's data version, so callers can tell results
+    # parsed against data that has since changed
+    return data_version(), list(iter_outcomes(texts, offset=offset))
+
+
+def default_workers() -> int:
+    return int(os.environ.get("NOTAM_PARSE_WORKERS", 0)) or os.cpu_count() or 1
+
+
+def get_pool(workers: Optional[int] = None) -> ProcessPoolExecutor:
+    """
+    Shared process pool, created on first use.
+
+    Workers stay alive between batches, so reference data is loaded once
+    per worker rather than once per request. The pool is replaced when the
+    waypoint or FIR data changes (see parse_cache.data_version), so workers
+    never keep parsing against old data; chunks already submitted to the
+    old pool still complete. The worker count defaults to
+    NOTAM_PARSE_WORKERS or the number of CPUs and is fixed when the pool
+    is created.
+    """
+    global _pool, _pool_version
+    with _pool_lock:
+        version = data_version()
+        if _pool is not None and _pool_version != version:
+            _pool.shutdown(wait=False)
+            _pool = None
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=workers or default_workers(), initializer=_init_worker)
+            _pool_version = version
+        return _pool
+
+
+def shutdown_pool():
+    """Stop the shared worker processes (they are restarted on next use)."""
+    global _pool, _pool_version
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(cancel_futures=True)
+            _pool = None
+            _pool_version = None
+
+
+atexit.register(shutdown_pool)
+
+
+def iter_outcomes_cached(
+    texts: List[str],
+    cache: ParseCache,
+    run: Callable[[List[str]], Iterator[Tuple[Tuple[Any, ...], bool, Dict[str, Any]]]],
+) -> Iterator[Tuple[bool, Dict[str, Any]]]:
+    """
+    Serve cached NOTAMs from cache and parse only the misses with run(),
+    which yields (data version, ok, item) per NOTAM. Outcomes stay in input
+    order; new results are added to the cache only if they were parsed
+    against the data version current when the lookup was made.
+    """
+    version = data_version()
+    cached = [cache.get(text) for text in texts]
+    misses = [i for i, hit in enumerate(cached) if hit is None]
+    outcomes = zip(misses, run([texts[i] for i in misses]))
+    for index, hit in enumerate(cached):
+        if hit is not None:
+            yield True, hit
+            continue
+        _, (parsed_with, ok, item) = next(outcomes)
+        if ok:
+            if parsed_with == version:
+                cache.put(texts[index], item, version)
+        else:
+            item["index"] = index
+        yield ok, item
+
+
+def _iter_versioned(
+    texts: List[str],
+    workers: Optional[int],
+    chunk_size: int,
+    threshold: int,
+    window: int,
+) -> Iterator[Tuple[Tuple[Any, ...], bool, Dict[str, Any]]]:
+    # iter_outcomes_parallel, with every outcome tagged with the data
+    # version it was parsed against
+    workers = workers or default_workers()
+    if len(texts) < threshold or workers < 2:
+        version = data_version()
+        for ok, item in iter_outcomes(texts):
+            yield version, ok, item
+        return
+
+    pool = get_pool(workers)
+    window = window or 2 * workers
+    offsets = iter(range(0, len(texts), chunk_size))
+    pending = deque()
+    next_offset = 0
+    try:
+        while True:
+            while len(pending) < window:
+                offset = next(offsets, None)
+                if offset is None:
+                    break
+                chunk = texts[offset:offset + chunk_size]
+                pending.append((offset, pool.submit(_parse_chunk, chunk, offset)))
+            if not pending:
+                return
+            next_offset, future = pending.popleft()
+            version, outcomes = future.result()
+            for ok, item in outcomes:
+                yield version, ok, item
+            next_offset += chunk_size
+    except BrokenProcessPool:
+        # A worker died (e.g. killed for memory); drop the pool and carry on
+        shutdown_pool()
+        version = data_version()
+        for ok, item in iter_outcomes(texts[next_offset:], offset=next_offset):
+            yield version, ok, item
+    finally:
+        # Also reached when the consumer stops early (client disconnected)
+        for _, future in pending:
+            future.cancel()
+
+
+def iter_outcomes_parallel(
+    texts: List[str],
+    workers: Optional[int] = None,
+    chunk_size: int = CHUNK_SIZE,
+    threshold: int = PARALLEL_THRESHOLD,
+    window: int = 0,
+    cache: Optional[ParseCache] = None,
+) -> Iterator[Tuple[bool, Dict[str, Any]]]:
+    """
+    Parallel version of iter_outcomes running on the shared process pool.
+
+    Outcomes are yielded in input order as soon as their chunk is done.
+    At most `window` chunks (default: two per worker) are in flight, so a
+    slow consumer holds back the workers instead of piling up results.
+    Batches smaller than threshold are parsed in-process, as is everything
+    on a single CPU. If the pool breaks, the remaining NOTAMs are parsed
+    in-process. With a cache, only NOTAMs missing from it are sent out.
+    """
+    if cache is not None:
+        yield from iter_outcomes_cached(
+            texts, cache,
+            lambda misses: _iter_versioned(misses, workers, chunk_size, threshold, window))
+        return
+    for _, ok, item in _iter_versioned(texts, workers, chunk_size, threshold, window):
+        yield ok, item
+
+
+def parse_batch_parallel(
+    texts: List[str],
+    workers: Optional[int] = None,
+    chunk_size: int = CHUNK_SIZE,
+    threshold: int = PARALLEL_THRESHOLD,
+    cache: Optional[ParseCache] = None,
+) -> Dict[str, Any]:
+    """
+    Parse NOTAM texts on the shared process pool.
+
+    Same output as parse_batch: results keep input order and error indices
+    refer to positions in texts.
+    """
+    return collect(iter_outcomes_parallel(texts, workers, chunk_size, threshold, cache=cache))
+
+
+def parse_feed(
+    text: str,
+    parser: Optional[Parser] = None,
+    parallel: bool = False,
+    transform: Optional[Callable[[Dict[str, Any]], Dict[str, Any]]] = None,
+    fields: Optional[Sequence[str]] = None,
+) -> Dict[str, Any]:
+    """
+    Split a raw feed and parse every NOTAM in it.
+    parser may be a NotamParser or a ParseCache. transform, if given, is
+    applied to every successful result. fields restricts results to those
+    keys; in-process parses then skip the other stages, while the process
+    pool parses (and caches) full results and projects them.
+    """
+    texts = split_notams(text)
+    if parallel:
+        cache = parser if isinstance(parser, ParseCache) else None
+        out = parse_batch_parallel(texts, cache=cache)
+        if fields is not None:
+            out["results"] = [project(result, fields) for result in out["results"]]
+    else:
+        out = parse_batch(texts, parser, fields)
+    if transform is not None:
+        out["results"] = [transform(result) for result in out["results"]]
+    return out
+
+
+def iter_feed_ndjson(
+    text: str,
+    parser: Optional[Parser] = None,
+    parallel: bool = False,
+    transform: Optional[Callable[[Dict[str, Any]], Dict[str, Any]]] = None,
+    fields: Optional[Sequence[str]] = None,
+) -> Iterator[str]:
+    """
+    Split a raw feed and yield one JSON line per NOTAM as soon as it is parsed.
+
+    Lines are either a parse result (restricted to fields and passed
+    through transform, if given) or, for a NOTAM that failed,
+    {"index", "raw_text", "error"}.
+    """
+    texts = split_notams(text)
+    project_results = False
+    if parallel:
+        cache = parser if isinstance(parser, ParseCache) else None
+        outcomes = iter_outcomes_parallel(texts, cache=cache)
+        project_results = fields is not None
+    else:
+        outcomes = iter_outcomes(texts, parser, fields=fields)
+    for ok, item in outcomes:
+        if ok and project_results:
+            item = project(item, fields)
+        if ok and transform is not None:
+            item = transform(item)
+        yield dumps(item) + "\n"
+
+
+if __name__ == "__main__":
+    # Offline backfill: python batch.py FEED [FEED ...] > results.jsonl
+    # One JSON result per line in input order; failed NOTAMs go to stderr.
+    for path in sys.argv[1:]:
+        with open(path) as f:
+            texts = split_notams(f.read())
+        for ok, item in iter_outcomes_parallel(texts):
+            if ok:
+                print(dumps(item))
+            else:
+                print(json.dumps(dict(item, file=path)), file=sys.stderr)
@@ -0,0 +1,986 @@
+"""
+Micro-benchmarks for the NOTAM backend.
+
+Usage:
+    python benchmark.py              # run every benchmark
+    python benchmark.py coordinates  # run selected benchmarks
+    python benchmark.py parse --json after.json --compare before.json
+                                     # save results, and diff against a saved run
+"""
+import argparse
+import asyncio
+import json
+import platform
+import math
+import os
+import random
+import string
+import subprocess
+import sys
+import tempfile
+import timeit
+import tracemalloc
+from datetime import datetime
+from typing import Callable, Dict, Any, List
+
+import admission
+import batch
+import fir_data
+import geometry
+import kml
+import metrics
+import notam_corpus
+import notam_store
+import parse_cache
+import parser as legacy_parser
+import parser_universal
+import results as parse_results
+import simplify
+import spatial_index
+import sqlite_store
+import temporal_index
+import vector_tiles
+import waypoint_db
+import wire
+
+BENCHMARKS: Dict[str, Callable[[], Dict[str, Any]]] = {}
+
+
+def benchmark(func):
+    """Register a benchmark under its function name (minus the bench_ prefix)."""
+    BENCHMARKS[func.__name__[len("bench_"):]] = func
+    return func
+
+
+def best_of(func: Callable[[], Any], number: int, repeat: int = 5) -> float:
+    """Best wall time per call in seconds."""
+    return min(timeit.repeat(func, number=number, repeat=repeat)) / number
+
+
+def dms(value: float, deg_digits: int, pos: str, neg: str) -> str:
+    h = pos if value >= 0 else neg
+    value = abs(value)
+    d = int(value)
+    m = int((value - d) * 60)
+    s = int(round(((value - d) * 60 - m) * 60)) % 60
+    return f"{d:0{deg_digits}d}{m:02d}{s:02d}{h}"
+
+
+def polygon_notam(vertices: int, seed: int = 1) -> str:
+    """A long polygon NOTAM with mixed DMS suffix/prefix vertices."""
+    rng = random.Random(seed)
+    points = []
+    for i in range(vertices):
+        lat = rng.uniform(-60, 60)
+        lon = rng.uniform(-170, 170)
+        if i % 2:
+            points.append(f"{dms(lat, 2, 'N', 'S')} {dms(lon, 3, 'E', 'W')}")
+        else:
+            lat_s = dms(lat, 2, 'N', 'S')
+            lon_s = dms(lon, 3, 'E', 'W')
+            points.append(f"{lat_s[-1]}{lat_s[:-1]} {lon_s[-1]}{lon_s[:-1]}")
+    return (
+        "A0001/24 NOTAMN\n"
+        "Q) OMMM/QRTCA/IV/BO/W/000/040/2515N05522E005\n"
+        "E) TEMPO RESTRICTED AREA ESTABLISHED WI: " + " - ".join(points) + "\n"
+        "F) SFC G) FL240"
+    )
+
+
+@benchmark
+def bench_coordinates() -> Dict[str, Any]:
+    """Single-pass extract_coordinates against the four sequential sweeps."""
+    old = legacy_parser.NotamParser()
+    new = parser_universal.NotamParser()
+    out = {}
+    for vertices in (10, 100, 500):
+        text = polygon_notam(vertices)
+        number = max(1, 2000 // vertices)
+        t_old = best_of(lambda: old.extract_coordinates(text), number)
+        t_new = best_of(lambda: new.extract_coordinates(text), number)
+        out[f"{vertices}_vertices"] = {
+            "sequential_us": round(t_old * 1e6, 1),
+            "single_pass_us": round(t_new * 1e6, 1),
+            "speedup": round(t_old / t_new, 2),
+        }
+    return out
+
+
+SAMPLE_NOTAM = """A0123/23 NOTAMN
+Q) OMMM/QRTCA/IV/BO/W/000/040/2515N05522E005
+A) OMMM B) 2311230600 C) 2311231000
+E) TEMPO RESTRICTED AREA ESTABLISHED WI:
+251600N 0552000E - 251400N 0552400E - 251200N 0552200E - 251600N 0552000E
+F) SFC G) 4000FT AMSL"""
+
+
+@benchmark
+def bench_parser_setup() -> Dict[str, Any]:
+    """Module-level compiled patterns and a shared parser against per-call setup."""
+    out = {
+        # parser.py still compiles its patterns in __init__
+        "construct_per_instance_us": round(best_of(legacy_parser.NotamParser, 2000) * 1e6, 2),
+        "construct_shared_patterns_us": round(best_of(parser_universal.NotamParser, 2000) * 1e6, 2),
+    }
+
+    # These stages are identical in both modules apart from pattern handling
+    old = legacy_parser.NotamParser()
+    new = parser_universal.default_parser
+    total_old = out["construct_per_instance_us"]
+    total_new = 0.0
+    for stage in ("extract_radius", "extract_altitude", "extract_description", "parse_q_line"):
+        t_old = best_of(lambda: getattr(old, stage)(SAMPLE_NOTAM), 5000) * 1e6
+        t_new = best_of(lambda: getattr(new, stage)(SAMPLE_NOTAM), 5000) * 1e6
+        out[stage] = {"string_patterns_us": round(t_old, 2), "precompiled_us": round(t_new, 2)}
+        total_old += t_old
+        total_new += t_new
+
+    out["setup_and_shared_stages"] = {
+        "per_call_us": round(total_old, 1),
+        "shared_us": round(total_new, 1),
+        "speedup": round(total_old / total_new, 2),
+    }
+    out["parse_us"] = round(best_of(lambda: new.parse(SAMPLE_NOTAM), 2000) * 1e6, 1)
+    return out
+
+
+def reference_circle_points(center_lat: float, center_lon: float, radius_nm: float) -> List[List[float]]:
+    """The scalar 64-point flat-earth circle previously used by the KML export."""
+    radius_m = radius_nm * 1852
+    cos_lat = math.cos(math.radians(center_lat))
+    points = []
+    for i in range(65):
+        angle = (i / 64) * 2 * math.pi
+        dx = radius_m * math.cos(angle) / 111320
+        dy = radius_m * math.sin(angle) / (111320 * cos_lat)
+        points.append([center_lat + dy, center_lon + dx])
+    return points
+
+
+@benchmark
+def bench_circles() -> Dict[str, Any]:
+    """Batched geodesic tessellation against the scalar 64-point loop."""
+    rng = random.Random(11)
+    circles = [(rng.uniform(-70, 70), rng.uniform(-180, 180), rng.choice([0.5, 2, 5, 10, 25, 50]))
+               for _ in range(10000)]
+    t_old = best_of(lambda: [reference_circle_points(*c) for c in circles], 1, repeat=3)
+    t_new = best_of(lambda: geometry.circle_polygons(circles), 1, repeat=3)
+    t_single = best_of(lambda: [geometry.circle_polygon(*c) for c in circles[:1000]], 1, repeat=3) * 10
+    rings = geometry.circle_polygons(circles)
+    return {
+        "circles": len(circles),
+        "scalar_64pt_s": round(t_old, 3),
+        "batched_s": round(t_new, 3),
+        "one_at_a_time_s": round(t_single, 3),
+        "speedup": round(t_old / t_new, 2),
+        "mean_vertices": round(sum(len(r) - 1 for r in rings) / len(rings), 1),
+    }
+
+
+@benchmark
+def bench_parallel() -> Dict[str, Any]:
+    """In-process batch parsing against the process pool."""
+    texts = [SAMPLE_NOTAM if i % 4 else polygon_notam(40, seed=i) for i in range(4000)]
+    batch.get_pool()  # start workers outside the timed region
+    t_serial = best_of(lambda: batch.parse_batch(texts), 1, repeat=3)
+    t_parallel = best_of(lambda: batch.parse_batch_parallel(texts), 1, repeat=3)
+    batch.shutdown_pool()
+    return {
+        "notams": len(texts),
+        "workers": os.cpu_count(),
+        "serial_s": round(t_serial, 3),
+        "parallel_s": round(t_parallel, 3),
+        "speedup": round(t_serial / t_parallel, 2),
+    }
+
+
+def reference_generate_kml(notams: List[Dict[str, Any]]) -> str:
+    """The string-concatenation KML writer kml.py replaced, kept for comparison."""
+    
+    kml_header = '''<?xml version="1.0" encoding="UTF-8"?>
+<kml xmlns="http://www.opengis.net/kml/2.2" xmlns:gx="http://www.google.com/kml/ext/2.2">
+<Document>
+    <name>NOTAM Geometry Export</name>
+    <description>Exported from NOTAM Geometry Studio</description>
+    
+    <!-- Styles -->
+    <Style id="routeStyle">
+        <LineStyle>
+            <color>ff0000ff</color>
+            <width>3</width>
+        </LineStyle>
+    </Style>
+    <Style id="areaStyle">
+        <LineStyle>
+            <color>ff00ffff</color>
+            <width>2</width>
+        </LineStyle>
+        <PolyStyle>
+            <color>4400ffff</color>
+        </PolyStyle>
+    </Style>
+    <Style id="circleStyle">
+        <LineStyle>
+            <color>ffff0000</color>
+            <width>2</width>
+        </LineStyle>
+        <PolyStyle>
+            <color>44ff0000</color>
+        </PolyStyle>
+    </Style>
+'''
+    
+    placemarks = []
+    
+    for notam in notams:
+        geom = notam.get('geometry', {})
+        geom_type = geom.get('type', 'unknown')
+        coords = geom.get('coordinates', [])
+        radius_nm = geom.get('radius_nm')
+        
+        altitude = notam.get('altitude', {})
+        alt_lower = altitude.get('lower', 'SFC')
+        alt_upper = altitude.get('upper', 'UNL')
+        
+        ids = notam.get('ids', [])
+        notam_id = ', '.join(ids) if ids else 'Unknown'
+        description = notam.get('description', '')
+        raw_text = notam.get('raw_text', '')
+        
+        # Extract timestamps if available
+        timestamp = datetime.utcnow().isoformat() + 'Z'
+        
+        # Build extended data
+        extended_data = f'''
+        <ExtendedData>
+            <Data name="NOTAM_ID">
+                <value>{notam_id}</value>
+            </Data>
+            <Data name="Type">
+                <value>{geom_type}</value>
+            </Data>
+            <Data name="Altitude_Lower">
+                <value>{alt_lower}</value>
+            </Data>
+            <Data name="Altitude_Upper">
+                <value>{alt_upper}</value>
+            </Data>
+            <Data name="Description">
+                <value>{description}</value>
+            </Data>
+            <Data name="Timestamp">
+                <value>{timestamp}</value>
+            </Data>
+        </ExtendedData>'''
+        
+        # Determine style
+        if geom_type == 'multiline' or geom_type == 'line':
+            style = 'routeStyle'
+        elif geom_type == 'circle':
+            style = 'circleStyle'
+        else:
+            style = 'areaStyle'
+        
+        placemark = f'''
+    <Placemark>
+        <name>{notam_id}</name>
+        <description><![CDATA[
+            <b>Type:</b> {geom_type}<br/>
+            <b>Altitude:</b> {alt_lower} - {alt_upper}<br/>
+            <b>Description:</b> {description}<br/>
+        ]]></description>
+        <styleUrl>#{style}</styleUrl>
+        {extended_data}'''
+        
+        # Generate geometry based on type
+        if geom_type == 'multiline':
+            # Multiple line segments
+            placemark += '\n        <MultiGeometry>'
+            for segment in coords:
+                placemark += '\n            <LineString>'
+                placemark += '\n                <coordinates>'
+                for point in segment:
+                    placemark += f'\n                    {point[1]},{point[0]},0'
+                placemark += '\n                </coordinates>'
+                placemark += '\n            </LineString>'
+            placemark += '\n        </MultiGeometry>'
+            
+        elif geom_type == 'line':
+            placemark += '\n        <LineString>'
+            placemark += '\n            <coordinates>'
+            for point in coords:
+                placemark += f'\n                {point[1]},{point[0]},0'
+            placemark += '\n            </coordinates>'
+            placemark += '\n        </LineString>'
+            
+        elif geom_type == 'polygon':
+            placemark += '\n        <Polygon>'
+            placemark += '\n            <outerBoundaryIs>'
+            placemark += '\n                <LinearRing>'
+            placemark += '\n                    <coordinates>'
+            for point in coords:
+                placemark += f'\n                        {point[1]},{point[0]},0'
+            placemark += '\n                    </coordinates>'
+            placemark += '\n                </LinearRing>'
+            placemark += '\n            </outerBoundaryIs>'
+            placemark += '\n        </Polygon>'
+            
+        elif geom_type == 'circle' and radius_nm and len(coords) > 0:
+            # Approximate circle with polygon
+            import math
+            center_lat, center_lon = coords[0]
+            radius_m = radius_nm * 1852  # Convert NM to meters
+            num_points = 64
+            
+            placemark += '\n        <Polygon>'
+            placemark += '\n            <outerBoundaryIs>'
+            placemark += '\n                <LinearRing>'
+            placemark += '\n                    <coordinates>'
+            
+            for i in range(num_points + 1):
+                angle = (i / num_points) * 2 * math.pi
+                dx = radius_m * math.cos(angle) / 111320  # Approx meters to degrees
+                dy = radius_m * math.sin(angle) / (111320 * math.cos(math.radians(center_lat)))
+                lat = center_lat + dy
+                lon = center_lon + dx
+                placemark += f'\n                        {lon},{lat},0'
+            
+            placemark += '\n                    </coordinates>'
+            placemark += '\n                </LinearRing>'
+            placemark += '\n            </outerBoundaryIs>'
+            placemark += '\n        </Polygon>'
+            
+        elif geom_type == 'point' and len(coords) > 0:
+            placemark += '\n        <Point>'
+            placemark += f'\n            <coordinates>{coords[0][1]},{coords[0][0]},0</coordinates>'
+            placemark += '\n        </Point>'
+        
+        placemark += '\n    </Placemark>'
+        placemarks.append(placemark)
+    
+    kml_footer = '''
+</Document>
+</kml>'''
+    
+    return kml_header + ''.join(placemarks) + kml_footer
+
+
+@benchmark
+def bench_kml() -> Dict[str, Any]:
+    """Streaming KML writer against the string-concatenation version."""
+    results = parser_universal.default_parser.parse(polygon_notam(200)), parser_universal.default_parser.parse(SAMPLE_NOTAM)
+    circle = parser_universal.default_parser.parse(
+        "Q) OMMM/QWULW/IV/BO/W/000/005/2500N05530E002 E) UAS WI 2NM RADIUS OF 250000N 0553000E")
+    notams = [results[0], results[1], circle] * 1000
+    t_old = best_of(lambda: reference_generate_kml(notams), 1, repeat=3)
+    t_new = best_of(lambda: kml.generate_kml(notams), 1, repeat=3)
+    return {
+        "placemarks": len(notams),
+        "concat_s": round(t_old, 3),
+        "streaming_s": round(t_new, 3),
+        "speedup": round(t_old / t_new, 2),
+        "largest_chunk_kb": round(max(len(c) for c in kml.iter_kml(notams)) / 1024, 1),
+        "document_kb": round(len(kml.generate_kml(notams)) / 1024, 1),
+    }
+
+
+@benchmark
+def bench_cache() -> Dict[str, Any]:
+    """Re-ingesting an hour-to-hour overlapping feed with and without the parse cache."""
+    def notam(i):
+        return polygon_notam(20, seed=i).replace("A0001/24", f"A{i % 10000:04d}/24")
+
+    previous = [notam(i) for i in range(2000)]
+    current = [notam(i) for i in range(200, 2200)]  # 90% overlap
+    t_uncached = best_of(lambda: batch.parse_batch(current), 1, repeat=3)
+
+    def reingest():
+        cache = parse_cache.ParseCache(maxsize=10000)
+        batch.parse_batch(previous, cache)
+        start = timeit.default_timer()
+        batch.parse_batch(current, cache)
+        return timeit.default_timer() - start, cache.stats()
+
+    t_cached, stats = min(reingest() for _ in range(3))
+    return {
+        "notams": len(current),
+        "uncached_s": round(t_uncached, 3),
+        "cached_s": round(t_cached, 3),
+        "speedup": round(t_uncached / t_cached, 2),
+        "hit_rate": stats["hit_rate"],
+    }
+
+
+@benchmark
+def bench_spatial_index() -> Dict[str, Any]:
+    """STR-packed R-tree viewport and point queries against a linear scan."""
+    rng = random.Random(5)
+    items = []
+    for i in range(50000):
+        lat, lon = rng.uniform(-60, 60), rng.uniform(-170, 170)
+        if i % 2:
+            geometry = {"type": "circle", "coordinates": [[lat, lon]], "radius_nm": rng.uniform(1, 30)}
+        else:
+            size = rng.uniform(0.05, 1.0)
+            geometry = {"type": "polygon", "coordinates": [
+                [lat, lon], [lat + size, lon], [lat + size, lon + size], [lat, lon + size], [lat, lon]]}
+        items.append({"geometry": geometry})
+
+    start = timeit.default_timer()
+    index = spatial_index.SpatialIndex(items)
+    build_s = timeit.default_timer() - start
+
+    boxes = [spatial_index.geometry_bounds(item["geometry"]) for item in items]
+    viewport = (24.0, 54.0, 27.0, 58.0)
+
+    def linear_scan():
+        return [i for i, b in enumerate(boxes)
+                if not (b[0] > viewport[2] or b[2] < viewport[0] or b[1] > viewport[3] or b[3] < viewport[1])]
+
+    return {
+        "notams": len(items),
+        "build_s": round(build_s, 3),
+        "viewport_hits": len(index.query_bbox(*viewport)),
+        "viewport_query_us": round(best_of(lambda: index.query_bbox(*viewport), 500) * 1e6, 1),
+        "linear_scan_us": round(best_of(linear_scan, 20) * 1e6, 1),
+        "point_query_us": round(best_of(lambda: index.query_point(25.2, 55.3), 500) * 1e6, 1),
+    }
+
+
+@benchmark
+def bench_waypoints() -> Dict[str, Any]:
+    """Load time, memory and lookup speed of a 300k-entry waypoint file."""
+    rng = random.Random(9)
+    count = 300000
+    idents = ["".join(rng.choices(string.ascii_uppercase, k=5)) for _ in range(count)]
+    rows = [(ident, rng.uniform(-90, 90), rng.uniform(-180, 180)) for ident in idents]
+    probes = idents[::1000]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "waypoints.csv")
+        with open(path, "w") as f:
+            f.writelines(f"{ident},{lat:.6f},{lon:.6f}\n" for ident, lat, lon in rows)
+
+        start = timeit.default_timer()
+        waypoint_db.WaypointStore.open(path)  # parses the CSV, writes the snapshot
+        csv_s = timeit.default_timer() - start
+
+        tracemalloc.start()
+        store = waypoint_db.WaypointStore.from_rows(rows)
+        store_mb = tracemalloc.get_traced_memory()[0] / 1e6
+        tracemalloc.stop()
+        del store
+
+        tracemalloc.start()
+        as_dict = {ident: [lat, lon] for ident, lat, lon in rows}
+        dict_mb = tracemalloc.get_traced_memory()[0] / 1e6
+        tracemalloc.stop()
+
+        start = timeit.default_timer()
+        mapped = waypoint_db.WaypointStore.open(path)
+        snapshot_s = timeit.default_timer() - start
+        try:
+            lookup_us = best_of(lambda: [mapped.lookup(p) for p in probes], 20) / len(probes) * 1e6
+        finally:
+            mapped.close()
+
+    return {
+        "waypoints": count,
+        "csv_load_s": round(csv_s, 3),
+        "snapshot_open_ms": round(snapshot_s * 1000, 3),
+        "store_mb": round(store_mb, 1),
+        "dict_of_lists_mb": round(dict_mb, 1),
+        "lookup_us": round(lookup_us, 2),
+        "dict_lookup_us": round(best_of(lambda: [as_dict.get(p) for p in probes], 20) / len(probes) * 1e6, 2),
+    }
+
+
+@benchmark
+def bench_firs() -> Dict[str, Any]:
+    """Cold start of a FIR GeoJSON vs its binary cache, and payload per level of detail."""
+    rng = random.Random(10)
+    features = []
+    for i in range(100):
+        lat, lon, radius = rng.uniform(-60, 60), rng.uniform(-170, 170), rng.uniform(2, 8)
+        ring = []
+        for k in range(4000):
+            a = 2 * math.pi * k / 4000
+            r = radius * (1 + 0.05 * math.sin(7 * a) + 0.002 * rng.random())
+            ring.append([round(lon + r * math.cos(a), 6), round(lat + r * math.sin(a), 6)])
+        ring.append(ring[0])
+        code = "".join(rng.choices(string.ascii_uppercase, k=4))
+        features.append({"type": "Feature", "properties": {"ICAOCODE": code},
+                         "geometry": {"type": "Polygon", "coordinates": [ring]}})
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "firs.geojson")
+        with open(path, "w") as f:
+            json.dump({"type": "FeatureCollection", "features": features}, f)
+
+        start = timeit.default_timer()
+        store = fir_data.FirStore.open(path)  # parses, simplifies and writes the cache
+        geojson_s = timeit.default_timer() - start
+        start = timeit.default_timer()
+        fir_data.FirStore.open(path)
+        cache_s = timeit.default_timer() - start
+        geojson_mb = os.path.getsize(path) / 1e6
+        cache_mb = os.path.getsize(os.path.join(tmp, "firs.bin")) / 1e6
+
+    code = store.codes()[0]
+    out = {
+        "firs": len(store),
+        "geojson_mb": round(geojson_mb, 1),
+        "cache_mb": round(cache_mb, 1),
+        "geojson_load_s": round(geojson_s, 2),
+        "cache_load_s": round(cache_s, 3),
+    }
+    for tolerance in fir_data.LOD_TOLERANCES:
+        out[f"vertices_at_{tolerance}"] = len(store.boundary(code, tolerance))
+    return out
+
+
+@benchmark
+def bench_simplify() -> Dict[str, Any]:
+    """Douglas-Peucker on a 20k-vertex polygon: scalar, vectorised and memoized, plus payload per zoom."""
+    rng = random.Random(12)
+    n = 20000
+    ring = []
+    for k in range(n):
+        a = 2 * math.pi * k / n
+        r = 3.0 * (1 + 0.05 * math.sin(9 * a) + 0.001 * rng.random())
+        ring.append([25.0 + r * math.sin(a), 55.0 + r * math.cos(a)])
+    ring.append(ring[0])
+    tolerance = simplify.tolerance_for_zoom(8)
+
+    def uncached(min_span):
+        def run():
+            simplify._memo.clear()
+            simplify.VECTOR_MIN_SPAN = min_span
+            return simplify.simplify_ring(ring, tolerance)
+        return run
+
+    default_span = simplify.VECTOR_MIN_SPAN
+    try:
+        t_scalar = best_of(uncached(10 ** 9), 1, repeat=3)
+        t_vector = best_of(uncached(default_span), 1, repeat=3)
+    finally:
+        simplify.VECTOR_MIN_SPAN = default_span
+    simplify.simplify_ring(ring, tolerance)
+    t_memo = best_of(lambda: simplify.simplify_ring(ring, tolerance), 10, repeat=3)
+
+    out = {
+        "vertices": n,
+        "scalar_ms": round(t_scalar * 1000, 1),
+        "vectorized_ms": round(t_vector * 1000, 1),
+        "memoized_ms": round(t_memo * 1000, 2),
+        "speedup": round(t_scalar / t_vector, 2),
+    }
+    for zoom in (4, 8, 12):
+        out[f"vertices_at_zoom_{zoom}"] = len(simplify.simplify_ring(ring, simplify.tolerance_for_zoom(zoom)))
+    return out
+
+
+@benchmark
+def bench_temporal_index() -> Dict[str, Any]:
+    """"Active between t1 and t2" over 200k validity windows against a linear scan."""
+    rng = random.Random(14)
+    year = 365 * 86400
+    items = []
+    for _ in range(200000):
+        start = rng.randrange(0, year)
+        items.append({"validity": {"start": start, "end": start + rng.randrange(3600, 14 * 86400)}})
+
+    start = timeit.default_timer()
+    index = temporal_index.TemporalIndex(items)
+    build_s = timeit.default_timer() - start
+
+    t1, t2 = year // 2, year // 2 + 3600
+    intervals = [temporal_index.validity_interval(item) for item in items]
+
+    def linear_scan():
+        return [i for i, (s, e) in enumerate(intervals) if s <= t2 and e >= t1]
+
+    return {
+        "notams": len(items),
+        "build_s": round(build_s, 3),
+        "active": len(index.query(t1, t2)),
+        "query_ms": round(best_of(lambda: index.query(t1, t2), 20) * 1000, 3),
+        "linear_scan_ms": round(best_of(linear_scan, 3) * 1000, 3),
+    }
+
+
+@benchmark
+def bench_tiles() -> Dict[str, Any]:
+    """Vector tile size and render time for 10k regional NOTAMs, against shipping them as JSON."""
+    rng = random.Random(15)
+    store = notam_store.NotamStore()
+    notams = []
+    for i in range(10000):
+        lat, lon = rng.uniform(15, 35), rng.uniform(45, 75)
+        if i % 2:
+            geometry = {"type": "circle", "coordinates": [[lat, lon]], "radius_nm": rng.uniform(1, 20)}
+        else:
+            ring = [[lat + 0.3 * math.sin(a / 40 * 2 * math.pi), lon + 0.3 * math.cos(a / 40 * 2 * math.pi)]
+                    for a in range(40)]
+            geometry = {"type": "polygon", "coordinates": ring + [ring[0]], "radius_nm": None}
+        notams.append({"raw_text": "", "ids": [f"A{i:04d}/24"], "geometry": geometry,
+                       "altitude": {"lower": "SFC", "upper": "FL100"}, "description": ""})
+    store.apply_all(notams)
+    json_kb = len(json.dumps(notams)) / 1024
+
+    out = {"notams": len(notams), "json_kb": round(json_kb, 1)}
+    for z, x, y in ((4, 10, 6), (8, 175, 110)):
+        tile = vector_tiles.render_tile(store, z, x, y)
+        out[f"z{z}_tile_kb"] = round(len(tile) / 1024, 1)
+        out[f"z{z}_render_ms"] = round(best_of(lambda: vector_tiles.render_tile(store, z, x, y), 1, repeat=3) * 1000, 1)
+    cache = vector_tiles.TileCache()
+    vector_tiles.render_tile(store, 4, 10, 6, cache)
+    out["cached_us"] = round(best_of(lambda: vector_tiles.render_tile(store, 4, 10, 6, cache), 1000) * 1e6, 1)
+    return out
+
+@benchmark
+def bench_wire() -> Dict[str, Any]:
+    """Bytes on the wire and serialization time of parse results as JSON, polyline and float32."""
+    rng = random.Random(16)
+    results = []
+    for i in range(1000):
+        lat, lon = rng.uniform(-60, 60), rng.uniform(-170, 170)
+        # Mostly small areas, with the odd FIR-sized boundary
+        vertices = 2000 if i % 100 == 0 else rng.randint(4, 40)
+        ring = [[round(lat + 2 * math.sin(a / vertices * 2 * math.pi), 6),
+                 round(lon + 2 * math.cos(a / vertices * 2 * math.pi), 6)] for a in range(vertices)]
+        results.append({"raw_text": "", "ids": [f"A{i:04d}/24"],
+                        "geometry": {"type": "polygon", "coordinates": ring + [ring[0]], "radius_nm": None},
+                        "altitude": {"lower": "SFC", "upper": "FL100"}, "description": ""})
+
+    out = {"notams": len(results)}
+    for name in ("json",) + wire.ENCODINGS:
+        encoding = wire.requested_encoding(name)
+        serialize = lambda: json.dumps([wire.encode_result(r, encoding) for r in results])
+        out[f"{name}_kb"] = round(len(serialize()) / 1024, 1)
+        out[f"{name}_ms"] = round(best_of(serialize, 1, repeat=3) * 1000, 1)
+    return out
+
+# Seeded corpus shared by the parser benchmarks so runs are comparable
+CORPUS_SIZE = 2000
+CORPUS_SEED = 17
+
+# Stages both parsers implement, and those only parser_universal has
+SHARED_STAGES = ("extract_coordinates", "extract_radius", "extract_altitude", "extract_description", "parse_q_line")
+UNIVERSAL_STAGES = ("extract_validity", "is_route_notam", "extract_route_segments")
+
+
+def corpus() -> notam_corpus.Corpus:
+    """The benchmark corpus, with its waypoints and FIRs installed."""
+    generated = notam_corpus.generate(CORPUS_SIZE, seed=CORPUS_SEED)
+    generated.install()
+    return generated
+
+
+def per_notam_us(func: Callable[[str], Any], texts: List[str], repeat: int = 3) -> float:
+    """Best time per NOTAM in microseconds of func over texts."""
+    return best_of(lambda: [func(t) for t in texts], 1, repeat=repeat) / len(texts) * 1e6
+
+
+@benchmark
+def bench_stages() -> Dict[str, Any]:
+    """Each NotamParser stage over the synthetic corpus, parser.py against parser_universal.py."""
+    texts = corpus().texts()
+    old = legacy_parser.NotamParser()
+    new = parser_universal.NotamParser()
+    out = {"notams": len(texts)}
+    for stage in SHARED_STAGES:
+        out[stage] = {
+            "parser_us": round(per_notam_us(getattr(old, stage), texts), 2),
+            "universal_us": round(per_notam_us(getattr(new, stage), texts), 2),
+        }
+    for stage in UNIVERSAL_STAGES:
+        out[stage] = {"universal_us": round(per_notam_us(getattr(new, stage), texts), 2)}
+    waypoint_db.set_store(None)
+    fir_data.set_store(None)
+    return out
+
+
+@benchmark
+def bench_parse() -> Dict[str, Any]:
+    """Whole-NOTAM parse throughput per geometry kind, parser.py against parser_universal.py."""
+    generated = corpus()
+    old = legacy_parser.NotamParser()
+    new = parser_universal.NotamParser()
+    out = {}
+    for kind in notam_corpus.KINDS + (None,):
+        texts = generated.texts(kind)
+        t_old = per_notam_us(old.parse, texts)
+        t_new = per_notam_us(new.parse, texts)
+        out[kind or "all"] = {
+            "parser_per_s": round(1e6 / t_old),
+            "universal_per_s": round(1e6 / t_new),
+            "speedup": round(t_old / t_new, 2),
+        }
+    waypoint_db.set_store(None)
+    fir_data.set_store(None)
+    return out
+
+
+@benchmark
+def bench_generate_kml() -> Dict[str, Any]:
+    """generate_kml over the parsed synthetic corpus, full detail and at zoom 8."""
+    results = [parser_universal.default_parser.parse(t) for t in corpus().texts()]
+    out = {"notams": len(results)}
+    for label, tolerance in (("full", None), ("z8", simplify.tolerance_for_zoom(8))):
+        out[f"{label}_kb"] = round(len(kml.generate_kml(results, tolerance)) / 1024, 1)
+        out[f"{label}_ms"] = round(best_of(lambda: kml.generate_kml(results, tolerance), 1, repeat=3) * 1000, 1)
+    waypoint_db.set_store(None)
+    fir_data.set_store(None)
+    return out
+
+
+@benchmark
+def bench_fields() -> Dict[str, Any]:
+    """Per-NOTAM parse time over the synthetic corpus for full results and field projections."""
+    texts = corpus().texts()
+    parser = parser_universal.NotamParser()
+    out = {"full_us": round(per_notam_us(parser.parse, texts), 1)}
+    for fields in (("geometry",), ("ids", "altitude"), ("ids", "validity", "description")):
+        out["+".join(fields) + "_us"] = round(per_notam_us(lambda t: parser.parse(t, fields), texts), 1)
+    waypoint_db.set_store(None)
+    fir_data.set_store(None)
+    return out
+
+
+def traced_bytes(build: Callable[[], Any]) -> int:
+    """Bytes still allocated by build() once it returns (the result is kept alive)."""
+    tracemalloc.start()
+    kept = build()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del kept
+    return size
+
+
+@benchmark
+def bench_results() -> Dict[str, Any]:
+    """Memory and JSON time of 10k compact NotamResults against the nested dict shape."""
+    generated = notam_corpus.generate(10000, seed=CORPUS_SEED)
+    generated.install()
+    texts = generated.texts()
+    parser = parser_universal.NotamParser()
+    parser.parse(texts[0])
+    # raw_text is the caller's string in both shapes, so it is not counted.
+    # FIR-wide results share the FIR store's ring; the dict shape copies it.
+    compact_bytes = traced_bytes(lambda: [parser.parse(t) for t in texts])
+    compact = [parser.parse(t) for t in texts]
+    dict_bytes = traced_bytes(lambda: [r.to_dict() for r in compact])
+    waypoint_db.set_store(None)
+    fir_data.set_store(None)
+    dicts = [r.to_dict() for r in compact]
+    return {
+        "notams": len(compact),
+        "dict_mb": round(dict_bytes / 2 ** 20, 1),
+        "compact_mb": round(compact_bytes / 2 ** 20, 1),
+        "compact_per_notam_b": round(compact_bytes / len(compact)),
+        "dict_per_notam_b": round(dict_bytes / len(compact)),
+        "json_dicts_ms": round(best_of(lambda: json.dumps(dicts), 1, repeat=3) * 1000, 1),
+        "json_compact_ms": round(best_of(lambda: parse_results.dumps(compact), 1, repeat=3) * 1000, 1),
+    }
+
+
+@benchmark
+def bench_metrics() -> Dict[str, Any]:
+    """Parse time over the synthetic corpus with and without per-stage instrumentation."""
+    texts = corpus().texts()
+    t_plain = per_notam_us(parser_universal.NotamParser().parse, texts)
+    t_timed = per_notam_us(metrics.InstrumentedNotamParser().parse, texts)
+    waypoint_db.set_store(None)
+    fir_data.set_store(None)
+    return {
+        "plain_us": round(t_plain, 1),
+        "instrumented_us": round(t_timed, 1),
+        "overhead_pct": round((t_timed / t_plain - 1) * 100, 1),
+    }
+
+
+@benchmark
+def bench_sqlite_store() -> Dict[str, Any]:
+    """SQLite store: bulk ingest of the parsed corpus, unchanged re-ingest, and indexed queries against the in-memory store."""
+    generated = corpus()
+    results = [parser_universal.default_parser.parse(text) for text in generated.texts()]
+    memory = notam_store.NotamStore()
+    memory.apply_all(results)
+    box = (-20.0, -60.0, 20.0, 60.0)
+    with tempfile.TemporaryDirectory() as tmp:
+        store = sqlite_store.SqliteNotamStore(os.path.join(tmp, "notams.db"))
+        start = timeit.default_timer()
+        store.apply_all(results)
+        ingest_s = timeit.default_timer() - start
+        out = {
+            "notams": len(store),
+            "ingest_per_s": round(len(results) / ingest_s),
+            "reingest_per_s": round(len(results) / best_of(lambda: store.apply_all(results), 1, repeat=3)),
+            "bbox_hits": len(store.query(bbox=box)),
+            "bbox_ms": round(best_of(lambda: store.query(bbox=box), 5) * 1000, 2),
+            "memory_bbox_ms": round(best_of(lambda: memory.query(bbox=box), 5) * 1000, 2),
+            "subject_ms": round(best_of(lambda: store.query(subjects=["RT"], bbox=box), 5) * 1000, 2),
+            "file_kb": round(os.path.getsize(os.path.join(tmp, "notams.db")) / 1024),
+        }
+        store.close()
+    waypoint_db.set_store(None)
+    fir_data.set_store(None)
+    return out
+
+
+@benchmark
+def bench_admission() -> Dict[str, Any]:
+    """Longest event loop stall while a 1000-NOTAM batch parses on the loop and on the admission pool."""
+    feed = "\n".join(corpus().texts()[:1000])
+    cpu = admission.Admission(limit=2, queue=8)
+
+    async def stall_ms(on_loop: bool) -> float:
+        worst = 0.0
+        done = False
+
+        async def tick():
+            nonlocal worst
+            while not done:
+                start = timeit.default_timer()
+                await asyncio.sleep(0.001)
+                worst = max(worst, timeit.default_timer() - start - 0.001)
+
+        ticker = asyncio.ensure_future(tick())
+        await asyncio.sleep(0.01)
+        if on_loop:
+            batch.parse_feed(feed)
+        else:
+            await cpu.run(batch.parse_feed, feed)
+        done = True
+        await ticker
+        return round(worst * 1000, 1)
+
+    out = {
+        "on_loop_stall_ms": asyncio.run(stall_ms(True)),
+        "admission_stall_ms": asyncio.run(stall_ms(False)),
+    }
+    waypoint_db.set_store(None)
+    fir_data.set_store(None)
+    return out
+
+
+COLD_START_NOTAM = (
+    "A1234/24 NOTAMN Q) EGTT/QRTCA/IV/BO/W/000/100/5130N00010W005 A) EGTT "
+    "B) 2401010000 C) 2401312359 E) TEMPORARY RESTRICTED AREA 5130N 00010W RADIUS 5NM"
+)
+
+COLD_START_SCRIPT = """
+import time
+start = time.perf_counter()
+import {module}
+imported = time.perf_counter()
+import parser_universal
+parser_universal.default_parser.parse({notam!r})
+parsed = time.perf_counter()
+print((imported - start) * 1000, (parsed - imported) * 1000)
+"""
+
+
+def cold_start(module: str) -> List[float]:
+    """[import ms, first parse ms] of module in a fresh interpreter."""
+    script = COLD_START_SCRIPT.format(module=module, notam=COLD_START_NOTAM)
+    output = subprocess.run([sys.executable, "-c", script], capture_output=True, text=True, check=True,
+                            cwd=os.path.dirname(os.path.abspath(__file__))).stdout
+    return [float(value) for value in output.split()]
+
+
+def import_profile(module: str, top: int = 8) -> Dict[str, float]:
+    """Cumulative time (ms) of the slowest direct imports of module, from `python -X importtime`."""
+    stderr = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                            capture_output=True, text=True, check=True,
+                            cwd=os.path.dirname(os.path.abspath(__file__))).stderr
+    times: Dict[str, float] = {}
+    children: Dict[str, float] = {}
+    for line in stderr.splitlines():
+        # "import time: self [us] | cumulative | imported package"
+        fields = line.split("|")
+        if not line.startswith("import time:") or len(fields) != 3 or not fields[1].strip().isdigit():
+            continue
+        # Nesting is shown by indenting the name two spaces per level, and a
+        # module is listed after everything it imported
+        name = fields[2].rstrip()
+        depth = len(name) - len(name.lstrip())
+        if depth == 3:
+            children[name.strip()] = int(fields[1]) / 1000
+        elif depth == 1:
+            if name.strip() == module:
+                times = children
+            children = {}
+    slowest = sorted(times.items(), key=lambda item: -item[1])[:top]
+    return {name: round(ms, 1) for name, ms in slowest}
+
+
+@benchmark
+def bench_cold_start() -> Dict[str, Any]:
+    """Fresh-interpreter import of the parser and of the app, time to the first parse, and the slowest imports of main."""
+    parser_runs = [cold_start("parser_universal") for _ in range(3)]
+    main_runs = [cold_start("main") for _ in range(3)]
+    return {
+        "import_parser_ms": round(min(run[0] for run in parser_runs), 1),
+        "first_parse_ms": round(min(run[1] for run in parser_runs), 1),
+        "import_main_ms": round(min(run[0] for run in main_runs), 1),
+        "first_parse_after_main_ms": round(min(run[1] for run in main_runs), 1),
+        "main_imports_ms": import_profile("main"),
+    }
+
+
+def compare(current: Any, previous: Any, path: str = "") -> List[str]:
+    """Lines "path: previous -> current (ratio)" for every number in both runs."""
+    if isinstance(current, dict) and isinstance(previous, dict):
+        lines = []
+        for key in current:
+            if key in previous:
+                lines += compare(current[key], previous[key], f"{path}.{key}" if path else key)
+        return lines
+    if isinstance(current, (int, float)) and isinstance(previous, (int, float)) \
+            and not isinstance(current, bool) and current != previous:
+        ratio = f" (x{current / previous:.2f})" if previous else ""
+        return [f"{path}: {previous} -> {current}{ratio}"]
+    return []
+
+
+def main(argv: List[str]) -> None:
+    args = argparse.ArgumentParser(description="Micro-benchmarks for the NOTAM backend.")
+    args.add_argument("names", nargs="*", help=f"benchmarks to run (default: all): {', '.join(BENCHMARKS)}")
+    args.add_argument("--json", metavar="PATH", help="write the results to PATH as JSON")
+    args.add_argument("--compare", metavar="PATH", help="compare with the results saved in PATH")
+    options = args.parse_args(argv)
+
+    names = options.names or list(BENCHMARKS)
+    for name in names:
+        if name not in BENCHMARKS:
+            sys.exit(f"Unknown benchmark '{name}'. Available: {', '.join(BENCHMARKS)}")
+    results = {}
+    for name in names:
+        print(f"--- {name} ---")
+        results[name] = BENCHMARKS[name]()
+        for key, value in results[name].items():
+            print(f"{key}: {value}")
+
+    if options.json:
+        run = {
+            "created": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "parser_version": parser_universal.PARSER_VERSION,
+            "corpus": {"size": CORPUS_SIZE, "seed": CORPUS_SEED},
+            "results": results,
+        }
+        with open(options.json, "w") as f:
+            json.dump(run, f, indent=2)
+    if options.compare:
+        with open(options.compare) as f:
+            previous = json.load(f)
+        print(f"--- compared with {options.compare} ({previous.get('created', '?')}) ---")
+        for line in compare(results, previous.get("results", {})) or ["no differences"]:
+            print(line)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,75 @@
+"""
+Prebuild the binary data snapshots for a read-only deployment.
+
+The waypoint and FIR stores open their source files (CSV, GeoJSON) through
+a binary snapshot next to them, writing it on first use. A serverless
+function cannot write it and may not keep file modification times, so run
+this at build time and point NOTAM_WAYPOINTS / NOTAM_FIRS at the .bin
+files: each cold start then maps or reads them instead of parsing and
+simplifying the sources. Snapshots carry a format version and are rejected
+(not misread) by a backend that expects a different one.
+
+Usage:
+    python build_snapshots.py                      # the configured (or default) data files
+    python build_snapshots.py --waypoints nav.csv --firs firs.geojson
+"""
+import argparse
+import os
+import sys
+import timeit
+from typing import List, Optional
+
+import fir_data
+import waypoint_db
+
+
+def snapshot_path(path: str) -> str:
+    return os.path.splitext(path)[0] + '.bin'
+
+
+def build_waypoints(path: str) -> str:
+    """Write the snapshot of a waypoint CSV file; returns its path."""
+    target = snapshot_path(path)
+    waypoint_db.WaypointStore.from_csv(path).write_snapshot(target)
+    return target
+
+
+def build_firs(path: str) -> str:
+    """Write the cache of a FIR GeoJSON file; returns its path."""
+    target = snapshot_path(path)
+    fir_data.FirStore.from_geojson(path).write_cache(target)
+    return target
+
+
+def _source(option: Optional[str], variable: str, default: str) -> Optional[str]:
+    # An explicit path must exist; the configured/default one is skipped if absent
+    if option:
+        if not os.path.exists(option):
+            sys.exit(f"{option}: no such file")
+        return option
+    path = os.environ.get(variable) or default
+    if path.lower().endswith('.bin') or not os.path.exists(path):
+        return None
+    return path
+
+
+def main(argv: List[str]) -> None:
+    args = argparse.ArgumentParser(description="Prebuild the binary waypoint and FIR snapshots.")
+    args.add_argument("--waypoints", metavar="CSV", help="waypoint file (default: NOTAM_WAYPOINTS or data/waypoints.csv)")
+    args.add_argument("--firs", metavar="GEOJSON", help="FIR boundaries (default: NOTAM_FIRS or data/firs.geojson)")
+    options = args.parse_args(argv)
+
+    jobs = [
+        (_source(options.waypoints, 'NOTAM_WAYPOINTS', waypoint_db.DEFAULT_PATH), build_waypoints),
+        (_source(options.firs, 'NOTAM_FIRS', fir_data.DEFAULT_PATH), build_firs),
+    ]
+    for path, build in jobs:
+        if path is None:
+            continue
+        start = timeit.default_timer()
+        target = build(path)
+        print(f"{target}: {os.path.getsize(target) / 1e6:.1f} MB in {timeit.default_timer() - start:.2f} s")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -1,6 +1,270 @@
+# FIR boundary data
+# Boundaries come from data/firs.geojson (see fetch_data.py) or the file named
+# by NOTAM_FIRS, loaded on first use and indexed by ICAO code.
 
-# Placeholder for FIR boundary data
-# In a real application, this would query a database of FIR boundaries.
+import json
+import os
+import struct
+import sys
+import threading
+from array import array
+from typing import List, Dict, Any, Optional, Sequence
 
-def get_fir_boundary(fir_code):
+from simplify import simplify_ring
+
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'firs.geojson')
+
+# Douglas-Peucker tolerances (degrees) of the pre-computed levels of detail.
+# Level 0 is the boundary as published; 0.1 degrees is about 6 NM.
+LOD_TOLERANCES = (0.0, 0.005, 0.02, 0.1)
+
+# Feature properties that may hold the FIR's ICAO code, in order of preference
+CODE_PROPERTIES = ('ICAOCODE', 'ICAO', 'icao', 'FIR', 'fir', 'ident', 'id', 'code')
+
+# Cache layout, plain data only (nothing in it is executed on load): header,
+# the tolerance of each of the `levels` levels as float64, then per FIR its
+# 4-byte code and the length (in floats) of each level, then every level's
+# lat, lon float64 values in the same order
+CACHE_MAGIC = b'NGSFIR02'
+CACHE_HEADER = struct.Struct('<8sIIB7x')
+BYTE_ORDER = 0 if sys.byteorder == 'little' else 1
+
+
+def _ring_area(ring: Sequence[Sequence[float]]) -> float:
+    area = 0.0
+    for (x1, y1), (x2, y2) in zip(ring, ring[1:]):
+        area += x1 * y2 - x2 * y1
+    return abs(area) / 2
+
+
+def _feature_code(feature: Dict[str, Any]) -> Optional[str]:
+    properties = feature.get('properties') or {}
+    for key in CODE_PROPERTIES:
+        value = properties.get(key)
+        if isinstance(value, str) and len(value) == 4 and value.isascii() and value.isalnum():
+            return value.upper()
+    value = feature.get('id')
+    if isinstance(value, str) and len(value) == 4 and value.isascii() and value.isalnum():
+        return value.upper()
     return None
+
+
+def _outer_rings(geometry: Dict[str, Any]) -> List[List[List[float]]]:
+    """Outer rings of a (Multi)Polygon as [lat, lon] lists (GeoJSON is lon, lat)."""
+    geom_type = geometry.get('type')
+    if geom_type == 'Polygon':
+        polygons = [geometry.get('coordinates') or []]
+    elif geom_type == 'MultiPolygon':
+        polygons = geometry.get('coordinates') or []
+    else:
+        return []
+    return [[[p[1], p[0]] for p in polygon[0]] for polygon in polygons if polygon and len(polygon[0]) >= 4]
+
+
+def _flatten(ring: Sequence[Sequence[float]]) -> array:
+    return array('d', [value for point in ring for value in point[:2]])
+
+
+class FirStore:
+    """
+    FIR boundaries by ICAO code, each pre-simplified to every tolerance in
+    LOD_TOLERANCES and kept as flat [lat, lon, lat, lon, ...] float arrays.
+
+    A FIR that is published as several polygons is represented by its
+    largest one, since parse results carry a single ring. The simplified
+    levels are cached in a binary file next to the GeoJSON so later starts
+    skip both the JSON parse and the simplification.
+    """
+
+    def __init__(self, boundaries: Dict[str, List[array]]):
+        self._boundaries = boundaries
+
+    def __len__(self):
+        return len(self._boundaries)
+
+    def __contains__(self, fir_code):
+        return fir_code.upper() in self._boundaries
+
+    def codes(self) -> List[str]:
+        return sorted(self._boundaries)
+
+    @classmethod
+    def from_features(cls, features: Sequence[Dict[str, Any]]) -> 'FirStore':
+        """Build a store from GeoJSON features; features without a usable code or polygon are skipped."""
+        largest: Dict[str, List[List[float]]] = {}
+        for feature in features:
+            code = _feature_code(feature)
+            if code is None:
+                continue
+            for ring in _outer_rings(feature.get('geometry') or {}):
+                if code not in largest or _ring_area(ring) > _ring_area(largest[code]):
+                    largest[code] = ring
+
+        boundaries = {}
+        for code, ring in largest.items():
+            if ring[0] != ring[-1]:
+                ring.append(ring[0])
+            # Every level is simplified from the published ring, so its
+            # error stays within its own tolerance instead of adding up
+            # over the coarser levels
+            boundaries[code] = [_flatten(simplify_ring(ring, tolerance)) for tolerance in LOD_TOLERANCES]
+        return cls(boundaries)
+
+    @classmethod
+    def from_geojson(cls, path: str) -> 'FirStore':
+        with open(path, encoding='utf-8') as f:
+            data = json.load(f)
+        return cls.from_features(data.get('features') or [])
+
+    @classmethod
+    def from_cache(cls, path: str) -> 'FirStore':
+        """Load a cache written by write_cache; ValueError if it is not one for this build."""
+        with open(path, 'rb') as f:
+            data = f.read()
+        if len(data) < CACHE_HEADER.size:
+            raise ValueError(f"{path}: not a FIR cache")
+        magic, count, levels, byte_order = CACHE_HEADER.unpack_from(data, 0)
+        if magic != CACHE_MAGIC or byte_order != BYTE_ORDER or levels != len(LOD_TOLERANCES):
+            raise ValueError(f"{path}: stale FIR cache")
+        entry = struct.Struct(f'<4s{levels}I')
+        offset = CACHE_HEADER.size
+        tolerances = array('d', data[offset:offset + levels * 8])
+        if tuple(tolerances) != LOD_TOLERANCES:
+            raise ValueError(f"{path}: stale FIR cache")
+        offset += levels * 8
+        entries = [entry.unpack_from(data, offset + i * entry.size) for i in range(count)]
+        offset += count * entry.size
+        if len(data) != offset + 8 * sum(sum(lengths) for _, *lengths in entries):
+            raise ValueError(f"{path}: truncated FIR cache")
+
+        boundaries = {}
+        for code, *lengths in entries:
+            rings = []
+            for length in lengths:
+                rings.append(array('d', data[offset:offset + length * 8]))
+                offset += length * 8
+            boundaries[code.decode('ascii')] = rings
+        return cls(boundaries)
+
+    def write_cache(self, path: str):
+        """Write the store in the binary layout read by from_cache."""
+        entry = struct.Struct(f'<4s{len(LOD_TOLERANCES)}I')
+        tmp = f'{path}.{os.getpid()}.tmp'
+        with open(tmp, 'wb') as f:
+            f.write(CACHE_HEADER.pack(CACHE_MAGIC, len(self._boundaries), len(LOD_TOLERANCES), BYTE_ORDER))
+            f.write(bytes(array('d', LOD_TOLERANCES)))
+            for code, rings in self._boundaries.items():
+                f.write(entry.pack(code.encode('ascii'), *(len(ring) for ring in rings)))
+            for rings in self._boundaries.values():
+                for ring in rings:
+                    f.write(bytes(ring))
+        os.replace(tmp, path)
+
+    @classmethod
+    def open(cls, path: str) -> 'FirStore':
+        """
+        Load a GeoJSON file through its binary cache (same name, .bin). The
+        cache is used when it is newer than the GeoJSON and rebuilt otherwise,
+        if the directory is writable. A .bin path is read as a cache directly.
+        """
+        root, ext = os.path.splitext(path)
+        if ext.lower() == '.bin':
+            return cls.from_cache(path)
+
+        cache = root + '.bin'
+        try:
+            if os.path.getmtime(cache) >= os.path.getmtime(path):
+                return cls.from_cache(cache)
+        except (OSError, ValueError, struct.error):
+            pass
+
+        store = cls.from_geojson(path)
+        try:
+            store.write_cache(cache)
+        except OSError:
+            pass
+        return store
+
+    def ring(self, fir_code: str, tolerance: float = 0.0) -> Optional[array]:
+        """
+        Closed ring of the FIR as the store's own flat lat, lon array (do not
+        modify it), or None if it is unknown. The coarsest level of detail
+        whose tolerance does not exceed tolerance is returned.
+        """
+        levels = self._boundaries.get(fir_code.upper())
+        if levels is None:
+            return None
+        level = 0
+        for i, level_tolerance in enumerate(LOD_TOLERANCES):
+            if level_tolerance <= tolerance:
+                level = i
+        return levels[level]
+
+    def boundary(self, fir_code: str, tolerance: float = 0.0) -> Optional[List[List[float]]]:
+        """Closed [lat, lon] ring of the FIR, or None if it is unknown (see ring)."""
+        flat = self.ring(fir_code, tolerance)
+        if flat is None:
+            return None
+        return [[flat[i], flat[i + 1]] for i in range(0, len(flat), 2)]
+
+
+# Incremented whenever a different boundary set is installed
+_version = 0
+_store: Optional[FirStore] = None
+_store_lock = threading.Lock()
+
+
+def get_store() -> FirStore:
+    """
+    The FIR boundary store, loaded on first use from NOTAM_FIRS (a GeoJSON
+    file or its .bin cache) or data/firs.geojson; empty if there is no file.
+    """
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                path = os.environ.get('NOTAM_FIRS') or DEFAULT_PATH
+                if os.path.exists(path):
+                    _store = FirStore.open(path)
+                else:
+                    _store = FirStore({})
+    return _store
+
+
+def set_store(store: Optional[FirStore]):
+    """Replace the FIR store; None reloads the configured file on next use."""
+    global _store, _version
+    with _store_lock:
+        _store = store
+        _version += 1
+
+
+def get_fir_boundary(fir_code, tolerance=0.0):
+    """Boundary ring of a FIR as [lat, lon] points, or None if unknown."""
+    return get_store().boundary(fir_code, tolerance)
+
+
+def get_fir_ring(fir_code, tolerance=0.0):
+    """Boundary ring of a FIR as a shared flat lat, lon array('d'), or None if unknown."""
+    return get_store().ring(fir_code, tolerance)
+
+
+def with_tolerance(result: Dict[str, Any], tolerance: Optional[float]) -> Dict[str, Any]:
+    """
+    Swap the FIR boundary in a parse result for the level of detail matching
+    tolerance (degrees). Returns a new dict; results from the parse cache are
+    shared and must not be modified.
+    """
+    geometry = result.get('geometry') or {}
+    fir_code = geometry.get('fir')
+    if not tolerance or not fir_code:
+        return result
+    boundary = get_fir_boundary(fir_code, tolerance)
+    if boundary is None:
+        return result
+    return dict(result, geometry=dict(geometry, coordinates=boundary))
+
+
+def data_version():
+    """Version of the FIR boundary data, used to invalidate cached parses."""
+    return _version
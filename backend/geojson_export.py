@@ -0,0 +1,76 @@
+import json
+from itertools import islice
+from typing import List, Dict, Any, Iterable, Iterator, Optional
+
+from geometry import tessellate, simplify_result, circle_tolerance_nm
+from kml import TESSELLATE_BATCH
+
+
+def _lon_lat(points: Iterable[List[float]]) -> List[List[float]]:
+    return [[p[1], p[0]] for p in points]
+
+
+def feature_geometry(notam: Dict[str, Any], ring: Optional[List[List[float]]] = None) -> Optional[Dict[str, Any]]:
+    """
+    GeoJSON geometry (lon, lat order) for a parsed NOTAM, or None if it has
+    no coordinates. Circles become Polygons; pass their tessellated ring to
+    avoid tessellating them one by one.
+    """
+    geom = notam.get('geometry') or {}
+    geom_type = geom.get('type')
+    coords = geom.get('coordinates') or []
+    if not coords:
+        return None
+
+    if geom_type == 'multiline':
+        return {"type": "MultiLineString", "coordinates": [_lon_lat(segment) for segment in coords]}
+    if geom_type == 'line':
+        return {"type": "LineString", "coordinates": _lon_lat(coords)}
+    if geom_type == 'polygon':
+        return {"type": "Polygon", "coordinates": [_lon_lat(coords)]}
+    if geom_type == 'circle' and geom.get('radius_nm'):
+        if ring is None:
+            ring = tessellate([notam])[0]
+        return {"type": "Polygon", "coordinates": [_lon_lat(ring)]}
+    return {"type": "Point", "coordinates": [coords[0][1], coords[0][0]]}
+
+
+def feature(notam: Dict[str, Any], ring: Optional[List[List[float]]] = None) -> Dict[str, Any]:
+    """A GeoJSON Feature for one parsed NOTAM."""
+    geom = notam.get('geometry') or {}
+    return {
+        "type": "Feature",
+        "geometry": feature_geometry(notam, ring),
+        "properties": {
+            "ids": notam.get('ids') or [],
+            "type": geom.get('type'),
+            "radius_nm": geom.get('radius_nm'),
+            "altitude": notam.get('altitude'),
+            "validity": notam.get('validity'),
+            "description": notam.get('description'),
+        },
+    }
+
+
+def iter_geojson(notams: Iterable[Dict[str, Any]], tolerance: Optional[float] = None) -> Iterator[str]:
+    """
+    Generate a GeoJSON FeatureCollection chunk by chunk, one chunk per
+    feature, tessellating circles TESSELLATE_BATCH NOTAMs at a time.
+    Geometries are simplified to tolerance (degrees) if given.
+    """
+    yield '{"type": "FeatureCollection", "features": ['
+    notams = iter(notams)
+    separator = '\n'
+    while True:
+        batch = list(islice(notams, TESSELLATE_BATCH))
+        if not batch:
+            break
+        batch = [simplify_result(notam, tolerance) for notam in batch]
+        for notam, ring in zip(batch, tessellate(batch, circle_tolerance_nm(tolerance))):
+            yield separator + json.dumps(feature(notam, ring))
+            separator = ',\n'
+    yield '\n]}\n'
+
+
+def generate_geojson(notams: List[Dict[str, Any]], tolerance: Optional[float] = None) -> str:
+    return ''.join(iter_geojson(notams, tolerance))
@@ -0,0 +1,176 @@
+from __future__ import annotations
+
+import math
+from functools import lru_cache
+from typing import TYPE_CHECKING, List, Dict, Any, Optional, Sequence, Tuple
+
+# numpy is imported by the functions that use it: loading it takes longer
+# than the rest of the backend's own modules put together, and parsing
+# never needs it
+if TYPE_CHECKING:
+    import numpy as np
+
+from fir_data import with_tolerance
+from simplify import simplify_line, simplify_ring, tolerance_for_zoom
+
+EARTH_RADIUS_NM = 3440.065
+
+# Largest allowed gap (NM) between a tessellated circle and the true circle
+DEFAULT_TOLERANCE_NM = 0.05
+MIN_VERTICES = 16
+MAX_VERTICES = 360
+
+# (lat, lon, radius_nm)
+Circle = Tuple[float, float, float]
+
+
+def circle_vertex_count(radius_nm: float, tolerance_nm: float = DEFAULT_TOLERANCE_NM) -> int:
+    """
+    Vertices needed so no chord strays more than tolerance_nm inside the
+    circle: the sagitta r * (1 - cos(pi / n)) must not exceed the tolerance.
+    Rounded up to a multiple of 8 so circles share unit rings.
+    """
+    if radius_nm <= tolerance_nm:
+        return MIN_VERTICES
+    n = math.ceil(math.pi / math.acos(1 - tolerance_nm / radius_nm))
+    n = -(-n // 8) * 8
+    return max(MIN_VERTICES, min(MAX_VERTICES, n))
+
+
+@lru_cache(maxsize=64)
+def unit_ring(vertices: int) -> Tuple[np.ndarray, np.ndarray]:
+    """cos and sin of `vertices` evenly spaced bearings, closed (first bearing repeated)."""
+    import numpy as np
+    bearings = np.linspace(0.0, 2 * np.pi, vertices + 1)
+    cos_b = np.cos(bearings)
+    sin_b = np.sin(bearings)
+    # Exact closure, whatever linspace's last value rounds to
+    cos_b[-1] = cos_b[0]
+    sin_b[-1] = sin_b[0]
+    cos_b.flags.writeable = False
+    sin_b.flags.writeable = False
+    return cos_b, sin_b
+
+
+def _destination_rings(circles: np.ndarray, vertices: int) -> np.ndarray:
+    """
+    Geodesic destination points on a sphere for every circle in one call.
+    circles is (k, 3) [lat, lon, radius_nm]; returns (k, vertices + 1, 2) [lat, lon].
+    """
+    import numpy as np
+    cos_b, sin_b = unit_ring(vertices)
+    lat1 = np.radians(circles[:, 0:1])
+    lon1 = np.radians(circles[:, 1:2])
+    delta = circles[:, 2:3] / EARTH_RADIUS_NM
+
+    sin_lat1 = np.sin(lat1)
+    cos_lat1 = np.cos(lat1)
+    sin_d = np.sin(delta)
+    cos_d = np.cos(delta)
+
+    sin_lat2 = sin_lat1 * cos_d + cos_lat1 * sin_d * cos_b
+    lat2 = np.arcsin(np.clip(sin_lat2, -1.0, 1.0))
+    lon2 = lon1 + np.arctan2(sin_b * sin_d * cos_lat1, cos_d - sin_lat1 * sin_lat2)
+
+    out = np.empty((len(circles), vertices + 1, 2))
+    out[:, :, 0] = np.degrees(lat2)
+    # Normalise to [-180, 180)
+    out[:, :, 1] = (np.degrees(lon2) + 540.0) % 360.0 - 180.0
+    return out
+
+
+def circle_polygons(circles: Sequence[Circle], tolerance_nm: float = DEFAULT_TOLERANCE_NM) -> List[List[List[float]]]:
+    """
+    Tessellate many circles at once into closed [lat, lon] rings, in input
+    order. Circles needing the same vertex count are computed together.
+    """
+    import numpy as np
+    if not circles:
+        return []
+    data = np.asarray(circles, dtype=float).reshape(-1, 3)
+    counts = [circle_vertex_count(r, tolerance_nm) for r in data[:, 2]]
+
+    groups: Dict[int, List[int]] = {}
+    for index, count in enumerate(counts):
+        groups.setdefault(count, []).append(index)
+
+    rings: List[Optional[List[List[float]]]] = [None] * len(counts)
+    for count, indices in groups.items():
+        for index, ring in zip(indices, _destination_rings(data[indices], count).tolist()):
+            rings[index] = ring
+    return rings
+
+
+def circle_polygon(lat: float, lon: float, radius_nm: float, tolerance_nm: float = DEFAULT_TOLERANCE_NM) -> List[List[float]]:
+    """Closed [lat, lon] ring approximating one circle."""
+    return circle_polygons([(lat, lon, radius_nm)], tolerance_nm)[0]
+
+
+def circle_bounds(lat: float, lon: float, radius_nm: float) -> Tuple[float, float, float, float]:
+    """
+    Exact (min_lat, min_lon, max_lat, max_lon) of a geodesic circle. Circles
+    reaching a pole span every longitude.
+    """
+    delta = radius_nm / EARTH_RADIUS_NM
+    dlat = math.degrees(delta)
+    if abs(lat) + dlat >= 90.0:
+        return (max(lat - dlat, -90.0), -180.0, min(lat + dlat, 90.0), 180.0)
+    dlon = math.degrees(math.asin(math.sin(delta) / math.cos(math.radians(lat))))
+    return (lat - dlat, lon - dlon, lat + dlat, lon + dlon)
+
+
+def notam_circle(notam: Dict[str, Any]) -> Optional[Circle]:
+    """(lat, lon, radius_nm) of a parsed circle NOTAM, or None for other geometries."""
+    geom = notam.get('geometry') or {}
+    coords = geom.get('coordinates') or []
+    radius_nm = geom.get('radius_nm')
+    if geom.get('type') == 'circle' and radius_nm and coords:
+        return (coords[0][0], coords[0][1], radius_nm)
+    return None
+
+
+def tessellate(notams: Sequence[Dict[str, Any]], tolerance_nm: float = DEFAULT_TOLERANCE_NM) -> List[Optional[List[List[float]]]]:
+    """Circle ring for every circle NOTAM (None for the rest), computed in one batch."""
+    circles = [notam_circle(notam) for notam in notams]
+    rings = iter(circle_polygons([c for c in circles if c is not None], tolerance_nm))
+    return [next(rings) if c is not None else None for c in circles]
+
+
+def resolve_tolerance(tolerance: Optional[float] = None, zoom: Optional[float] = None) -> Optional[float]:
+    """Simplification tolerance (degrees) from an explicit tolerance or a map zoom level."""
+    if tolerance:
+        return tolerance
+    if zoom is not None:
+        return tolerance_for_zoom(zoom)
+    return None
+
+
+def circle_tolerance_nm(tolerance: Optional[float]) -> float:
+    """Circle tessellation tolerance (NM) matching a simplification tolerance in degrees."""
+    return max(DEFAULT_TOLERANCE_NM, (tolerance or 0.0) * 60.0)
+
+
+def simplify_result(result: Dict[str, Any], tolerance: Optional[float]) -> Dict[str, Any]:
+    """
+    Parse result with its polygon or route geometry simplified to tolerance
+    (degrees). FIR boundaries use their pre-computed levels of detail. A new
+    dict is returned when anything changes; the input is never modified,
+    since parse results can be shared through the parse cache.
+    """
+    if not tolerance:
+        return result
+    geom = result.get('geometry') or {}
+    if geom.get('fir'):
+        return with_tolerance(result, tolerance)
+
+    geom_type = geom.get('type')
+    coords = geom.get('coordinates') or []
+    if geom_type == 'polygon':
+        simplified = simplify_ring(coords, tolerance)
+    elif geom_type == 'line':
+        simplified = simplify_line(coords, tolerance)
+    elif geom_type == 'multiline':
+        simplified = [simplify_line(segment, tolerance) for segment in coords]
+    else:
+        return result
+    return dict(result, geometry=dict(geom, coordinates=simplified))
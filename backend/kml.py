@@ -0,0 +1,224 @@
+from datetime import datetime
+from itertools import islice
+from typing import List, Dict, Any, Iterable, Iterator, Optional
+from xml.sax.saxutils import escape
+
+from geometry import tessellate, simplify_result, circle_tolerance_nm
+
+KML_HEADER = '''<?xml version="1.0" encoding="UTF-8"?>
+<kml xmlns="http://www.opengis.net/kml/2.2" xmlns:gx="http://www.google.com/kml/ext/2.2">
+<Document>
+    <name>NOTAM Geometry Export</name>
+    <description>Exported from NOTAM Geometry Studio</description>
+
+    <!-- Styles -->
+    <Style id="routeStyle">
+        <LineStyle>
+            <color>ff0000ff</color>
+            <width>3</width>
+        </LineStyle>
+    </Style>
+    <Style id="areaStyle">
+        <LineStyle>
+            <color>ff00ffff</color>
+            <width>2</width>
+        </LineStyle>
+        <PolyStyle>
+            <color>4400ffff</color>
+        </PolyStyle>
+    </Style>
+    <Style id="circleStyle">
+        <LineStyle>
+            <color>ffff0000</color>
+            <width>2</width>
+        </LineStyle>
+        <PolyStyle>
+            <color>44ff0000</color>
+        </PolyStyle>
+    </Style>
+'''
+
+KML_FOOTER = '''
+</Document>
+</kml>'''
+
+PLACEMARK_TEMPLATE = '''
+    <Placemark>
+        <name>{name}</name>
+        <description><![CDATA[
+            <b>Type:</b> {geom_type}<br/>
+            <b>Altitude:</b> {alt_lower} - {alt_upper}<br/>
+            <b>Description:</b> {description_html}<br/>
+        ]]></description>{time_span}
+        <styleUrl>#{style}</styleUrl>
+
+        <ExtendedData>
+            <Data name="NOTAM_ID">
+                <value>{name}</value>
+            </Data>
+            <Data name="Type">
+                <value>{geom_type}</value>
+            </Data>
+            <Data name="Altitude_Lower">
+                <value>{alt_lower}</value>
+            </Data>
+            <Data name="Altitude_Upper">
+                <value>{alt_upper}</value>
+            </Data>
+            <Data name="Description">
+                <value>{description}</value>
+            </Data>
+            <Data name="Timestamp">
+                <value>{timestamp}</value>
+            </Data>
+        </ExtendedData>'''
+
+STYLES = {
+    'multiline': 'routeStyle',
+    'line': 'routeStyle',
+    'circle': 'circleStyle',
+}
+
+# NOTAMs whose circles are tessellated together in one batch
+TESSELLATE_BATCH = 256
+
+
+def cdata(text: str) -> str:
+    """Make text safe inside a CDATA section."""
+    return text.replace(']]>', ']]]]><![CDATA[>')
+
+
+def coordinates(points: Iterable[List[float]], indent: str) -> str:
+    """
+    KML <coordinates> body (lon,lat,alt) for [lat, lon] points, built in one join.
+    Seven decimals (~1 cm) are plenty and format far faster than repr().
+    """
+    return ''.join([f'\n{indent}{p[1]:.7f},{p[0]:.7f},0' for p in points])
+
+
+def polygon(points: Iterable[List[float]]) -> str:
+    return ''.join((
+        '\n        <Polygon>',
+        '\n            <outerBoundaryIs>',
+        '\n                <LinearRing>',
+        '\n                    <coordinates>',
+        coordinates(points, '                        '),
+        '\n                    </coordinates>',
+        '\n                </LinearRing>',
+        '\n            </outerBoundaryIs>',
+        '\n        </Polygon>',
+    ))
+
+
+def kml_time(epoch: float) -> str:
+    return datetime.utcfromtimestamp(epoch).strftime('%Y-%m-%dT%H:%M:%SZ')
+
+
+def time_span(validity: Optional[Dict[str, Any]]) -> str:
+    """<TimeSpan> for a NOTAM's validity window, so viewers can play it back on a time slider."""
+    validity = validity or {}
+    start = validity.get('start')
+    end = validity.get('end')
+    if start is None and end is None:
+        return ''
+    parts = ['\n        <TimeSpan>']
+    if start is not None:
+        parts.append(f'\n            <begin>{kml_time(start)}</begin>')
+    if end is not None:
+        parts.append(f'\n            <end>{kml_time(end)}</end>')
+    parts.append('\n        </TimeSpan>')
+    return ''.join(parts)
+
+
+def placemark(notam: Dict[str, Any], timestamp: str, ring: Optional[List[List[float]]] = None) -> str:
+    """
+    Render one NOTAM as a KML <Placemark>. For circles, ring is the
+    tessellated outline (see geometry.tessellate).
+    """
+    geom = notam.get('geometry') or {}
+    geom_type = geom.get('type', 'unknown')
+    coords = geom.get('coordinates') or []
+    radius_nm = geom.get('radius_nm')
+
+    altitude = notam.get('altitude') or {}
+    alt_lower = escape(str(altitude.get('lower', 'SFC')))
+    alt_upper = escape(str(altitude.get('upper', 'UNL')))
+
+    ids = notam.get('ids') or []
+    name = escape(', '.join(ids) if ids else 'Unknown')
+    description = notam.get('description') or ''
+
+    parts = [PLACEMARK_TEMPLATE.format(
+        name=name,
+        geom_type=escape(str(geom_type)),
+        alt_lower=alt_lower,
+        alt_upper=alt_upper,
+        description_html=cdata(escape(description)),
+        description=escape(description),
+        style=STYLES.get(geom_type, 'areaStyle'),
+        timestamp=timestamp,
+        time_span=time_span(notam.get('validity')),
+    )]
+
+    # Generate geometry based on type
+    if geom_type == 'multiline':
+        # Multiple line segments
+        parts.append('\n        <MultiGeometry>')
+        for segment in coords:
+            parts.append('\n            <LineString>')
+            parts.append('\n                <coordinates>')
+            parts.append(coordinates(segment, '                    '))
+            parts.append('\n                </coordinates>')
+            parts.append('\n            </LineString>')
+        parts.append('\n        </MultiGeometry>')
+
+    elif geom_type == 'line':
+        parts.append('\n        <LineString>')
+        parts.append('\n            <coordinates>')
+        parts.append(coordinates(coords, '                '))
+        parts.append('\n            </coordinates>')
+        parts.append('\n        </LineString>')
+
+    elif geom_type == 'polygon':
+        parts.append(polygon(coords))
+
+    elif geom_type == 'circle' and radius_nm and len(coords) > 0:
+        # Approximate circle with polygon
+        if ring is None:
+            ring = tessellate([notam])[0]
+        parts.append(polygon(ring))
+
+    elif geom_type == 'point' and len(coords) > 0:
+        parts.append('\n        <Point>')
+        parts.append(f'\n            <coordinates>{coords[0][1]:.7f},{coords[0][0]:.7f},0</coordinates>')
+        parts.append('\n        </Point>')
+
+    parts.append('\n    </Placemark>')
+    return ''.join(parts)
+
+
+def iter_kml(notams: Iterable[Dict[str, Any]], tolerance: Optional[float] = None) -> Iterator[str]:
+    """
+    Generate a KML document chunk by chunk: the header, one chunk per
+    placemark, then the footer. NOTAMs are taken TESSELLATE_BATCH at a time
+    (their circles are tessellated together) and only one placemark is
+    rendered at a time, so large exports can be streamed straight to the
+    client. With a tolerance (degrees), geometries are simplified and
+    circles get correspondingly fewer vertices.
+    """
+    timestamp = datetime.utcnow().isoformat() + 'Z'
+    yield KML_HEADER
+    notams = iter(notams)
+    while True:
+        batch = list(islice(notams, TESSELLATE_BATCH))
+        if not batch:
+            break
+        batch = [simplify_result(notam, tolerance) for notam in batch]
+        for notam, ring in zip(batch, tessellate(batch, circle_tolerance_nm(tolerance))):
+            yield placemark(notam, timestamp, ring)
+    yield KML_FOOTER
+
+
+def generate_kml(notams: List[Dict[str, Any]], tolerance: Optional[float] = None) -> str:
+    """Generate KML from NOTAM data with altitude and timestamp metadata."""
+    return ''.join(iter_kml(notams, tolerance))
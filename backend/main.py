@@ -1,15 +1,33 @@
-from fastapi import FastAPI, HTTPException
-from fastapi.responses import Response
-from pydantic import BaseModel
+from fastapi import FastAPI, HTTPException, Query, Header
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from pydantic import BaseModel, ConfigDict, Field
 from fastapi.middleware.cors import CORSMiddleware
-from parser_universal import NotamParser
-from typing import List, Dict, Any
-import uvicorn
+from batch import parse_feed, iter_feed_ndjson
+from parser_universal import select_fields
+from results import dumps
+from kml import iter_kml
+from geojson_export import iter_geojson
+from parse_cache import ParseCache
+from notam_store import NotamStore
+from sqlite_store import SqliteNotamStore
+from vector_tiles import TileCache, render_tile, MAX_ZOOM
+from geometry import simplify_result, resolve_tolerance
+from metrics import InstrumentedNotamParser
+import metrics
+from wire import requested_encoding, encode_result
+from admission import BodySizeLimit, Overloaded
+import admission
+from typing import Annotated, List, Dict, Any, Optional, Union
 import os
-from datetime import datetime
+from datetime import datetime, timezone
+from time import perf_counter
 
 app = FastAPI()
 
+# Reject oversized request bodies (413) before they are read and parsed;
+# added before CORS so the rejection still carries CORS headers
+app.add_middleware(BodySizeLimit, max_bytes=int(os.environ.get("NOTAM_MAX_BODY_BYTES", 10 * 1024 * 1024)))
+
 # Configure CORS
 app.add_middleware(
     CORSMiddleware,
@@ -19,211 +37,319 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Parse results keyed on NOTAM content; NOTAM_CACHE_SIZE=0 disables caching
+parse_cache = ParseCache(
+    maxsize=int(os.environ.get("NOTAM_CACHE_SIZE", 10000)),
+    ttl=float(os.environ["NOTAM_CACHE_TTL"]) if os.environ.get("NOTAM_CACHE_TTL") else None,
+    # NOTAM_METRICS=1 records per-stage parse timings for /metrics
+    parser=InstrumentedNotamParser() if metrics.ENABLED else None,
+)
+
+# Active NOTAMs, updated by POST /api/notams; kept in a SQLite file when
+# NOTAM_STORE_PATH is set, in memory otherwise
+notam_store = SqliteNotamStore(os.environ["NOTAM_STORE_PATH"]) if os.environ.get("NOTAM_STORE_PATH") else NotamStore()
+# Encoded vector tiles for the current store version
+tile_cache = TileCache(maxsize=int(os.environ.get("NOTAM_TILE_CACHE_SIZE", 4096)))
+# Parsing and export generation run here, off the event loop, with bounded
+# concurrency and queueing (NOTAM_CPU_CONCURRENCY, NOTAM_CPU_QUEUE, NOTAM_CPU_TIMEOUT)
+cpu = admission.from_env()
+
+@app.exception_handler(Overloaded)
+async def overloaded(request, exc: Overloaded):
+    return JSONResponse({"detail": exc.detail}, status_code=exc.status_code,
+                        headers={"Retry-After": str(exc.retry_after)})
+
+metrics.REGISTRY.gauge("notam_parse_cache_hits_total", "Parse cache hits.", lambda: parse_cache.hits, kind="counter")
+metrics.REGISTRY.gauge("notam_parse_cache_misses_total", "Parse cache misses.", lambda: parse_cache.misses, kind="counter")
+metrics.REGISTRY.gauge("notam_parse_cache_entries", "Parse results in the cache.", lambda: parse_cache.stats()["size"])
+metrics.REGISTRY.gauge("notam_store_notams", "Active NOTAMs in the store.", lambda: len(notam_store))
+metrics.REGISTRY.gauge("notam_store_version", "NOTAM store version.", lambda: notam_store.version)
+metrics.REGISTRY.gauge("notam_cpu_jobs", "Parse/export jobs running or queued.", lambda: cpu.active)
+metrics.REGISTRY.gauge("notam_cpu_rejected_total", "Jobs turned away with 429.", lambda: cpu.rejected, kind="counter")
+metrics.REGISTRY.gauge("notam_cpu_timeouts_total", "Jobs dropped with 503 after queueing too long.",
+                       lambda: cpu.timeouts, kind="counter")
+
+def route_path(endpoint) -> str:
+    """Path template of the route serving endpoint, so metrics are not labelled per tile or ID."""
+    for route in app.routes:
+        if getattr(route, "endpoint", None) is endpoint:
+            return route.path
+    return "unmatched"
+
+if metrics.ENABLED:
+    @app.middleware("http")
+    async def record_request_time(request, call_next):
+        start = perf_counter()
+        response = await call_next(request)
+        metrics.REQUEST_SECONDS.observe(
+            perf_counter() - start,
+            request.method, route_path(request.scope.get("endpoint")), str(response.status_code),
+        )
+        return response
+
 class ParseRequest(BaseModel):
     text: str
+    # Split the text into individual NOTAMs and parse each one
+    batch: bool = False
+    # Parse large batches on the worker process pool
+    parallel: bool = False
+    # Simplify geometries to this tolerance (degrees), or to one pixel at this map zoom
+    tolerance: Optional[float] = None
+    zoom: Optional[float] = None
+    # Only these result fields (geometry, altitude, validity, description, ids)
+    fields: Optional[List[str]] = None
+
+# Exported NOTAMs come from the client. The fields the exporters format are
+# checked (and numbers coerced) here, so bad input is a 422 before the
+# response starts rather than an error halfway through a streamed document;
+# anything else is passed through as sent
+Point = Annotated[List[float], Field(min_length=2)]
+
+class ExportGeometry(BaseModel):
+    model_config = ConfigDict(extra="allow")
+    type: str = "unknown"
+    coordinates: Union[List[Point], List[List[Point]]] = []
+    radius_nm: Optional[float] = None
+
+class ExportValidity(BaseModel):
+    model_config = ConfigDict(extra="allow")
+    start: Optional[float] = None
+    end: Optional[float] = None
+
+class ExportNotam(BaseModel):
+    model_config = ConfigDict(extra="allow")
+    geometry: Optional[ExportGeometry] = None
+    validity: Optional[ExportValidity] = None
+    altitude: Optional[Dict[str, Any]] = None
+    description: Optional[str] = None
+    ids: Optional[List[str]] = None
 
 class KMLExportRequest(BaseModel):
-    notams: List[Dict[str, Any]]
-
-def generate_kml(notams: List[Dict[str, Any]]) -> str:
-    """Generate KML from NOTAM data with altitude and timestamp metadata."""
-    
-    kml_header = '''<?xml version="1.0" encoding="UTF-8"?>
-<kml xmlns="http://www.opengis.net/kml/2.2" xmlns:gx="http://www.google.com/kml/ext/2.2">
-<Document>
-    <name>NOTAM Geometry Export</name>
-    <description>Exported from NOTAM Geometry Studio</description>
-    
-    <!-- Styles -->
-    <Style id="routeStyle">
-        <LineStyle>
-            <color>ff0000ff</color>
-            <width>3</width>
-        </LineStyle>
-    </Style>
-    <Style id="areaStyle">
-        <LineStyle>
-            <color>ff00ffff</color>
-            <width>2</width>
-        </LineStyle>
-        <PolyStyle>
-            <color>4400ffff</color>
-        </PolyStyle>
-    </Style>
-    <Style id="circleStyle">
-        <LineStyle>
-            <color>ffff0000</color>
-            <width>2</width>
-        </LineStyle>
-        <PolyStyle>
-            <color>44ff0000</color>
-        </PolyStyle>
-    </Style>
-'''
-    
-    placemarks = []
-    
-    for notam in notams:
-        geom = notam.get('geometry', {})
-        geom_type = geom.get('type', 'unknown')
-        coords = geom.get('coordinates', [])
-        radius_nm = geom.get('radius_nm')
-        
-        altitude = notam.get('altitude', {})
-        alt_lower = altitude.get('lower', 'SFC')
-        alt_upper = altitude.get('upper', 'UNL')
-        
-        ids = notam.get('ids', [])
-        notam_id = ', '.join(ids) if ids else 'Unknown'
-        description = notam.get('description', '')
-        raw_text = notam.get('raw_text', '')
-        
-        # Extract timestamps if available
-        timestamp = datetime.utcnow().isoformat() + 'Z'
-        
-        # Build extended data
-        extended_data = f'''
-        <ExtendedData>
-            <Data name="NOTAM_ID">
-                <value>{notam_id}</value>
-            </Data>
-            <Data name="Type">
-                <value>{geom_type}</value>
-            </Data>
-            <Data name="Altitude_Lower">
-                <value>{alt_lower}</value>
-            </Data>
-            <Data name="Altitude_Upper">
-                <value>{alt_upper}</value>
-            </Data>
-            <Data name="Description">
-                <value>{description}</value>
-            </Data>
-            <Data name="Timestamp">
-                <value>{timestamp}</value>
-            </Data>
-        </ExtendedData>'''
-        
-        # Determine style
-        if geom_type == 'multiline' or geom_type == 'line':
-            style = 'routeStyle'
-        elif geom_type == 'circle':
-            style = 'circleStyle'
-        else:
-            style = 'areaStyle'
-        
-        placemark = f'''
-    <Placemark>
-        <name>{notam_id}</name>
-        <description><![CDATA[
-            <b>Type:</b> {geom_type}<br/>
-            <b>Altitude:</b> {alt_lower} - {alt_upper}<br/>
-            <b>Description:</b> {description}<br/>
-        ]]></description>
-        <styleUrl>#{style}</styleUrl>
-        {extended_data}'''
-        
-        # Generate geometry based on type
-        if geom_type == 'multiline':
-            # Multiple line segments
-            placemark += '\n        <MultiGeometry>'
-            for segment in coords:
-                placemark += '\n            <LineString>'
-                placemark += '\n                <coordinates>'
-                for point in segment:
-                    placemark += f'\n                    {point[1]},{point[0]},0'
-                placemark += '\n                </coordinates>'
-                placemark += '\n            </LineString>'
-            placemark += '\n        </MultiGeometry>'
-            
-        elif geom_type == 'line':
-            placemark += '\n        <LineString>'
-            placemark += '\n            <coordinates>'
-            for point in coords:
-                placemark += f'\n                {point[1]},{point[0]},0'
-            placemark += '\n            </coordinates>'
-            placemark += '\n        </LineString>'
-            
-        elif geom_type == 'polygon':
-            placemark += '\n        <Polygon>'
-            placemark += '\n            <outerBoundaryIs>'
-            placemark += '\n                <LinearRing>'
-            placemark += '\n                    <coordinates>'
-            for point in coords:
-                placemark += f'\n                        {point[1]},{point[0]},0'
-            placemark += '\n                    </coordinates>'
-            placemark += '\n                </LinearRing>'
-            placemark += '\n            </outerBoundaryIs>'
-            placemark += '\n        </Polygon>'
-            
-        elif geom_type == 'circle' and radius_nm and len(coords) > 0:
-            # Approximate circle with polygon
-            import math
-            center_lat, center_lon = coords[0]
-            radius_m = radius_nm * 1852  # Convert NM to meters
-            num_points = 64
-            
-            placemark += '\n        <Polygon>'
-            placemark += '\n            <outerBoundaryIs>'
-            placemark += '\n                <LinearRing>'
-            placemark += '\n                    <coordinates>'
-            
-            for i in range(num_points + 1):
-                angle = (i / num_points) * 2 * math.pi
-                dx = radius_m * math.cos(angle) / 111320  # Approx meters to degrees
-                dy = radius_m * math.sin(angle) / (111320 * math.cos(math.radians(center_lat)))
-                lat = center_lat + dy
-                lon = center_lon + dx
-                placemark += f'\n                        {lon},{lat},0'
-            
-            placemark += '\n                    </coordinates>'
-            placemark += '\n                </LinearRing>'
-            placemark += '\n            </outerBoundaryIs>'
-            placemark += '\n        </Polygon>'
-            
-        elif geom_type == 'point' and len(coords) > 0:
-            placemark += '\n        <Point>'
-            placemark += f'\n            <coordinates>{coords[0][1]},{coords[0][0]},0</coordinates>'
-            placemark += '\n        </Point>'
-        
-        placemark += '\n    </Placemark>'
-        placemarks.append(placemark)
-    
-    kml_footer = '''
-</Document>
-</kml>'''
-    
-    return kml_header + ''.join(placemarks) + kml_footer
+    notams: List[ExportNotam]
+    tolerance: Optional[float] = None
+    zoom: Optional[float] = None
 
-@app.post("/api/parse")
-async def parse_notam(request: ParseRequest):
+    def notam_dicts(self) -> List[Dict[str, Any]]:
+        return [notam.model_dump(exclude_unset=True) for notam in self.notams]
+
+def epoch(value: datetime) -> float:
+    """Epoch seconds; datetimes without a timezone are taken as UTC."""
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+def result_transform(tolerance: Optional[float], zoom: Optional[float],
+                     encoding: Optional[str] = None, accept: Optional[str] = None):
+    """
+    Transform applying the requested level of detail and then the requested
+    geometry encoding to parse results, or None when neither applies.
+    """
+    try:
+        encoding = requested_encoding(encoding, accept)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    tolerance = resolve_tolerance(tolerance, zoom)
+    if not tolerance and not encoding:
+        return None
+
+    def transform(result):
+        if tolerance:
+            result = simplify_result(result, tolerance)
+        return encode_result(result, encoding)
+    return transform
+
+def results_response(content: Any) -> Response:
+    """JSON response for content holding parse results, written straight from the compact result objects."""
+    return Response(dumps(content), media_type="application/json")
+
+def requested_fields(fields: Optional[List[str]]) -> Optional[List[str]]:
+    """Validated fields projection of a parse request, or None for full results."""
+    if fields is None:
+        return None
     try:
-        parser = NotamParser()
-        result = parser.parse(request.text)
+        select_fields(fields)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return fields
+
+@app.post("/api/parse")
+async def parse_notam(request: ParseRequest, encoding: Optional[str] = None,
+                      accept: Optional[str] = Header(None)):
+    transform = result_transform(request.tolerance, request.zoom, encoding, accept)
+    fields = requested_fields(request.fields)
+
+    def parse():
+        if request.batch:
+            return results_response(
+                parse_feed(request.text, parse_cache, parallel=request.parallel, transform=transform, fields=fields))
+        result = parse_cache.parse(request.text, fields)
+        if transform:
+            result = transform(result)
         # The frontend expects a "results" array
-        return {"results": [result]}
+        return results_response({"results": [result]})
+
+    try:
+        return await cpu.run(parse)
+    except Overloaded:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/api/parse/stream")
+async def parse_notam_stream(request: ParseRequest, encoding: Optional[str] = None,
+                       accept: Optional[str] = Header(None)):
+    """
+    Split the text into NOTAMs and stream one JSON line per NOTAM as soon as
+    it is parsed (application/x-ndjson). Failed NOTAMs appear as
+    {"index", "raw_text", "error"} lines.
+    """
+    transform = result_transform(request.tolerance, request.zoom, encoding, accept)
+    fields = requested_fields(request.fields)
+    lines = iter_feed_ndjson(request.text, parse_cache, parallel=request.parallel, transform=transform, fields=fields)
+    return StreamingResponse(await cpu.stream(lines), media_type="application/x-ndjson")
+
 @app.post("/api/export/kml")
 async def export_kml(request: KMLExportRequest):
-    """Export NOTAMs as KML for QGIS, Google Earth, etc."""
-    try:
-        kml_content = generate_kml(request.notams)
-        return Response(
-            content=kml_content,
-            media_type="application/vnd.google-earth.kml+xml",
-            headers={
-                "Content-Disposition": f"attachment; filename=notams_{datetime.utcnow().strftime('%Y%m%d_%H%M%S')}.kml"
-            }
-        )
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    """
+    Export NOTAMs as KML for QGIS, Google Earth, etc.
+    The document is streamed one placemark at a time.
+    """
+    chunks = iter_kml(request.notam_dicts(), resolve_tolerance(request.tolerance, request.zoom))
+    if metrics.ENABLED:
+        chunks = metrics.timed_stream(chunks, "kml")
+    return StreamingResponse(
+        await cpu.stream(chunks),
+        media_type="application/vnd.google-earth.kml+xml",
+        headers={
+            "Content-Disposition": f"attachment; filename=notams_{datetime.utcnow().strftime('%Y%m%d_%H%M%S')}.kml"
+        }
+    )
+
+@app.post("/api/export/geojson")
+async def export_geojson(request: KMLExportRequest):
+    """
+    Export NOTAMs as a GeoJSON FeatureCollection; circles are tessellated
+    into polygons. Streamed one feature at a time.
+    """
+    chunks = iter_geojson(request.notam_dicts(), resolve_tolerance(request.tolerance, request.zoom))
+    if metrics.ENABLED:
+        chunks = metrics.timed_stream(chunks, "geojson")
+    return StreamingResponse(
+        await cpu.stream(chunks),
+        media_type="application/geo+json",
+        headers={
+            "Content-Disposition": f"attachment; filename=notams_{datetime.utcnow().strftime('%Y%m%d_%H%M%S')}.geojson"
+        }
+    )
+
+class IngestRequest(BaseModel):
+    text: str
+    # Parse large feeds on the worker process pool
+    parallel: bool = False
+
+@app.post("/api/notams")
+async def ingest_notams(request: IngestRequest):
+    """
+    Parse a feed and apply it to the NOTAM store: NOTAMN adds, NOTAMR
+    replaces the referenced NOTAM, NOTAMC cancels it. Returns the new store
+    version, the number of changes and per-NOTAM errors.
+    """
+    def ingest():
+        parsed = parse_feed(request.text, parse_cache, parallel=request.parallel)
+        applied = notam_store.apply_all(parsed["results"])
+        # apply_all indexes its errors by position in the results, which
+        # skip the NOTAMs that failed to parse; report feed positions instead
+        failed = {error["index"] for error in parsed["errors"]}
+        positions = [i for i in range(len(parsed["results"]) + len(failed)) if i not in failed]
+        for error in applied["errors"]:
+            error["index"] = positions[error["index"]]
+        applied["errors"] = sorted(parsed["errors"] + applied["errors"], key=lambda error: error["index"])
+        return applied
+    return await cpu.run(ingest)
+
+@app.get("/api/notams")
+def list_notams(
+    bbox: Optional[str] = Query(None, description="min_lat,min_lon,max_lat,max_lon"),
+    active_from: Optional[datetime] = Query(None, description="Valid at or after this time (B/C fields)"),
+    active_to: Optional[datetime] = Query(None, description="Valid at or before this time; defaults to active_from"),
+    subject: Optional[str] = Query(None, description="Q-code subjects, comma separated (e.g. RT,RD)"),
+    fir: Optional[str] = Query(None, description="Q-line FIR, e.g. OMAE"),
+    tolerance: Optional[float] = None,
+    zoom: Optional[float] = None,
+    encoding: Optional[str] = None,
+    accept: Optional[str] = Header(None),
+):
+    """
+    Stored NOTAMs, optionally only those intersecting bbox, valid at some
+    point between active_from and active_to, with one of the given Q-code
+    subjects and/or issued for the given FIR.
+    """
+    transform = result_transform(tolerance, zoom, encoding, accept)
+    version = notam_store.version
+    box = None
+    if bbox:
+        try:
+            min_lat, min_lon, max_lat, max_lon = (float(v) for v in bbox.split(","))
+        except ValueError:
+            raise HTTPException(status_code=422, detail="bbox must be min_lat,min_lon,max_lat,max_lon")
+        box = (min_lat, min_lon, max_lat, max_lon)
+    active = None
+    if active_from or active_to:
+        t1 = epoch(active_from or active_to)
+        active = (t1, epoch(active_to) if active_to else t1)
+    subjects = [s.strip() for s in subject.split(",") if s.strip()] if subject else None
+    notams = notam_store.query(bbox=box, active=active, subjects=subjects, fir=fir)
+    if transform:
+        notams = [transform(notam) for notam in notams]
+    return results_response({"version": version, "notams": notams})
+
+@app.get("/api/notams/changes")
+def notam_changes(since: int = 0, tolerance: Optional[float] = None, zoom: Optional[float] = None,
+                  encoding: Optional[str] = None, accept: Optional[str] = Header(None)):
+    """
+    What changed after version `since`: {"version", "reset", "upserts",
+    "deletes"}. Poll with the returned version; on reset, replace
+    everything with upserts.
+    """
+    transform = result_transform(tolerance, zoom, encoding, accept)
+    delta = notam_store.changes_since(since)
+    if transform:
+        delta["upserts"] = [transform(notam) for notam in delta["upserts"]]
+    return results_response(delta)
+
+@app.get("/api/tiles/{z}/{x}/{y}.mvt")
+async def notam_tile(z: int, x: int, y: int):
+    """
+    Mapbox Vector Tile of the stored NOTAMs (layer "notams"), simplified
+    and clipped for zoom z. Tiles are cached until the store changes.
+    """
+    if not (0 <= z <= MAX_ZOOM and 0 <= x < 2 ** z and 0 <= y < 2 ** z):
+        raise HTTPException(status_code=404, detail="No such tile")
+    return Response(
+        await cpu.run(render_tile, notam_store, z, x, y, tile_cache),
+        media_type="application/vnd.mapbox-vector-tile",
+    )
+
+@app.get("/api/cache")
+def cache_stats():
+    """Hit/miss counters and size of the parse result cache, and parse/export job admission."""
+    return dict(parse_cache.stats(), admission=cpu.stats())
+
+@app.get("/metrics")
+def prometheus_metrics():
+    """
+    Metrics in the Prometheus text format. Parse stage, request and export
+    timings are only recorded when NOTAM_METRICS is set.
+    """
+    return Response(metrics.REGISTRY.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
 
 @app.get("/")
 def read_root():
     return {"status": "ok", "service": "NOTAM Parser API"}
 
 if __name__ == "__main__":
+    # Only needed to run the server directly; serverless entry points
+    # import app and never load it
+    import uvicorn
     port = int(os.environ.get("PORT", 8000))
     uvicorn.run("main:app", host="0.0.0.0", port=port, reload=True)
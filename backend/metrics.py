@@ -0,0 +1,254 @@
+# Prometheus-style metrics
+# Counters and histograms kept in memory and rendered in the Prometheus text
+# format by GET /metrics. Recording is off unless NOTAM_METRICS is set, in
+# which case main.py parses with InstrumentedNotamParser and times requests
+# and exports. With it off nothing on the hot path checks for metrics at
+# all: the plain NotamParser is used and no middleware is installed.
+#
+# Parses run on the worker process pool (parallel=True) are recorded in the
+# worker processes and do not show up here.
+
+import math
+import os
+import threading
+from bisect import bisect_left
+from time import perf_counter
+from typing import List, Dict, Any, Callable, Iterable, Iterator, Optional, Sequence, Tuple
+
+from parser_universal import NotamParser
+from results import NotamResult
+
+ENABLED = os.environ.get('NOTAM_METRICS', '').lower() not in ('', '0', 'false', 'no')
+
+# Histogram bucket upper bounds
+SECONDS_BUCKETS = (0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01,
+                   0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+BYTES_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216, 67108864)
+COUNT_BUCKETS = (0, 1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024, 4096, 16384)
+
+
+def format_value(value: float) -> str:
+    if value == math.inf:
+        return '+Inf'
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def escape(value: str) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def format_labels(names: Sequence[str], values: Sequence[str], extra: str = '') -> str:
+    pairs = [f'{n}="{escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+class Counter:
+    """Monotonic count per label values."""
+
+    kind = 'counter'
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.label_names = tuple(labels)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels: str, value: float = 1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + value
+
+    def value(self, *labels: str) -> float:
+        return self._values.get(labels, 0)
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            values = sorted(self._values.items())
+        return [f'{self.name}{format_labels(self.label_names, k)} {format_value(v)}' for k, v in values]
+
+
+class Gauge:
+    """
+    Value read from a callback at render time, e.g. cache statistics. Pass
+    kind='counter' for values that only grow.
+    """
+
+    def __init__(self, name: str, help: str, read: Callable[[], float], kind: str = 'gauge'):
+        self.name = name
+        self.help = help
+        self.read = read
+        self.kind = kind
+
+    def samples(self) -> List[str]:
+        return [f'{self.name} {format_value(self.read())}']
+
+
+class _Series:
+    # One histogram's buckets for one set of label values
+    __slots__ = ('buckets', 'counts', 'sum', 'count', 'lock')
+
+    def __init__(self, buckets: Sequence[float]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+        self.lock = threading.Lock()
+
+    def observe(self, value: float):
+        index = bisect_left(self.buckets, value)
+        with self.lock:
+            self.counts[index] += 1
+            self.sum += value
+            self.count += 1
+
+
+class Histogram:
+    """Cumulative-bucket histogram per label values."""
+
+    kind = 'histogram'
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = (), buckets: Sequence[float] = SECONDS_BUCKETS):
+        self.name = name
+        self.help = help
+        self.label_names = tuple(labels)
+        self.buckets = tuple(buckets)
+        self._series: Dict[Tuple[str, ...], _Series] = {}
+        self._lock = threading.Lock()
+
+    def labels(self, *labels: str) -> _Series:
+        """The series for these label values, to observe() on directly in hot loops."""
+        series = self._series.get(labels)
+        if series is None:
+            with self._lock:
+                series = self._series.setdefault(labels, _Series(self.buckets))
+        return series
+
+    def observe(self, value: float, *labels: str):
+        self.labels(*labels).observe(value)
+
+    def samples(self) -> List[str]:
+        lines = []
+        with self._lock:
+            series = sorted(self._series.items())
+        for labels, s in series:
+            with s.lock:
+                counts, total, count = list(s.counts), s.sum, s.count
+            cumulative = 0
+            for bound, n in zip(self.buckets + (math.inf,), counts):
+                cumulative += n
+                le = f'le="{format_value(bound)}"'
+                lines.append(f'{self.name}_bucket{format_labels(self.label_names, labels, le)} {cumulative}')
+            lines.append(f'{self.name}_sum{format_labels(self.label_names, labels)} {format_value(total)}')
+            lines.append(f'{self.name}_count{format_labels(self.label_names, labels)} {count}')
+        return lines
+
+
+class Registry:
+    """Named metrics, rendered together in registration order."""
+
+    def __init__(self):
+        self._metrics: Dict[str, Any] = {}
+
+    def register(self, metric):
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric '{metric.name}' is already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, help: str, labels: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, help, labels))
+
+    def gauge(self, name: str, help: str, read: Callable[[], float], kind: str = 'gauge') -> Gauge:
+        return self.register(Gauge(name, help, read, kind))
+
+    def histogram(self, name: str, help: str, labels: Sequence[str] = (),
+                  buckets: Sequence[float] = SECONDS_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, help, labels, buckets))
+
+    def render(self) -> str:
+        """Prometheus text exposition format (version 0.0.4)."""
+        lines = []
+        for metric in self._metrics.values():
+            lines.append(f'# HELP {metric.name} {metric.help}')
+            lines.append(f'# TYPE {metric.name} {metric.kind}')
+            lines.extend(metric.samples())
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = Registry()
+
+PARSE_STAGE_SECONDS = REGISTRY.histogram(
+    'notam_parse_stage_seconds', 'Time spent in each NotamParser stage.', ('stage',))
+PARSE_SECONDS = REGISTRY.histogram(
+    'notam_parse_seconds', 'Time to parse one NOTAM.')
+PARSE_TOTAL = REGISTRY.counter(
+    'notam_parse_total', 'NOTAMs parsed, by resulting geometry type.', ('geometry',))
+PARSE_COORDINATES = REGISTRY.histogram(
+    'notam_parse_coordinates', 'Coordinates in each parsed geometry.', buckets=COUNT_BUCKETS)
+PARSE_INPUT_BYTES = REGISTRY.histogram(
+    'notam_parse_input_bytes', 'Size of each NOTAM text.', buckets=BYTES_BUCKETS)
+REQUEST_SECONDS = REGISTRY.histogram(
+    'http_request_duration_seconds', 'Time until the response starts, by route.', ('method', 'route', 'status'))
+EXPORT_SECONDS = REGISTRY.histogram(
+    'notam_export_seconds', 'Time to stream a whole export.', ('format',))
+EXPORT_BYTES = REGISTRY.histogram(
+    'notam_export_bytes', 'Size of each export.', ('format',), buckets=BYTES_BUCKETS)
+
+# NotamParser methods timed by InstrumentedNotamParser
+STAGES = (
+    'extract_coordinates', 'extract_radius', 'extract_altitude', 'extract_description', 'extract_validity',
+    'extract_ids', 'extract_q_line', 'parse_q_line', 'is_route_notam', 'extract_route_segments', 'fir_boundary',
+)
+
+
+def _timed(stage: str):
+    base = getattr(NotamParser, stage)
+    series = PARSE_STAGE_SECONDS.labels(stage)
+
+    def method(self, *args, **kwargs):
+        start = perf_counter()
+        try:
+            return base(self, *args, **kwargs)
+        finally:
+            series.observe(perf_counter() - start)
+    method.__name__ = stage
+    method.__doc__ = base.__doc__
+    return method
+
+
+class InstrumentedNotamParser(NotamParser):
+    """
+    NotamParser recording per-stage durations, whole-parse duration,
+    geometry type, coordinate count and input size in REGISTRY.
+    """
+
+    def parse(self, text: str, fields: Optional[Iterable[str]] = None) -> NotamResult:
+        start = perf_counter()
+        result = super().parse(text, fields)
+        PARSE_SECONDS.observe(perf_counter() - start)
+        PARSE_INPUT_BYTES.observe(len(text.encode('utf-8')))
+        geometry = result.geometry
+        if geometry is None:
+            return result
+        PARSE_TOTAL.inc(geometry.type)
+        PARSE_COORDINATES.observe(geometry.vertex_count())
+        return result
+
+
+for _stage in STAGES:
+    setattr(InstrumentedNotamParser, _stage, _timed(_stage))
+
+
+def timed_stream(chunks: Iterable[Any], format: str) -> Iterator[Any]:
+    """Pass chunks through, recording the total time and size as an export of this format."""
+    start = perf_counter()
+    size = 0
+    for chunk in chunks:
+        size += len(chunk.encode('utf-8')) if isinstance(chunk, str) else len(chunk)
+        yield chunk
+    EXPORT_SECONDS.observe(perf_counter() - start, format)
+    EXPORT_BYTES.observe(size, format)
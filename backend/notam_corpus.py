@@ -0,0 +1,218 @@
+# Synthetic NOTAM corpus
+# Seeded generator of realistic NOTAMs covering every geometry shape the
+# parsers handle, plus the waypoints and FIR boundaries they refer to, so
+# benchmarks and tests run the same inputs on every machine.
+
+import math
+import random
+import string
+from typing import List, Dict, Any, Callable, Optional, Sequence, Tuple
+
+import fir_data
+import waypoint_db
+from fir_data import FirStore
+from waypoint_db import WaypointStore
+
+# Geometry shapes, in the order generate() cycles through them
+KINDS = (
+    'dms_suffix',   # 251600N 0552000E polygon
+    'dms_prefix',   # N251600 E0552000 polygon
+    'decimal',      # 25.2667N 55.3333E polygon
+    'ddm',          # 2516.00N 05520.00E polygon
+    'circle',       # explicit "5NM RADIUS" around a point
+    'route',        # ATS route segments between named fixes
+    'q_line',       # no coordinates in E), Q-line circle fallback
+    'fir',          # FIR-wide (Q-line radius 999)
+)
+
+# Expected parse_universal geometry type per kind
+GEOMETRY_TYPES = {
+    'dms_suffix': 'polygon', 'dms_prefix': 'polygon', 'decimal': 'polygon', 'ddm': 'polygon',
+    'circle': 'circle', 'route': 'multiline', 'q_line': 'circle', 'fir': 'polygon',
+}
+
+SUBJECTS = (
+    "TEMPO RESTRICTED AREA ESTABLISHED", "MIL EXERCISE WILL TAKE PLACE",
+    "UNMANNED ACFT OPS", "PARACHUTE JUMPING EXERCISE", "DANGER AREA ACTIVATED",
+    "FIREWORKS DISPLAY", "AERIAL SURVEY FLIGHTS", "ROCKET LAUNCH",
+)
+UPPER_LIMITS = ("FL100", "FL195", "FL245", "4000FT AMSL", "UNL")
+
+
+class Corpus:
+    """
+    Generated NOTAMs with the reference data they need.
+
+    notams holds (kind, text) pairs; waypoints are the (ident, lat, lon)
+    rows route NOTAMs refer to and firs the GeoJSON features FIR-wide
+    NOTAMs refer to. install() makes both the active stores.
+    """
+
+    def __init__(self, notams: List[Tuple[str, str]], waypoints: List[Tuple[str, float, float]],
+                 firs: List[Dict[str, Any]]):
+        self.notams = notams
+        self.waypoints = waypoints
+        self.firs = firs
+
+    def __len__(self):
+        return len(self.notams)
+
+    def texts(self, kind: Optional[str] = None) -> List[str]:
+        """NOTAM texts, optionally only those of one kind."""
+        return [text for k, text in self.notams if kind is None or k == kind]
+
+    def install(self):
+        """Use this corpus's waypoints and FIRs; undo with waypoint_db/fir_data.set_store(None)."""
+        waypoint_db.set_store(WaypointStore.from_rows(self.waypoints))
+        fir_data.set_store(FirStore.from_features(self.firs))
+
+
+def dms(value: float, deg_digits: int, pos: str, neg: str) -> Tuple[str, str]:
+    """(digits, hemisphere) of a coordinate in DDMMSS / DDDMMSS form."""
+    hemisphere = pos if value >= 0 else neg
+    seconds = int(round(abs(value) * 3600))
+    d, rest = divmod(seconds, 3600)
+    m, s = divmod(rest, 60)
+    return f"{d:0{deg_digits}d}{m:02d}{s:02d}", hemisphere
+
+
+def ddm(value: float, deg_digits: int, pos: str, neg: str) -> str:
+    hemisphere = pos if value >= 0 else neg
+    minutes = round(abs(value) * 60, 2)
+    d, m = divmod(minutes, 60)
+    return f"{int(d):0{deg_digits}d}{m:05.2f}{hemisphere}"
+
+
+def q_position(lat: float, lon: float) -> str:
+    """Q-line position, e.g. 2515N05522E."""
+    lat_s, lat_h = dms(lat, 2, 'N', 'S')
+    lon_s, lon_h = dms(lon, 3, 'E', 'W')
+    return f"{lat_s[:4]}{lat_h}{lon_s[:5]}{lon_h}"
+
+
+def ring(rng: random.Random, lat: float, lon: float, vertices: int, size: float) -> List[Tuple[float, float]]:
+    """An irregular closed-ish ring of vertices around (lat, lon)."""
+    step = 2 * math.pi / vertices
+    return [(lat + size * rng.uniform(0.6, 1.0) * math.sin(i * step),
+             lon + size * rng.uniform(0.6, 1.0) * math.cos(i * step)) for i in range(vertices)]
+
+
+def format_dms_suffix(lat: float, lon: float) -> str:
+    lat_s, lat_h = dms(lat, 2, 'N', 'S')
+    lon_s, lon_h = dms(lon, 3, 'E', 'W')
+    return f"{lat_s}{lat_h} {lon_s}{lon_h}"
+
+
+def format_dms_prefix(lat: float, lon: float) -> str:
+    lat_s, lat_h = dms(lat, 2, 'N', 'S')
+    lon_s, lon_h = dms(lon, 3, 'E', 'W')
+    return f"{lat_h}{lat_s} {lon_h}{lon_s}"
+
+
+def format_decimal(lat: float, lon: float) -> str:
+    return f"{abs(lat):.4f}{'N' if lat >= 0 else 'S'} {abs(lon):.4f}{'E' if lon >= 0 else 'W'}"
+
+
+def format_ddm(lat: float, lon: float) -> str:
+    return f"{ddm(lat, 2, 'N', 'S')} {ddm(lon, 3, 'E', 'W')}"
+
+
+POINT_FORMATS: Dict[str, Callable[[float, float], str]] = {
+    'dms_suffix': format_dms_suffix,
+    'dms_prefix': format_dms_prefix,
+    'decimal': format_decimal,
+    'ddm': format_ddm,
+}
+
+
+def fix_name(rng: random.Random) -> str:
+    return "".join(rng.choices(string.ascii_uppercase, k=5))
+
+
+def fir_code(rng: random.Random) -> str:
+    return "".join(rng.choices(string.ascii_uppercase, k=4))
+
+
+def notam_text(number: int, fir: str, lat: float, lon: float, radius: int, body: str, upper: str) -> str:
+    """Full ICAO NOTAM around an E) field."""
+    day = 1 + number % 28
+    return (
+        f"A{number % 10000:04d}/24 NOTAMN\n"
+        f"Q) {fir}/QRTCA/IV/BO/W/000/{upper[2:5] if upper.startswith('FL') else '999'}/"
+        f"{q_position(lat, lon)}{radius:03d}\n"
+        f"A) {fir} B) 2403{day:02d}0600 C) 2403{day:02d}1800\n"
+        f"E) {body}\n"
+        f"F) SFC G) {upper}"
+    )
+
+
+def generate(count: int, seed: int = 0, kinds: Sequence[str] = KINDS, vertices: Tuple[int, int] = (4, 24),
+             fix_count: int = 200, fir_count: int = 20, fir_vertices: int = 400) -> Corpus:
+    """
+    count NOTAMs cycling through kinds, fully determined by seed.
+
+    Polygons get between vertices[0] and vertices[1] points. Route NOTAMs
+    use fix_count generated fixes and FIR-wide NOTAMs fir_count generated
+    FIRs of fir_vertices points each.
+    """
+    unknown = set(kinds) - set(KINDS)
+    if unknown:
+        raise ValueError(f"Unknown NOTAM kinds: {', '.join(sorted(unknown))}")
+    rng = random.Random(seed)
+
+    fixes = []
+    names = set()
+    while len(fixes) < fix_count:
+        name = fix_name(rng)
+        if name not in names:
+            names.add(name)
+            fixes.append((name, rng.uniform(-55, 55), rng.uniform(-160, 160)))
+
+    firs = []
+    codes = set()
+    while len(firs) < fir_count:
+        code = fir_code(rng)
+        if code in codes:
+            continue
+        codes.add(code)
+        lat, lon = rng.uniform(-50, 50), rng.uniform(-150, 150)
+        boundary = [[round(p[1], 6), round(p[0], 6)] for p in ring(rng, lat, lon, fir_vertices, 5.0)]
+        boundary.append(boundary[0])
+        firs.append({"type": "Feature", "properties": {"ICAOCODE": code, "center": [lat, lon]},
+                     "geometry": {"type": "Polygon", "coordinates": [boundary]}})
+
+    notams = []
+    for number in range(count):
+        kind = kinds[number % len(kinds)]
+        fir = fir_code(rng)
+        lat, lon = rng.uniform(-55, 55), rng.uniform(-160, 160)
+        radius = rng.randint(1, 50)
+        subject = rng.choice(SUBJECTS)
+        upper = rng.choice(UPPER_LIMITS)
+
+        if kind in POINT_FORMATS:
+            points = ring(rng, lat, lon, rng.randint(*vertices), rng.uniform(0.05, 1.0))
+            coords = " - ".join(POINT_FORMATS[kind](*p) for p in points + points[:1])
+            body = f"{subject} WI AREA BOUNDED BY: {coords}"
+        elif kind == 'circle':
+            centre = POINT_FORMATS[rng.choice(list(POINT_FORMATS))](lat, lon)
+            body = f"{subject} WITHIN {rng.randint(1, 30)}NM RADIUS OF {centre}"
+        elif kind == 'route':
+            segments = []
+            for _ in range(rng.randint(1, 4)):
+                a, b = rng.sample(fixes, 2)
+                route = f"{rng.choice('ABGJLMUW')}{rng.randint(1, 999)}"
+                segments.append(f"{route} {a[0]} - {b[0]}")
+            lat, lon = fixes[0][1], fixes[0][2]
+            body = "FLW ATS RTE SEGMENTS CLSD: " + ", ".join(segments)
+        elif kind == 'q_line':
+            body = f"{subject}. ACFT ARE ADVISED TO AVOID THE AREA"
+        else:
+            feature = rng.choice(firs)
+            fir = feature["properties"]["ICAOCODE"]
+            lat, lon = feature["properties"]["center"]
+            radius = 999
+            body = f"{subject} IN {fir} FIR. ALL ACFT TO EXERCISE CAUTION"
+        notams.append((kind, notam_text(number, fir, lat, lon, radius, body, upper)))
+
+    return Corpus(notams, fixes, firs)
@@ -0,0 +1,194 @@
+import re
+import threading
+from collections import deque
+from typing import List, Dict, Any, Optional, Iterable, Tuple
+
+from results import q_line_value
+from spatial_index import BBox, SpatialIndex
+from temporal_index import TemporalIndex
+
+# "A0124/23 NOTAMR A0100/23": own ID, message type and the NOTAM it refers to
+NOTAM_HEADER_FIELDS = re.compile(r'^\s*\(?([A-Z]\d{4}/\d{2})\s+NOTAM([NRC])\b(?:\s+([A-Z]\d{4}/\d{2}))?')
+
+# Changes remembered for changes_since; older clients get a full reset
+CHANGE_LOG_SIZE = 10000
+
+
+def parse_header(text: str) -> Optional[Tuple[str, str, Optional[str]]]:
+    """(id, type, referenced id) from a NOTAM header, type being N, R or C; None without a header."""
+    match = NOTAM_HEADER_FIELDS.match(text)
+    if not match:
+        return None
+    return match.group(1), match.group(2), match.group(3)
+
+
+def notam_key(notam: Dict[str, Any]) -> Tuple[str, str, Optional[str]]:
+    """
+    (id, type, referenced id) a parse result is stored under. NOTAMs without
+    a header are treated as new and keyed on their first ID; raises
+    ValueError if there is none.
+    """
+    header = parse_header(notam.get('raw_text') or '')
+    if header is not None:
+        return header
+    ids = notam.get('ids') or []
+    if not ids:
+        raise ValueError("NOTAM has no identifier")
+    return ids[0], 'N', None
+
+
+class NotamStore:
+    """
+    Current set of active NOTAMs, updated incrementally from parse results.
+
+    NOTAMN messages add a NOTAM, NOTAMR messages replace the NOTAM they
+    reference and NOTAMC messages cancel it. NOTAMs without a header are
+    treated as new and keyed on the first ID in the text. Every change
+    bumps the store version, and changes_since(version) returns what a
+    client that last saw that version needs to catch up.
+    """
+
+    def __init__(self, log_size: int = CHANGE_LOG_SIZE):
+        self.version = 0
+        self._notams: Dict[str, Dict[str, Any]] = {}
+        # (version, id) of every upsert or delete, oldest first
+        self._log: "deque[Tuple[int, str]]" = deque(maxlen=log_size)
+        self._index: Optional[SpatialIndex] = None
+        self._temporal: Optional[TemporalIndex] = None
+        self._index_ids: List[str] = []
+        self._index_version = -1
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._notams)
+
+    def __contains__(self, notam_id):
+        return notam_id in self._notams
+
+    def get(self, notam_id: str) -> Optional[Dict[str, Any]]:
+        return self._notams.get(notam_id)
+
+    def _record(self, notam_id: str):
+        # Caller holds the lock
+        self.version += 1
+        self._log.append((self.version, notam_id))
+
+    def _upsert(self, notam_id: str, notam: Dict[str, Any]) -> bool:
+        if self._notams.get(notam_id) == notam:
+            return False
+        self._notams[notam_id] = notam
+        self._record(notam_id)
+        return True
+
+    def _delete(self, notam_id: Optional[str]) -> bool:
+        if notam_id is None or self._notams.pop(notam_id, None) is None:
+            return False
+        self._record(notam_id)
+        return True
+
+    def apply(self, notam: Dict[str, Any]) -> int:
+        """
+        Apply one parse result. Returns the number of changes it caused (0
+        when the NOTAM is already known with the same content).
+        Raises ValueError if the NOTAM has no ID to key it on.
+        """
+        notam_id, kind, ref = notam_key(notam)
+        with self._lock:
+            if kind == 'C':
+                return int(self._delete(ref))
+            changes = 0
+            if kind == 'R' and ref != notam_id:
+                changes += self._delete(ref)
+            changes += self._upsert(notam_id, notam)
+            return changes
+
+    def apply_all(self, notams: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+        """Apply parse results in order; returns {"version", "changes", "errors"}."""
+        changes = 0
+        errors = []
+        for index, notam in enumerate(notams):
+            try:
+                changes += self.apply(notam)
+            except ValueError as e:
+                errors.append({"index": index, "raw_text": notam.get('raw_text', ''), "error": str(e)})
+        return {"version": self.version, "changes": changes, "errors": errors}
+
+    def all(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return list(self._notams.values())
+
+    def changes_since(self, version: int) -> Dict[str, Any]:
+        """
+        Delta for a client that last saw `version`:
+        {"version", "reset", "upserts": [notam, ...], "deletes": [id, ...]}.
+
+        Each NOTAM appears once, in its current state. When version is
+        older than the change log (or from a different store), reset is
+        true and upserts hold every active NOTAM; the client should drop
+        what it has and start over.
+        """
+        with self._lock:
+            oldest = self._log[0][0] if self._log else self.version + 1
+            if version > self.version or version < oldest - 1:
+                return {"version": self.version, "reset": True,
+                        "upserts": list(self._notams.values()), "deletes": []}
+
+            changed = []
+            seen = set()
+            for change_version, notam_id in reversed(self._log):
+                if change_version <= version:
+                    break
+                if notam_id not in seen:
+                    seen.add(notam_id)
+                    changed.append(notam_id)
+            changed.reverse()
+            return {
+                "version": self.version,
+                "reset": False,
+                "upserts": [self._notams[i] for i in changed if i in self._notams],
+                "deletes": [i for i in changed if i not in self._notams],
+            }
+
+    def query(self, bbox: Optional[BBox] = None, active: Optional[Tuple[float, float]] = None,
+              subjects: Optional[Iterable[str]] = None, fir: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        NOTAMs whose geometry intersects bbox (min_lat, min_lon, max_lat,
+        max_lon), whose validity overlaps active (t1, t2, epoch seconds),
+        whose Q-code subject is one of subjects (e.g. "RT" for QRTCA) and/or
+        whose Q-line FIR is fir. The spatial and temporal indexes are
+        rebuilt on the first query after a change.
+        """
+        notams = self._query(bbox, active)
+        if subjects is not None:
+            wanted = {subject.upper() for subject in subjects}
+            notams = [notam for notam in notams if q_line_value(notam, 'subject') in wanted]
+        if fir is not None:
+            notams = [notam for notam in notams if q_line_value(notam, 'fir') == fir.upper()]
+        return notams
+
+    def _query(self, bbox: Optional[BBox], active: Optional[Tuple[float, float]]) -> List[Dict[str, Any]]:
+        with self._lock:
+            if self._index_version != self.version:
+                self._index_ids = list(self._notams)
+                items = [self._notams[i] for i in self._index_ids]
+                self._index = SpatialIndex(items)
+                self._temporal = TemporalIndex(items)
+                self._index_version = self.version
+            positions = None
+            if bbox is not None:
+                positions = self._index.query_bbox(*bbox)
+            if active is not None:
+                in_time = self._temporal.query(*active)
+                positions = in_time if positions is None else sorted(set(positions).intersection(in_time))
+            if positions is None:
+                return list(self._notams.values())
+            ids = self._index_ids
+            return [self._notams[ids[i]] for i in positions]
+
+    def query_bbox(self, min_lat: float, min_lon: float, max_lat: float, max_lon: float) -> List[Dict[str, Any]]:
+        """NOTAMs whose geometry intersects the box."""
+        return self.query(bbox=(min_lat, min_lon, max_lat, max_lon))
+
+    def query_time(self, t1: float, t2: Optional[float] = None) -> List[Dict[str, Any]]:
+        """NOTAMs valid at any time between t1 and t2 (epoch seconds; t2 defaults to t1)."""
+        return self.query(active=(t1, t1 if t2 is None else t2))
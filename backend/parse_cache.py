@@ -0,0 +1,123 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Any, Iterable, Optional, Tuple
+
+import fir_data
+import waypoint_db
+from parser_universal import NotamParser, PARSER_VERSION, default_parser, project
+from results import NotamResult
+
+
+def data_version() -> Tuple[Any, ...]:
+    """Everything besides the NOTAM text that a parse result depends on."""
+    return (PARSER_VERSION, waypoint_db.data_version(), fir_data.data_version())
+
+
+class ParseCache:
+    """
+    Content-addressed cache of NotamParser.parse results.
+
+    Entries are keyed on a hash of the NOTAM text after clean_text, so the
+    same NOTAM pasted with different line breaks hits the same entry. The
+    cache is bounded (least recently used entries are evicted first), can
+    expire entries after ttl seconds, and is emptied whenever the parser or
+    the waypoint/FIR data changes.
+
+    It has the same parse(text) method as NotamParser and can be passed
+    wherever a parser is expected. Cached results are shared between
+    callers and must be treated as read-only.
+    """
+
+    def __init__(self, maxsize: int = 10000, ttl: Optional[float] = None, parser: Optional[NotamParser] = None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.parser = parser or default_parser
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._version = data_version()
+        self._lock = threading.Lock()
+
+    def key(self, text: str) -> str:
+        clean = self.parser.clean_text(text)
+        return hashlib.blake2b(clean.encode('utf-8'), digest_size=16).hexdigest()
+
+    def _check_version(self):
+        # Caller holds the lock
+        version = data_version()
+        if version != self._version:
+            self._entries.clear()
+            self._version = version
+
+    def get(self, text: str) -> Optional[Dict[str, Any]]:
+        """Cached result for text, or None. Counts a hit or a miss."""
+        key = self.key(text)
+        with self._lock:
+            self._check_version()
+            entry = self._entries.get(key)
+            if entry is not None and self.ttl is not None and time.monotonic() - entry[0] > self.ttl:
+                del self._entries[key]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+        # Same geometry, but raw_text is always the text that was asked for
+        result = entry[1]
+        if isinstance(result, NotamResult):
+            return result.replace(raw_text=text)
+        return dict(result, raw_text=text)
+
+    def put(self, text: str, result: Dict[str, Any], version: Optional[Tuple[Any, ...]] = None):
+        """
+        Store a result. Pass the data_version() taken before parsing to drop
+        results that were computed against data that has since changed.
+        """
+        if self.maxsize <= 0:
+            return
+        key = self.key(text)
+        with self._lock:
+            self._check_version()
+            if version is not None and version != self._version:
+                return
+            self._entries[key] = (time.monotonic(), result)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def parse(self, text: str, fields: Optional[Iterable[str]] = None) -> Dict[str, Any]:
+        """
+        Cached parse result. With fields, a cached result is projected onto
+        them, and a miss is parsed for those fields only and not cached.
+        """
+        result = self.get(text)
+        if result is not None:
+            return project(result, fields)
+        if fields is not None:
+            return self.parser.parse(text, fields)
+        version = data_version()
+        result = self.parser.parse(text)
+        self.put(text, result, version)
+        return result
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
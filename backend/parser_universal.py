@@ -1,45 +1,274 @@
+import calendar
 import re
-from typing import List, Dict, Any, Optional
-from fir_data import get_fir_boundary
-from waypoint_db import get_waypoint_coords
+from array import array
+from functools import lru_cache
+from typing import List, Dict, Any, Iterable, Optional, Tuple
+from fir_data import get_fir_ring
+from results import FIELDS, Geometry, NotamResult
+from waypoint_db import find_fixes, get_waypoint_coords
+
+# Bump whenever a change alters parse() output, so cached results are dropped
+PARSER_VERSION = 4
+
+# --- Regex Patterns ---
+# Compiled once (at import time unless noted) and shared by every NotamParser instance.
+# Compiled patterns are immutable and safe to use from several threads.
+
+# Separator between latitude and longitude (e.g. "251600N 0552000E", "... TO ...")
+COORD_SEP = r'(?:[\s,./-]*|\s+TO\s+)'
+
+# Single-format pair patterns by name. The parser only uses PAIR_ANY, so
+# these are compiled on first access (see pair_pattern), which keeps a few
+# milliseconds of regex compilation off every cold start
+PAIR_SOURCES: Dict[str, str] = {}
+
+# 1. Standard DMS Suffix (e.g., 251600N, 2516N, 25-16N)
+LAT_SUFFIX = r'(?P<lat_d>\d{2})[\s._-]?(?P<lat_m>\d{2})[\s._-]?(?P<lat_s>\d{2})?\s?(?P<lat_h>[NS])'
+LON_SUFFIX = r'(?P<lon_d>\d{2,3})[\s._-]?(?P<lon_m>\d{2})[\s._-]?(?P<lon_s>\d{2})?\s?(?P<lon_h>[EW])'
+PAIR_SOURCES['PAIR_SUFFIX'] = f"{LAT_SUFFIX}{COORD_SEP}{LON_SUFFIX}"
+
+# 2. Standard DMS Prefix (e.g., N251600, N25 16)
+LAT_PREFIX = r'(?P<lat_h_p>[NS])\s?(?P<lat_d_p>\d{2})[\s._-]?(?P<lat_m_p>\d{2})[\s._-]?(?P<lat_s_p>\d{2})?'
+LON_PREFIX = r'(?P<lon_h_p>[EW])\s?(?P<lon_d_p>\d{2,3})[\s._-]?(?P<lon_m_p>\d{2})[\s._-]?(?P<lon_s_p>\d{2})?'
+PAIR_SOURCES['PAIR_PREFIX'] = f"{LAT_PREFIX}{COORD_SEP}{LON_PREFIX}"
+
+# 3. Decimal Degrees (e.g. 45.5N 90.5W)
+LAT_DEC = r'(?P<lat_v>\d{1,2}\.\d+)\s?(?P<lat_h_d>[NS])'
+LON_DEC = r'(?P<lon_v>\d{1,3}\.\d+)\s?(?P<lon_h_d>[EW])'
+PAIR_SOURCES['PAIR_DEC'] = f"{LAT_DEC}{COORD_SEP}{LON_DEC}"
+
+# 4. Degrees Decimal Minutes (e.g. 4510.5N -> 45 deg 10.5 min)
+LAT_DDM = r'(?P<lat_d_m>\d{2})(?P<lat_m_m>\d{2}(?:\.\d+)?)\s?(?P<lat_h_m>[NS])'
+LON_DDM = r'(?P<lon_d_m>\d{2,3})(?P<lon_m_m>\d{2}(?:\.\d+)?)\s?(?P<lon_h_m>[EW])'
+PAIR_SOURCES['PAIR_DDM'] = f"{LAT_DDM}{COORD_SEP}{LON_DDM}"
+
+
+@lru_cache(maxsize=None)
+def pair_pattern(name: str) -> re.Pattern:
+    """PAIR_SUFFIX, PAIR_PREFIX, PAIR_DEC or PAIR_DDM, compiled."""
+    return re.compile(PAIR_SOURCES[name], re.IGNORECASE)
+
+
+def __getattr__(name: str):
+    # PAIR_SUFFIX etc. as module attributes, compiled when first read
+    if name in PAIR_SOURCES:
+        return pair_pattern(name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+# All four formats in one alternation so the text is scanned once.
+# At a given position the first alternative that matches wins:
+# decimal before DMS (45.55N is 45.55 deg, not 45 deg 55 min) and
+# DDM before DMS (3755.86N is 37 deg 55.86 min, not 37 deg 55 min 86 sec
+# with "." as separator; 2516N is read the same way by both).
+PAIR_ANY = re.compile(
+    f"(?P<dec>{LAT_DEC}{COORD_SEP}{LON_DEC})"
+    f"|(?P<ddm>{LAT_DDM}{COORD_SEP}{LON_DDM})"
+    f"|(?P<suffix>{LAT_SUFFIX}{COORD_SEP}{LON_SUFFIX})"
+    f"|(?P<prefix>{LAT_PREFIX}{COORD_SEP}{LON_PREFIX})",
+    re.IGNORECASE
+)
+
+# Group numbers per format, looked up once; m.group(int, ...) is
+# considerably cheaper than fetching groups by name for every match.
+COORD_GROUPS = {
+    fmt: tuple(PAIR_ANY.groupindex[n] for n in names)
+    for fmt, names in {
+        'suffix': ('lat_d', 'lat_m', 'lat_s', 'lat_h', 'lon_d', 'lon_m', 'lon_s', 'lon_h'),
+        'prefix': ('lat_d_p', 'lat_m_p', 'lat_s_p', 'lat_h_p', 'lon_d_p', 'lon_m_p', 'lon_s_p', 'lon_h_p'),
+        'dec': ('lat_v', 'lat_h_d', 'lon_v', 'lon_h_d'),
+        'ddm': ('lat_d_m', 'lat_m_m', 'lat_h_m', 'lon_d_m', 'lon_m_m', 'lon_h_m'),
+    }.items()
+}
+
+# The (?<!...) guards skip start positions inside a number or word. A match
+# starting there is always preceded by a longer match at the start of that
+# number or word, so results are unchanged, but the engine no longer retries
+# every digit of every coordinate.
+RADIUS_BEFORE_KEYWORD = re.compile(r'(?<!\d)(\d+(?:\.\d+)?)\s?NM\s+(?:RADIUS|RAD)', re.IGNORECASE)
+RADIUS_AFTER_KEYWORD = re.compile(r'(?:RADIUS|RAD)\s+(\d+(?:\.\d+)?)\s?NM', re.IGNORECASE)
+FLIGHT_LEVEL = re.compile(r'FL\s?(\d{3})', re.IGNORECASE)
+E_FIELD = re.compile(r'\sE\)\s+(.*?)(?:[A-G]\)|\Z)')
+CARF_PREFIX = re.compile(r'!CARF\s+\S+\s+')
+NOTAM_ID = re.compile(r'[A-Z]\d{4}/\d{2}')
+# Q) FIR/QCODE/TRAFFIC/PURPOSE/SCOPE/LOWER/UPPER/CENTRE+RADIUS,
+# e.g. Q) OMMM/QRTCA/IV/BO/W/000/040/2515N05522E005; see decode_q_line
+Q_LINE = re.compile(
+    r'Q\)\s*(?P<fir>[A-Z0-9]{4})/(?P<code>[^/]+)/(?P<traffic>[^/]+)/(?P<purpose>[^/]+)/(?P<scope>[^/]+)'
+    r'/(?P<lower>[^/]+)/(?P<upper>[^/]+)/(?P<lat>\d{4}[NS])(?P<lon>\d{5}[EW])(?P<radius>\d{3})',
+    re.IGNORECASE
+)
+# Q + two-letter subject (RT = temporary restricted area) + two-letter condition (CA = activated)
+Q_CODE = re.compile(r'Q([A-Z]{2})([A-Z]{2})')
+Q_FLAGS = re.compile(r'[A-Z]{1,3}')
+Q_LEVEL = re.compile(r'\d{3}')
+# A Q-line in exactly the expected form, checked against the span Q_LINE
+# found so the usual case is decoded straight from its groups
+Q_LINE_STRICT = re.compile(
+    r'Q\)\s*([A-Z0-9]{4})/Q([A-Z]{2})([A-Z]{2})/([A-Z]{1,3})/([A-Z]{1,3})/([A-Z]{1,3})'
+    r'/(\d{3})/(\d{3})/(\d{4}[NS])(\d{5}[EW])(\d{3})'
+)
+Q_LINE_FIR = re.compile(r'Q\)\s*([A-Z]{4})/')
+# Validity: B) and C) as YYMMDDHHMM (UTC); C) may be PERM or end in EST
+VALID_FROM = re.compile(r'\bB\)\s*(\d{10})\b')
+VALID_TO = re.compile(r'\bC\)\s*(?:(\d{10})\s*(EST)?|(PERM))\b')
+
+# Route(s) Fix-Fix, see extract_route_segments
+ROUTE_SEGMENT = re.compile(r'(?<![A-Z0-9])(?:[A-Z0-9]+(?:/[A-Z0-9]+)*)\s+([A-Z]{2,5})\s*[–-]\s*([A-Z]{2,5})')
+# Route designators (A123, J456, G789, etc.)
+ROUTE_DESIGNATOR = re.compile(r'\b[A-Z]\d{2,3}\b')
+
+# Strong route indicators
+ROUTE_KEYWORDS = (
+    "RTE SEGMENTS",
+    "ROUTE SEGMENTS",
+    "ATS RTE",
+    "ATS ROUTE",
+    "AIRWAY",
+    "FLW RTE",
+    "FOLLOWING ROUTE",
+    "FOLLOWING ROUTES",
+    "SEGMENTS OF",
+    "ROUTE PORTION",
+    "AIRWAY PORTION",
+)
+
+# Phrases that end the free-text description and start the geometry
+DESCRIPTION_STOP_WORDS = (
+    "WI AN AREA", "AN AREA DEFINED", "WITHIN AN AREA",
+    "AREA DEFINED", "DEFINED AS", "WITHIN A RADIUS",
+    "CENTERED ON", "BOUNDED BY",
+)
+# All of them in one search: the leftmost match is the earliest stop word
+# (about twice as fast on the benchmark corpus as a find() per word)
+DESCRIPTION_STOP = re.compile('|'.join(map(re.escape, DESCRIPTION_STOP_WORDS)))
+
+# Marks a FIR-wide restriction, see extract_geometry
+FIR_KEYWORDS = ("FIR", "FLIGHT INFORMATION REGION")
+
+# Q-code subjects for a FIR or UIR as a whole
+FIR_SUBJECTS = frozenset({"AF", "AU"})
+
+
+def _q_field(pattern: re.Pattern, value: str) -> Optional[str]:
+    value = value.strip().upper()
+    return value if pattern.fullmatch(value) else None
+
+
+def _q_coordinate(value: str) -> float:
+    # DDMM[NS] or DDDMM[EW]
+    degrees = float(value[:-3]) + float(value[-3:-1]) / 60.0
+    return -degrees if value[-1].upper() in 'SW' else degrees
+
+
+def has_altitude_fields(text: str) -> bool:
+    """Whether the text has an F) or G) field (as a word of its own)."""
+    # str.find rather than a regex search: the fields come last, and a
+    # pattern without a literal prefix is tried at every position before them
+    for field in ('F)', 'G)'):
+        at = text.find(field)
+        while at != -1:
+            if at == 0 or not (text[at - 1].isalnum() or text[at - 1] == '_'):
+                return True
+            at = text.find(field, at + 2)
+    return False
+
+
+def decode_q_line(text: str) -> Optional[Dict[str, Any]]:
+    """
+    The Q-line of a NOTAM decoded field by field: {"fir", "code", "subject",
+    "condition", "traffic", "purpose", "scope", "lower", "upper" (flight
+    levels as ints), "center" ([lat, lon]), "radius_nm"}. A field that does
+    not have the expected form is None. None without a Q-line.
+    """
+    match = Q_LINE.search(text)
+    if not match:
+        return None
+    strict = Q_LINE_STRICT.fullmatch(text, match.start(), match.end())
+    if strict:
+        fir, subject, condition, traffic, purpose, scope, lower, upper, lat, lon, radius = strict.groups()
+        return {
+            "fir": fir, "code": f"Q{subject}{condition}", "subject": subject, "condition": condition,
+            "traffic": traffic, "purpose": purpose, "scope": scope, "lower": int(lower), "upper": int(upper),
+            "center": [_q_coordinate(lat), _q_coordinate(lon)], "radius_nm": float(radius),
+        }
+
+    code = match.group('code').strip().upper()
+    subject = condition = None
+    if Q_CODE.fullmatch(code):
+        subject, condition = code[1:3], code[3:5]
+    else:
+        code = None
+    lower = _q_field(Q_LEVEL, match.group('lower'))
+    upper = _q_field(Q_LEVEL, match.group('upper'))
+    return {
+        "fir": match.group('fir').upper(),
+        "code": code,
+        "subject": subject,
+        "condition": condition,
+        "traffic": _q_field(Q_FLAGS, match.group('traffic')),
+        "purpose": _q_field(Q_FLAGS, match.group('purpose')),
+        "scope": _q_field(Q_FLAGS, match.group('scope')),
+        "lower": int(lower) if lower is not None else None,
+        "upper": int(upper) if upper is not None else None,
+        "center": [_q_coordinate(match.group('lat')), _q_coordinate(match.group('lon'))],
+        "radius_nm": float(match.group('radius')),
+    }
+
+_UNSET = object()
+
+
+class TextScan:
+    """
+    A NOTAM's text with whitespace normalized and uppercased, and which
+    keyword groups occur in it. Computed once per text by scan_text() and
+    shared by the parser stages, which used to clean and uppercase the
+    text again each. The decoded Q-line is computed on first use.
+    """
+
+    __slots__ = ('text', 'clean', 'upper', 'route', 'fir', '_q_line')
+
+    def __init__(self, text: str):
+        self.text = text
+        self._q_line = _UNSET
+        self.clean = ' '.join(text.split())
+        self.upper = self.clean.upper()
+        # Plain substring tests: for a dozen literals CPython's str search
+        # is several times faster than a compiled alternation over the text
+        self.route = any(keyword in self.upper for keyword in ROUTE_KEYWORDS)
+        self.fir = any(keyword in self.upper for keyword in FIR_KEYWORDS)
+
+    @property
+    def q_line(self) -> Optional[Dict[str, Any]]:
+        """decode_q_line(text); shared, do not modify."""
+        if self._q_line is _UNSET:
+            self._q_line = decode_q_line(self.text)
+        return self._q_line
+
+
+@lru_cache(maxsize=64)
+def scan_text(text: str) -> TextScan:
+    """TextScan of text; the stages of one parse all get the same object."""
+    return TextScan(text)
+
 
 class NotamParser:
-    def __init__(self):
-        # 1. Standard DMS Suffix (e.g., 251600N, 2516N, 25-16N)
-        self.lat_suffix = r'(?P<lat_d>\d{2})[\s._-]?(?P<lat_m>\d{2})[\s._-]?(?P<lat_s>\d{2})?\s?(?P<lat_h>[NS])'
-        self.lon_suffix = r'(?P<lon_d>\d{2,3})[\s._-]?(?P<lon_m>\d{2})[\s._-]?(?P<lon_s>\d{2})?\s?(?P<lon_h>[EW])'
-        self.pair_suffix = re.compile(
-            f"{self.lat_suffix}(?:[\s,./-]*|\\s+TO\\s+){self.lon_suffix}", 
-            re.IGNORECASE
-        )
-        
-        # 2. Standard DMS Prefix (e.g., N251600, N25 16)
-        self.lat_prefix = r'(?P<lat_h_p>[NS])\s?(?P<lat_d_p>\d{2})[\s._-]?(?P<lat_m_p>\d{2})[\s._-]?(?P<lat_s_p>\d{2})?'
-        self.lon_prefix = r'(?P<lon_h_p>[EW])\s?(?P<lon_d_p>\d{2,3})[\s._-]?(?P<lon_m_p>\d{2})[\s._-]?(?P<lon_s_p>\d{2})?'
-        self.pair_prefix = re.compile(
-            f"{self.lat_prefix}(?:[\s,./-]*|\\s+TO\\s+){self.lon_prefix}", 
-            re.IGNORECASE
-        )
-
-        # 3. Decimal Degrees (e.g. 45.5N 90.5W)
-        self.lat_dec = r'(?P<lat_v>\d{1,2}\.\d+)\s?(?P<lat_h_d>[NS])'
-        self.lon_dec = r'(?P<lon_v>\d{1,3}\.\d+)\s?(?P<lon_h_d>[EW])'
-        self.pair_dec = re.compile(
-            f"{self.lat_dec}(?:[\s,./-]*|\\s+TO\\s+){self.lon_dec}", 
-            re.IGNORECASE
-        )
-
-        # 4. Degrees Decimal Minutes (e.g. 4510.5N -> 45 deg 10.5 min)
-        self.lat_ddm = r'(?P<lat_d_m>\d{2})(?P<lat_m_m>\d{2}(?:\.\d+)?)\s?(?P<lat_h_m>[NS])'
-        self.lon_ddm = r'(?P<lon_d_m>\d{2,3})(?P<lon_m_m>\d{2}(?:\.\d+)?)\s?(?P<lon_h_m>[EW])'
-        self.pair_ddm = re.compile(
-            f"{self.lat_ddm}(?:[\s,./-]*|\\s+TO\\s+){self.lon_ddm}", 
-            re.IGNORECASE
-        )
+    """
+    Stateless NOTAM parser.
+
+    All patterns live at module level, so instances are free to create and
+    one instance can be shared between requests and threads.
+    """
+    # Kept as class attributes for code that reads them from an instance
+    pair_suffix = property(lambda self: pair_pattern('PAIR_SUFFIX'))
+    pair_prefix = property(lambda self: pair_pattern('PAIR_PREFIX'))
+    pair_dec = property(lambda self: pair_pattern('PAIR_DEC'))
+    pair_ddm = property(lambda self: pair_pattern('PAIR_DDM'))
+    pair_any = PAIR_ANY
 
     def clean_text(self, text: str) -> str:
-        t = re.sub(r'\s+', ' ', text)
-        return t.strip()
+        """Whitespace runs collapsed to single spaces, ends stripped."""
+        return scan_text(text).clean
 
     def parse_dms(self, d, m, s, h):
         try:
@@ -74,119 +303,164 @@ class NotamParser:
             return 0.0
 
     def extract_coordinates(self, text: str) -> List[List[float]]:
-        coords = []
         clean_txt = self.clean_text(text)
-        
-        # 1. Try Suffix Format
-        for m in self.pair_suffix.finditer(clean_txt):
-            d = m.groupdict()
-            lat = self.parse_dms(d['lat_d'], d['lat_m'], d['lat_s'], d['lat_h'])
-            lon = self.parse_dms(d['lon_d'], d['lon_m'], d['lon_s'], d['lon_h'])
-            coords.append([lat, lon])
-            
-        # 2. Try Prefix Format
-        for m in self.pair_prefix.finditer(clean_txt):
-            d = m.groupdict()
-            lat = self.parse_dms(d['lat_d_p'], d['lat_m_p'], d['lat_s_p'], d['lat_h_p'])
-            lon = self.parse_dms(d['lon_d_p'], d['lon_m_p'], d['lon_s_p'], d['lon_h_p'])
-            coords.append([lat, lon])
-
-        # 3. Try Decimal Degrees
-        for m in self.pair_dec.finditer(clean_txt):
-            d = m.groupdict()
-            lat = self.parse_decimal(d['lat_v'], d['lat_h_d'])
-            lon = self.parse_decimal(d['lon_v'], d['lon_h_d'])
-            coords.append([lat, lon])
-
-        # 4. Try DDM
-        for m in self.pair_ddm.finditer(clean_txt):
-            d = m.groupdict()
-            lat = self.parse_ddm(d['lat_d_m'], d['lat_m_m'], d['lat_h_m'])
-            lon = self.parse_ddm(d['lon_d_m'], d['lon_m_m'], d['lon_h_m'])
-            coords.append([lat, lon])
-            
-        # Deduplicate while preserving order
         unique_coords = []
         seen = set()
-        for c in coords:
-            k = (round(c[0], 5), round(c[1], 5))
+
+        # Single pass over the text. Matches never overlap, so every span is
+        # converted exactly once and coordinates come out in text order.
+        # The regex guarantees digit groups, so values are converted inline
+        # instead of going through parse_dms/parse_decimal/parse_ddm.
+        groups = COORD_GROUPS
+        for m in PAIR_ANY.finditer(clean_txt):
+            fmt = m.lastgroup
+            if fmt == 'dec':
+                lat_v, lat_h, lon_v, lon_h = m.group(*groups['dec'])
+                lat = float(lat_v)
+                lon = float(lon_v)
+            elif fmt == 'ddm':
+                lat_d, lat_m, lat_h, lon_d, lon_m, lon_h = m.group(*groups['ddm'])
+                lat = float(lat_d) + float(lat_m)/60.0
+                lon = float(lon_d) + float(lon_m)/60.0
+            else:
+                lat_d, lat_m, lat_s, lat_h, lon_d, lon_m, lon_s, lon_h = m.group(*groups[fmt])
+                lat = float(lat_d) + float(lat_m)/60.0 + (float(lat_s)/3600.0 if lat_s else 0.0)
+                lon = float(lon_d) + float(lon_m)/60.0 + (float(lon_s)/3600.0 if lon_s else 0.0)
+            if lat_h in 'Ss':
+                lat = -lat
+            if lon_h in 'Ww':
+                lon = -lon
+
+            # Deduplicate while preserving order
+            k = (round(lat, 5), round(lon, 5))
             if k not in seen:
                 seen.add(k)
-                unique_coords.append(c)
-                
+                unique_coords.append([lat, lon])
+
         return unique_coords
 
     def extract_radius(self, text: str) -> Optional[float]:
-        match = re.search(r'(\d+(?:\.\d+)?)\s?NM\s+(?:RADIUS|RAD)', text, re.IGNORECASE)
+        match = RADIUS_BEFORE_KEYWORD.search(text)
         if match: return float(match.group(1))
         
-        match = re.search(r'(?:RADIUS|RAD)\s+(\d+(?:\.\d+)?)\s?NM', text, re.IGNORECASE)
+        match = RADIUS_AFTER_KEYWORD.search(text)
         if match: return float(match.group(1))
         
         return None
 
     def extract_altitude(self, text: str) -> Dict[str, str]:
+        """
+        Lower and upper limit. Without F) and G) fields they are taken from
+        the Q-line (000 = SFC, 999 = UNL) rather than searched for in the text.
+        """
         lower = "SFC"
         upper = "UNL"
-        fls = re.findall(r'FL\s?(\d{3})', text, re.IGNORECASE)
-        if fls:
-            if len(fls) >= 2:
-                lower = f"FL{fls[0]}"
-                upper = f"FL{fls[1]}"
-            else:
-                upper = f"FL{fls[0]}"
-        if "SFC" in text.upper(): lower = "SFC"
-        if "GND" in text.upper(): lower = "GND"
-        if "UNL" in text.upper(): upper = "UNL"
+        scan = scan_text(text)
+        q_line = scan.q_line
+        if (q_line is not None and q_line["lower"] is not None and q_line["upper"] is not None
+                and not has_altitude_fields(text)):
+            if q_line["lower"] > 0:
+                lower = f"FL{q_line['lower']:03d}"
+            if q_line["upper"] < 999:
+                upper = f"FL{q_line['upper']:03d}"
+        else:
+            fls = FLIGHT_LEVEL.findall(text)
+            if fls:
+                if len(fls) >= 2:
+                    lower = f"FL{fls[0]}"
+                    upper = f"FL{fls[1]}"
+                else:
+                    upper = f"FL{fls[0]}"
+        text_upper = scan.upper
+        if "SFC" in text_upper: lower = "SFC"
+        if "GND" in text_upper: lower = "GND"
+        if "UNL" in text_upper: upper = "UNL"
         return {"lower": lower, "upper": upper}
     
+    @staticmethod
+    def notam_time(value: str) -> Optional[int]:
+        """YYMMDDHHMM (UTC) to epoch seconds; None if it is not a valid time."""
+        try:
+            year, month, day, hour, minute = (int(value[i:i + 2]) for i in range(0, 10, 2))
+            if not (1 <= month <= 12 and 1 <= day <= calendar.monthrange(2000 + year, month)[1]
+                    and hour <= 24 and minute <= 59):
+                return None
+            return calendar.timegm((2000 + year, month, day, 0, 0, 0)) + hour * 3600 + minute * 60
+        except ValueError:
+            return None
+
+    def extract_validity(self, text: str) -> Dict[str, Any]:
+        """
+        Validity window from the B) and C) fields as epoch seconds. end is
+        None for PERM or a missing C); estimated is set for "EST" end times.
+        """
+        start = end = None
+        estimated = permanent = False
+        match = VALID_FROM.search(text)
+        if match:
+            start = self.notam_time(match.group(1))
+        match = VALID_TO.search(text)
+        if match:
+            if match.group(3):
+                permanent = True
+            else:
+                end = self.notam_time(match.group(1))
+                estimated = end is not None and bool(match.group(2))
+        return {"start": start, "end": end, "estimated": estimated, "permanent": permanent}
+
     def extract_description(self, text: str) -> str:
         clean = self.clean_text(text)
-        match = re.search(r'\sE\)\s+(.*?)(?:[A-G]\)|\Z)', clean)
+        match = E_FIELD.search(clean)
         if match:
             clean = match.group(1)
         else:
-            clean = re.sub(r'!CARF\s+\S+\s+', '', clean)
-            clean = re.sub(r'[A-Z]\d{4}/\d{2}', '', clean)
+            clean = CARF_PREFIX.sub('', clean)
+            clean = NOTAM_ID.sub('', clean)
         
-        stop_words = [
-            "WI AN AREA", "AN AREA DEFINED", "WITHIN AN AREA", 
-            "AREA DEFINED", "DEFINED AS", "WITHIN A RADIUS", 
-            "CENTERED ON", "BOUNDED BY"
-        ]
-        
-        idx = len(clean)
-        for word in stop_words:
-            f = clean.find(word)
-            if f != -1 and f < idx:
-                idx = f
-                
-        desc = clean[:idx].strip()
+        stop = DESCRIPTION_STOP.search(clean)
+        if stop:
+            clean = clean[:stop.start()]
+
+        desc = clean.strip()
         desc = desc.strip(' -:,')
         return desc
 
     def parse_q_line(self, text: str) -> Optional[Dict[str, Any]]:
-        q_pattern = re.compile(r'Q\)\s*[A-Z0-9]{4}/[^/]+/[^/]+/[^/]+/[^/]+/[^/]+/[^/]+/(\d{4}[NS]\d{5}[EW])(\d{3})', re.IGNORECASE)
-        match = q_pattern.search(text)
-        if match:
-            coord_str = match.group(1)
-            radius_str = match.group(2)
-            lat_d = coord_str[0:2]
-            lat_m = coord_str[2:4]
-            lat_h = coord_str[4]
-            lon_d = coord_str[5:8]
-            lon_m = coord_str[8:10]
-            lon_h = coord_str[10]
-            lat = self.parse_dms(lat_d, lat_m, "00", lat_h)
-            lon = self.parse_dms(lon_d, lon_m, "00", lon_h)
-            radius = float(radius_str)
-            return {
-                "coordinates": [[lat, lon]],
-                "radius_nm": radius
-            }
-        return None
+        """Q-line position and radius as {"coordinates": [[lat, lon]], "radius_nm"}, or None."""
+        q_line = scan_text(text).q_line
+        if q_line is None:
+            return None
+        return {
+            "coordinates": [list(q_line["center"])],
+            "radius_nm": q_line["radius_nm"]
+        }
+
+    def extract_q_line(self, text: str) -> Optional[Dict[str, Any]]:
+        """All Q-line fields decoded (see decode_q_line), or None."""
+        q_line = scan_text(text).q_line
+        if q_line is None:
+            return None
+        return dict(q_line, center=list(q_line["center"]))
+
+    def extract_issuing_fir(self, text: str) -> Optional[str]:
+        """ICAO code of the FIR in the Q-line (Q) OMMM/...), if any."""
+        q_line = scan_text(text).q_line
+        if q_line is not None:
+            return q_line["fir"]
+        # A Q-line too malformed to decode may still name its FIR
+        match = Q_LINE_FIR.search(text)
+        return match.group(1) if match else None
+
+    def fir_boundary(self, fir_code: str) -> Optional[array]:
+        """Boundary of a FIR from the FIR database as a flat lat, lon array (shared; do not modify), or None."""
+        return get_fir_ring(fir_code)
 
-    def extract_route_segments(self, text: str) -> List[List[List[float]]]:
+    def extract_route_segments(self, text: str, near: Optional[List[float]] = None) -> List[List[List[float]]]:
+        """
+        Resolve Fix-Fix route segments through the waypoint database. When a
+        fix name is used by more than one waypoint, the one closest to near
+        (normally the Q-line position) is taken.
+        """
         segments = []
         # Pattern: Route(s) Fix-Fix
         # Supports:
@@ -201,15 +475,17 @@ class NotamParser:
         # \s*[–-]\s* -> Separator (hyphen or en-dash, optional spaces)
         # ([A-Z]{2,5}) -> End Fix
         
-        pattern = r'(?:[A-Z0-9]+(?:/[A-Z0-9]+)*)\s+([A-Z]{2,5})\s*[–-]\s*([A-Z]{2,5})'
-        
-        matches = re.finditer(pattern, text)
+        if '-' not in text and '–' not in text:
+            # Every segment has a dash between its fixes
+            return segments
+
+        matches = ROUTE_SEGMENT.finditer(text)
         for m in matches:
             start_fix = m.group(1)
             end_fix = m.group(2)
             
-            start_coords = get_waypoint_coords(start_fix)
-            end_coords = get_waypoint_coords(end_fix)
+            start_coords = get_waypoint_coords(start_fix, near)
+            end_coords = get_waypoint_coords(end_fix, near)
             
             if start_coords and end_coords:
                 segments.append([start_coords, end_coords])
@@ -221,30 +497,13 @@ class NotamParser:
         Detect if NOTAM describes route segments rather than areas.
         Returns True if this is clearly a route NOTAM.
         """
-        text_upper = text.upper()
-        
-        # Strong route indicators
-        route_keywords = [
-            "RTE SEGMENTS",
-            "ROUTE SEGMENTS", 
-            "ATS RTE",
-            "ATS ROUTE",
-            "AIRWAY",
-            "FLW RTE",
-            "FOLLOWING ROUTE",
-            "FOLLOWING ROUTES",
-            "SEGMENTS OF",
-            "ROUTE PORTION",
-            "AIRWAY PORTION"
-        ]
-        
-        for keyword in route_keywords:
-            if keyword in text_upper:
-                return True
+        # Keywords span several words, so they are matched against
+        # normalized whitespace (see TextScan)
+        if scan_text(text).route:
+            return True
         
         # Check for route designators (A123, J456, G789, etc.)
-        route_pattern = r'\b[A-Z]\d{2,3}\b'
-        route_matches = re.findall(route_pattern, text)
+        route_matches = ROUTE_DESIGNATOR.findall(text)
         
         # If we find multiple route designators, likely a route NOTAM
         if len(route_matches) >= 2:
@@ -252,41 +511,58 @@ class NotamParser:
             
         return False
     
-    def parse(self, text: str) -> Dict[str, Any]:
-        coords = self.extract_coordinates(text)
-        radius = self.extract_radius(text)
-        altitude = self.extract_altitude(text)
-        description = self.extract_description(text)
-        ids = re.findall(r'[A-Z]\d{4}/\d{2}', text)
-        
+    def extract_geometry(self, text: str) -> Geometry:
+        """
+        Geometry of a NOTAM, decided in priority order: route segments,
+        FIR boundary for a FIR/UIR Q-code with radius 999, explicit radius
+        circle, polygon, Q-line circle (or FIR for radius 999), FIR
+        boundary. Stages whose output a decided branch would throw away are
+        skipped.
+        """
         geometry_type = "point"
+        fir = None
         q_data = self.parse_q_line(text)
         
         # Check if this is a route NOTAM
         is_route = self.is_route_notam(text)
         
         # Priority 1: Route Segments (ABSOLUTE PRIORITY)
-        route_segments = self.extract_route_segments(text)
+        route_segments = self.extract_route_segments(text, q_data["coordinates"][0] if q_data else None)
         
         if route_segments or is_route:
-            # If we detected route keywords OR found route segments
+            # If we detected route keywords OR found route segments; any
+            # coordinates or radius in the text are not needed
+            radius = None
             if route_segments:
                 geometry_type = "multiline"
                 coords = route_segments
-                radius = None
             else:
                 # Route NOTAM but couldn't parse segments - return empty to avoid false area
                 geometry_type = "line"
                 coords = []
-                radius = None
+            return Geometry.from_points(geometry_type, coords, radius)
+
+        # A NOTAM about the FIR (or UIR) as a whole is its boundary, whatever
+        # positions the text may mention
+        scan = scan_text(text)
+        q_line = scan.q_line
+        if q_data and q_line["subject"] in FIR_SUBJECTS and q_line["radius_nm"] >= 999:
+            boundary = self.fir_boundary(q_line["fir"])
+            if boundary:
+                return Geometry("polygon", boundary, None, q_line["fir"])
+
+        coords = self.extract_coordinates(text)
+        # Without coordinates the radius only matters when there is no
+        # Q-line to take it from
+        radius = self.extract_radius(text) if coords or not q_data else None
         
         # Priority 2: Explicit Radius (Circle) - MUST have explicit radius keyword
-        elif radius and len(coords) >= 1:
+        if radius and len(coords) >= 1:
             geometry_type = "circle"
             coords = [coords[0]]
             
         # Priority 3: Area (Polygon) - Only if we have explicit coordinates AND not a route
-        elif len(coords) > 2 and not is_route:
+        elif len(coords) > 2:
             geometry_type = "polygon"
             # Close polygon if needed
             if coords[0] != coords[-1]:
@@ -294,48 +570,92 @@ class NotamParser:
             radius = None
             
         # Priority 4: Q-line Circle (Fallback)
-        elif q_data and not is_route:
+        elif q_data:
             coords = q_data["coordinates"]
             radius = q_data["radius_nm"]
             geometry_type = "circle"
             
             # Check for FIR-wide (large radius) -> Polygon
-            issuing_fir = None
-            q_match = re.search(r'Q\)\s*([A-Z]{4})/', text)
-            if q_match: issuing_fir = q_match.group(1)
-            
-            target_fir = issuing_fir
+            target_fir = q_line["fir"]
             
             # Only convert to FIR polygon if radius is very large (999 = entire FIR)
             if radius >= 999 and target_fir:
-                fir_poly = get_fir_boundary(target_fir)
+                fir_poly = self.fir_boundary(target_fir)
                 if fir_poly:
                     coords = fir_poly
                     geometry_type = "polygon"
                     radius = None
+                    fir = target_fir
         
         # Priority 5: FIR Boundary (if only FL restriction and no other geometry)
-        elif len(coords) == 0 and not is_route:
-            issuing_fir = None
-            q_match = re.search(r'Q\)\s*([A-Z]{4})/', text)
-            if q_match: issuing_fir = q_match.group(1)
-            
-            # Only use FIR boundary if this is clearly a FIR-wide restriction
-            if issuing_fir and ("FIR" in text.upper() or "FLIGHT INFORMATION REGION" in text.upper()):
-                fir_poly = get_fir_boundary(issuing_fir)
+        elif len(coords) == 0:
+            # Only use FIR boundary if this is clearly a FIR-wide restriction.
+            # There is no decoded Q-line here, so this is the one place the
+            # text is searched for a (malformed) Q-line's FIR
+            issuing_fir = self.extract_issuing_fir(text) if scan.fir else None
+            if issuing_fir:
+                fir_poly = self.fir_boundary(issuing_fir)
                 if fir_poly:
                     coords = fir_poly
                     geometry_type = "polygon"
                     radius = None
+                    fir = issuing_fir
 
-        return {
-            "raw_text": text,
-            "geometry": {
-                "type": geometry_type,
-                "coordinates": coords,
-                "radius_nm": radius
-            },
-            "altitude": altitude,
-            "description": description,
-            "ids": ids
-        }
+        if fir:
+            # The polygon is this FIR's boundary (see fir_data.with_tolerance),
+            # shared with the FIR store rather than copied
+            return Geometry(geometry_type, coords, None, fir)
+        return Geometry.from_points(geometry_type, coords, radius)
+
+    def parse(self, text: str, fields: Optional[Iterable[str]] = None) -> NotamResult:
+        """
+        Parse a NOTAM into {"raw_text", "geometry", "altitude", "validity",
+        "description", "ids", "q_line"} (a compact, read-only NotamResult
+        mapping; see results.py). With fields, only those keys (plus raw_text) are
+        extracted, e.g. fields=("ids", "altitude") skips all geometry work.
+        Raises ValueError for unknown fields.
+        """
+        wanted = FIELDS if fields is None else select_fields(fields)
+        return NotamResult.from_fields(text, {field: getattr(self, FIELD_EXTRACTORS[field])(text) for field in wanted})
+
+    def extract_ids(self, text: str) -> List[str]:
+        """Every NOTAM ID in the text, own ID first."""
+        return NOTAM_ID.findall(text)
+
+    def extract_fixes(self, text: str) -> List[str]:
+        """Identifiers of known waypoints mentioned anywhere in the text, in order."""
+        return find_fixes(text)
+
+
+# Parse result keys besides raw_text, in output order, and the method computing each
+FIELD_EXTRACTORS = {
+    "geometry": "extract_geometry",
+    "altitude": "extract_altitude",
+    "validity": "extract_validity",
+    "description": "extract_description",
+    "ids": "extract_ids",
+    "q_line": "extract_q_line",
+}
+
+
+def select_fields(fields: Iterable[str]) -> Tuple[str, ...]:
+    """Requested parse result fields in output order; raises ValueError for unknown ones."""
+    fields = set(fields)
+    unknown = fields - set(FIELDS) - {"raw_text"}
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(sorted(unknown))}. Available: {', '.join(FIELDS)}")
+    return tuple(f for f in FIELDS if f in fields)
+
+
+def project(result: Dict[str, Any], fields: Optional[Iterable[str]]) -> Dict[str, Any]:
+    """A full parse result restricted to fields (plus raw_text and, for failures, error keys)."""
+    if fields is None:
+        return result
+    wanted = set(select_fields(fields))
+    if isinstance(result, NotamResult):
+        return result.project(wanted)
+    return {k: v for k, v in result.items() if k not in FIELD_EXTRACTORS or k in wanted}
+
+
+# Shared instance for callers that do not need their own parser
+default_parser = NotamParser()
@@ -0,0 +1,237 @@
+# Compact parse results
+# NotamParser.parse returns NotamResult objects rather than nested dicts and
+# lists. Coordinates live in one flat array('d') of lat, lon pairs and the
+# small fields are tuples, which takes a fraction of the memory of the dict
+# shape once many results are held by the cache or the NOTAM store.
+#
+# Both classes are read-only Mappings with the keys of the dict shape, so
+# result['geometry']['coordinates'], .get() and dict(result) keep working;
+# every access builds fresh lists. dumps() writes the usual JSON.
+
+import json
+from array import array
+from collections.abc import Mapping
+from typing import List, Dict, Any, Iterable, Iterator, Optional, Sequence, Tuple
+
+ALTITUDE_KEYS = ('lower', 'upper')
+VALIDITY_KEYS = ('start', 'end', 'estimated', 'permanent')
+
+Q_LINE_KEYS = ('fir', 'code', 'subject', 'condition', 'traffic', 'purpose', 'scope',
+               'lower', 'upper', 'center', 'radius_nm')
+Q_CENTER = Q_LINE_KEYS.index('center')
+
+# Result keys besides raw_text, in output order
+FIELDS = ('geometry', 'altitude', 'validity', 'description', 'ids', 'q_line')
+
+GEOMETRY_KEYS = ('type', 'coordinates', 'radius_nm')
+FIR_GEOMETRY_KEYS = GEOMETRY_KEYS + ('fir',)
+
+
+def _points(flat: array) -> List[List[float]]:
+    # Within about 20% of numpy's frombuffer().reshape().tolist() on FIR
+    # sized rings, faster on small ones, and no numpy import
+    values = iter(flat.tolist())
+    return [[lat, lon] for lat, lon in zip(values, values)]
+
+
+class Geometry(Mapping):
+    """
+    {"type", "coordinates", "radius_nm"[, "fir"]} with coordinates stored as
+    a flat array('d'). Multiline geometries also keep the point offset at
+    which each segment starts. The array may be shared (FIR boundaries come
+    straight from the FIR store) and must not be modified.
+    """
+
+    __slots__ = ('type', 'flat', 'radius_nm', 'fir', 'parts')
+
+    def __init__(self, type: str, flat: array, radius_nm: Optional[float] = None,
+                 fir: Optional[str] = None, parts: Optional[array] = None):
+        self.type = type
+        self.flat = flat
+        self.radius_nm = radius_nm
+        self.fir = fir
+        self.parts = parts
+
+    @classmethod
+    def from_points(cls, type: str, points: Sequence[Any], radius_nm: Optional[float] = None,
+                    fir: Optional[str] = None) -> 'Geometry':
+        """From [lat, lon] points, or a list of segments for multiline."""
+        flat = array('d')
+        parts = None
+        if type == 'multiline':
+            parts = array('I', [0])
+            for segment in points:
+                for p in segment:
+                    flat.append(p[0])
+                    flat.append(p[1])
+                parts.append(len(flat) // 2)
+        else:
+            for p in points:
+                flat.append(p[0])
+                flat.append(p[1])
+        return cls(type, flat, radius_nm, fir, parts)
+
+    def coordinates(self) -> List[Any]:
+        points = _points(self.flat)
+        if self.parts is None:
+            return points
+        parts = self.parts
+        return [points[parts[i]:parts[i + 1]] for i in range(len(parts) - 1)]
+
+    def vertex_count(self) -> int:
+        return len(self.flat) // 2
+
+    def __getitem__(self, key: str) -> Any:
+        if key == 'type':
+            return self.type
+        if key == 'coordinates':
+            return self.coordinates()
+        if key == 'radius_nm':
+            return self.radius_nm
+        if key == 'fir' and self.fir:
+            return self.fir
+        raise KeyError(key)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(FIR_GEOMETRY_KEYS if self.fir else GEOMETRY_KEYS)
+
+    def __len__(self) -> int:
+        return 4 if self.fir else 3
+
+    def __eq__(self, other):
+        if isinstance(other, Geometry):
+            return (self.type == other.type and self.radius_nm == other.radius_nm and self.fir == other.fir
+                    and self.flat == other.flat and self.parts == other.parts)
+        return Mapping.__eq__(self, other)
+
+    __hash__ = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return dict(self.items())
+
+    def __repr__(self):
+        return f"Geometry({self.to_dict()!r})"
+
+
+class NotamResult(Mapping):
+    """
+    One parsed NOTAM: {"raw_text", "geometry", "altitude", "validity",
+    "description", "ids", "q_line"}, or just raw_text plus the requested fields for a
+    projected parse.
+    """
+
+    __slots__ = ('raw_text', 'fields', 'geometry', 'altitude', 'validity', 'description', 'ids', 'q_line')
+
+    def __init__(self, raw_text: str, fields: Tuple[str, ...] = FIELDS, geometry: Optional[Geometry] = None,
+                 altitude: Optional[Tuple[str, str]] = None, validity: Optional[Tuple[Any, ...]] = None,
+                 description: Optional[str] = None, ids: Optional[Tuple[str, ...]] = None,
+                 q_line: Optional[Tuple[Any, ...]] = None):
+        self.raw_text = raw_text
+        # FIELDS itself for full results, so they share one tuple
+        self.fields = FIELDS if fields == FIELDS else fields
+        self.geometry = geometry
+        self.altitude = altitude
+        self.validity = validity
+        self.description = description
+        self.ids = ids
+        # Q_LINE_KEYS values, center as a (lat, lon) tuple; None without a Q-line
+        self.q_line = q_line
+
+    @classmethod
+    def from_fields(cls, raw_text: str, values: Dict[str, Any]) -> 'NotamResult':
+        """From extractor output keyed by field (dicts and lists as parse() has always returned them)."""
+        fields = tuple(f for f in FIELDS if f in values)
+        geometry = values.get('geometry')
+        if geometry is not None and not isinstance(geometry, Geometry):
+            geometry = Geometry.from_points(geometry['type'], geometry['coordinates'],
+                                            geometry.get('radius_nm'), geometry.get('fir'))
+        altitude = values.get('altitude')
+        validity = values.get('validity')
+        ids = values.get('ids')
+        q_line = values.get('q_line')
+        if q_line is not None:
+            q_line = tuple(tuple(q_line[k]) if k == 'center' else q_line[k] for k in Q_LINE_KEYS)
+        return cls(
+            raw_text, fields, geometry,
+            tuple(altitude.get(k) for k in ALTITUDE_KEYS) if altitude is not None else None,
+            tuple(validity.get(k) for k in VALIDITY_KEYS) if validity is not None else None,
+            values.get('description'),
+            tuple(ids) if ids is not None else None,
+            q_line,
+        )
+
+    def replace(self, **changes: Any) -> 'NotamResult':
+        """Copy with some slots replaced; everything else is shared."""
+        slots = {name: getattr(self, name) for name in self.__slots__}
+        slots.update(changes)
+        return NotamResult(**slots)
+
+    def project(self, fields: Iterable[str]) -> 'NotamResult':
+        """Copy keeping only fields (and raw_text)."""
+        wanted = set(fields)
+        kept = tuple(f for f in self.fields if f in wanted)
+        return NotamResult(self.raw_text, kept, **{f: getattr(self, f) for f in kept})
+
+    def __getitem__(self, key: str) -> Any:
+        if key == 'raw_text':
+            return self.raw_text
+        if key not in self.fields:
+            raise KeyError(key)
+        if key == 'altitude':
+            return dict(zip(ALTITUDE_KEYS, self.altitude))
+        if key == 'validity':
+            return dict(zip(VALIDITY_KEYS, self.validity))
+        if key == 'ids':
+            return list(self.ids)
+        if key == 'q_line':
+            if self.q_line is None:
+                return None
+            q_line = dict(zip(Q_LINE_KEYS, self.q_line))
+            q_line['center'] = list(q_line['center'])
+            return q_line
+        return getattr(self, key)
+
+    def __iter__(self) -> Iterator[str]:
+        yield 'raw_text'
+        yield from self.fields
+
+    def __len__(self) -> int:
+        return 1 + len(self.fields)
+
+    def __eq__(self, other):
+        if isinstance(other, NotamResult):
+            return all(getattr(self, name) == getattr(other, name) for name in self.__slots__)
+        return Mapping.__eq__(self, other)
+
+    __hash__ = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        """The plain nested dict / list shape."""
+        out = dict(self.items())
+        if 'geometry' in out:
+            out['geometry'] = self.geometry.to_dict()
+        return out
+
+    def __repr__(self):
+        return f"NotamResult({self.to_dict()!r})"
+
+
+def q_line_value(notam: Mapping, key: str) -> Any:
+    """One Q_LINE_KEYS field of a parse result (e.g. "subject", "RT" for QRTCA), or None."""
+    if isinstance(notam, NotamResult):
+        return notam.q_line[Q_LINE_KEYS.index(key)] if notam.q_line else None
+    q_line = notam.get('q_line')
+    return q_line.get(key) if q_line else None
+
+
+def _default(value: Any) -> Any:
+    if isinstance(value, (NotamResult, Geometry)):
+        return value.to_dict()
+    if isinstance(value, Mapping):
+        return dict(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(value: Any) -> str:
+    """json.dumps that also writes NotamResult and Geometry objects, in the dict shape."""
+    return json.dumps(value, default=_default)
@@ -0,0 +1,146 @@
+from __future__ import annotations
+
+import hashlib
+from collections import OrderedDict
+from threading import Lock
+from typing import TYPE_CHECKING, List, Sequence, Tuple
+
+# Imported where used (see geometry.py), so loading the FIR data at startup
+# does not pull numpy in
+if TYPE_CHECKING:
+    import numpy as np
+
+Point = Sequence[float]
+
+# Spans shorter than this are scanned in Python; numpy's per-call overhead
+# only pays off on longer runs
+VECTOR_MIN_SPAN = 48
+
+# Memoized (geometry, tolerance) -> kept vertex indices
+MEMO_SIZE = 2048
+_memo: "OrderedDict[Tuple[bytes, bool, float], Tuple[int, ...]]" = OrderedDict()
+_memo_lock = Lock()
+
+
+def _segment_distance_sq(p: Point, a: Point, b: Point) -> float:
+    """Squared distance (in degrees) from p to the segment a-b."""
+    dx = b[0] - a[0]
+    dy = b[1] - a[1]
+    if dx == 0 and dy == 0:
+        ex = p[0] - a[0]
+        ey = p[1] - a[1]
+        return ex * ex + ey * ey
+    t = ((p[0] - a[0]) * dx + (p[1] - a[1]) * dy) / (dx * dx + dy * dy)
+    t = max(0.0, min(1.0, t))
+    ex = p[0] - (a[0] + t * dx)
+    ey = p[1] - (a[1] + t * dy)
+    return ex * ex + ey * ey
+
+
+def _farthest(xy: np.ndarray, points: Sequence[Point], first: int, last: int) -> Tuple[int, float]:
+    """Index and squared distance of the point between first and last farthest from their chord."""
+    if last - first < VECTOR_MIN_SPAN:
+        a = points[first]
+        b = points[last]
+        best, best_sq = -1, -1.0
+        for i in range(first + 1, last):
+            d = _segment_distance_sq(points[i], a, b)
+            if d > best_sq:
+                best, best_sq = i, d
+        return best, best_sq
+
+    import numpy as np
+    a = xy[first]
+    chord = xy[last] - a
+    offsets = xy[first + 1:last] - a
+    length_sq = chord @ chord
+    if length_sq == 0:
+        dist_sq = np.einsum('ij,ij->i', offsets, offsets)
+    else:
+        t = np.clip(offsets @ chord / length_sq, 0.0, 1.0)
+        rest = offsets - t[:, None] * chord
+        dist_sq = np.einsum('ij,ij->i', rest, rest)
+    i = int(dist_sq.argmax())
+    return first + 1 + i, float(dist_sq[i])
+
+
+def _douglas_peucker(xy: np.ndarray, points: Sequence[Point], first: int, last: int, tolerance: float, keep: bytearray):
+    keep[first] = keep[last] = 1
+    tolerance_sq = tolerance * tolerance
+    stack = [(first, last)]
+    while stack:
+        first, last = stack.pop()
+        if last - first < 2:
+            continue
+        index, dist_sq = _farthest(xy, points, first, last)
+        if dist_sq > tolerance_sq:
+            keep[index] = 1
+            stack.append((first, index))
+            stack.append((index, last))
+
+
+def _kept(points: Sequence[Point], tolerance: float, closed: bool) -> Tuple[int, ...]:
+    """Indices of the vertices Douglas-Peucker keeps, memoized per (geometry, tolerance)."""
+    import numpy as np
+    xy = np.ascontiguousarray(np.asarray(points, dtype=float)[:, :2])
+    key = (hashlib.blake2b(xy.tobytes(), digest_size=16).digest(), closed, tolerance)
+    with _memo_lock:
+        kept = _memo.get(key)
+        if kept is not None:
+            _memo.move_to_end(key)
+            return kept
+
+    n = len(points)
+    keep = bytearray(n)
+    if closed:
+        # Split at the vertex farthest from the start so both halves have
+        # distinct end points
+        offsets = xy - xy[0]
+        split = int(np.einsum('ij,ij->i', offsets, offsets)[1:n - 1].argmax()) + 1
+        _douglas_peucker(xy, points, 0, split, tolerance, keep)
+        _douglas_peucker(xy, points, split, n - 1, tolerance, keep)
+    else:
+        _douglas_peucker(xy, points, 0, n - 1, tolerance, keep)
+    kept = tuple(i for i in range(n) if keep[i])
+
+    with _memo_lock:
+        _memo[key] = kept
+        while len(_memo) > MEMO_SIZE:
+            _memo.popitem(last=False)
+    return kept
+
+
+def simplify_line(points: Sequence[Point], tolerance: float) -> List[Point]:
+    """
+    Douglas-Peucker simplification of an open line of [lat, lon] points.
+
+    Points closer than tolerance (degrees) to the simplified line are
+    dropped; the first and last points are always kept.
+    """
+    if tolerance <= 0 or len(points) < 3:
+        return list(points)
+    return [points[i] for i in _kept(points, tolerance, False)]
+
+
+def simplify_ring(points: Sequence[Point], tolerance: float) -> List[Point]:
+    """
+    Douglas-Peucker simplification of a closed ring (first point == last).
+
+    The ring is split at the vertex farthest from its start so both halves
+    have distinct end points. Rings that would collapse below a triangle
+    are returned unchanged.
+    """
+    if tolerance <= 0 or len(points) < 5:
+        return list(points)
+    kept = _kept(points, tolerance, True)
+    if len(kept) < 4:
+        return list(points)
+    return [points[i] for i in kept]
+
+
+def tolerance_for_zoom(zoom: float, pixels: float = 1.0) -> float:
+    """
+    Tolerance (degrees) matching `pixels` screen pixels at a web map zoom
+    level, where the world is 256 * 2**zoom pixels wide.
+    """
+    return pixels * 360.0 / (256 * 2 ** zoom)
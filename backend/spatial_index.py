@@ -0,0 +1,175 @@
+import math
+from typing import List, Dict, Any, Optional, Sequence, Tuple
+
+from geometry import EARTH_RADIUS_NM, circle_bounds
+
+# (min_lat, min_lon, max_lat, max_lon)
+BBox = Tuple[float, float, float, float]
+
+
+def geometry_bounds(geometry: Dict[str, Any]) -> Optional[BBox]:
+    """
+    Bounding box of a parsed geometry, or None when it has no coordinates.
+
+    Circles get their exact geodesic bounds. Geometries crossing the
+    antimeridian are not split; their box spans the long way round.
+    """
+    geom_type = geometry.get('type')
+    coords = geometry.get('coordinates') or []
+    if not coords:
+        return None
+
+    if geom_type == 'multiline':
+        points = [p for segment in coords for p in segment]
+        if not points:
+            return None
+    elif geom_type == 'circle' and geometry.get('radius_nm'):
+        return circle_bounds(coords[0][0], coords[0][1], geometry['radius_nm'])
+    else:
+        points = coords
+
+    lats = [p[0] for p in points]
+    lons = [p[1] for p in points]
+    return (min(lats), min(lons), max(lats), max(lons))
+
+
+def point_in_polygon(lat: float, lon: float, ring: Sequence[Sequence[float]]) -> bool:
+    """Even-odd ray casting on [lat, lon] vertices."""
+    inside = False
+    n = len(ring)
+    j = n - 1
+    for i in range(n):
+        lat_i, lon_i = ring[i][0], ring[i][1]
+        lat_j, lon_j = ring[j][0], ring[j][1]
+        if (lat_i > lat) != (lat_j > lat):
+            cross = lon_i + (lat - lat_i) * (lon_j - lon_i) / (lat_j - lat_i)
+            if lon < cross:
+                inside = not inside
+        j = i
+    return inside
+
+
+def distance_nm(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Great-circle (haversine) distance in nautical miles."""
+    p1 = math.radians(lat1)
+    p2 = math.radians(lat2)
+    a = (math.sin((p2 - p1) / 2) ** 2
+         + math.cos(p1) * math.cos(p2) * math.sin(math.radians(lon2 - lon1) / 2) ** 2)
+    return 2 * EARTH_RADIUS_NM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def contains_point(geometry: Dict[str, Any], lat: float, lon: float) -> bool:
+    """Exact test for polygons and circles; other types are matched by bounds only."""
+    geom_type = geometry.get('type')
+    coords = geometry.get('coordinates') or []
+    if geom_type == 'polygon' and len(coords) > 2:
+        return point_in_polygon(lat, lon, coords)
+    if geom_type == 'circle' and geometry.get('radius_nm') and coords:
+        return distance_nm(coords[0][0], coords[0][1], lat, lon) <= geometry['radius_nm']
+    return True
+
+
+def _str_pack(boxes: List[BBox], ids: List[int], capacity: int) -> List[List[int]]:
+    """
+    Sort-Tile-Recursive grouping: sort by longitude centre into vertical
+    slices, then by latitude centre within each slice, and cut runs of
+    `capacity` entries. Returns the groups as lists of ids.
+    """
+    count = len(ids)
+    leaves = math.ceil(count / capacity)
+    slices = math.ceil(math.sqrt(leaves))
+    slice_size = slices * capacity
+
+    by_lon = sorted(ids, key=lambda i: boxes[i][1] + boxes[i][3])
+    groups = []
+    for s in range(0, count, slice_size):
+        run = sorted(by_lon[s:s + slice_size], key=lambda i: boxes[i][0] + boxes[i][2])
+        for g in range(0, len(run), capacity):
+            groups.append(run[g:g + capacity])
+    return groups
+
+
+def _union(boxes: List[BBox], ids: List[int]) -> BBox:
+    return (
+        min(boxes[i][0] for i in ids),
+        min(boxes[i][1] for i in ids),
+        max(boxes[i][2] for i in ids),
+        max(boxes[i][3] for i in ids),
+    )
+
+
+class SpatialIndex:
+    """
+    Static R-tree over parsed NOTAMs, bulk-loaded with Sort-Tile-Recursive
+    packing.
+
+    Build it once over a list of NotamParser.parse results (or anything with
+    a "geometry" key) and query by bounding box or point. Queries return
+    positions in that list. NOTAMs without coordinates are not indexed.
+    Rebuild the index when the set of NOTAMs changes.
+    """
+
+    def __init__(self, items: Sequence[Dict[str, Any]], node_capacity: int = 16):
+        self.items = items
+        self.node_capacity = node_capacity
+        # _boxes[0] holds item boxes; each higher level holds node boxes,
+        # with _children[level][node] listing child ids in the level below
+        self._boxes: List[List[BBox]] = []
+        self._children: List[List[List[int]]] = []
+        self._item_ids: List[int] = []
+
+        boxes = []
+        for index, item in enumerate(items):
+            bbox = geometry_bounds(item.get('geometry') or {})
+            if bbox is not None:
+                boxes.append(bbox)
+                self._item_ids.append(index)
+        self._build(boxes)
+
+    def __len__(self) -> int:
+        return len(self._item_ids)
+
+    def _build(self, boxes: List[BBox]):
+        self._boxes.append(boxes)
+        self._children.append([])
+        level = boxes
+        while len(level) > 1:
+            groups = _str_pack(level, list(range(len(level))), self.node_capacity)
+            parents = [_union(level, group) for group in groups]
+            self._boxes.append(parents)
+            self._children.append(groups)
+            level = parents
+
+    def _search(self, min_lat: float, min_lon: float, max_lat: float, max_lon: float) -> List[int]:
+        if not self._item_ids:
+            return []
+        top = len(self._boxes) - 1
+        stack = [(top, i) for i in range(len(self._boxes[top]))]
+        found = []
+        boxes = self._boxes
+        children = self._children
+        while stack:
+            level, node = stack.pop()
+            b = boxes[level][node]
+            if b[0] > max_lat or b[2] < min_lat or b[1] > max_lon or b[3] < min_lon:
+                continue
+            if level == 0:
+                found.append(node)
+            else:
+                stack.extend((level - 1, child) for child in children[level][node])
+        return found
+
+    def query_bbox(self, min_lat: float, min_lon: float, max_lat: float, max_lon: float) -> List[int]:
+        """Positions of items whose bounds intersect the box, in input order."""
+        return sorted(self._item_ids[i] for i in self._search(min_lat, min_lon, max_lat, max_lon))
+
+    def query_point(self, lat: float, lon: float, exact: bool = True) -> List[int]:
+        """
+        Positions of items covering the point, in input order. With exact,
+        polygon and circle candidates are checked against their real shape
+        rather than just their bounds.
+        """
+        candidates = sorted(self._item_ids[i] for i in self._search(lat, lon, lat, lon))
+        if not exact:
+            return candidates
+        return [i for i in candidates if contains_point(self.items[i].get('geometry') or {}, lat, lon)]
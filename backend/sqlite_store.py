@@ -0,0 +1,271 @@
+# SQLite-backed NOTAM store
+# Same interface as notam_store.NotamStore (apply, apply_all, query,
+# changes_since, ...), but the active NOTAMs live in a SQLite file instead
+# of memory, so they survive restarts and can outgrow RAM. main.py uses it
+# when NOTAM_STORE_PATH is set.
+#
+# Every NOTAM is one row holding its parse result as JSON, a content hash,
+# and the columns queries filter on: FIR, Q-code subject and validity
+# window, each indexed. Bounding boxes live in an R*Tree virtual table
+# keyed on the row id. Ingest reads the stored hashes for a whole batch in
+# one query, so NOTAMs that are resent unchanged cost no writes, and the
+# rest are written with executemany in a single transaction.
+
+import hashlib
+import json
+import sqlite3
+import threading
+from typing import List, Dict, Any, Iterable, Optional, Sequence, Tuple
+
+from notam_store import CHANGE_LOG_SIZE, notam_key
+from results import dumps, q_line_value
+from spatial_index import BBox, geometry_bounds
+from temporal_index import validity_interval
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS notams (
+    rowid INTEGER PRIMARY KEY,
+    id TEXT NOT NULL UNIQUE,
+    hash BLOB NOT NULL,
+    fir TEXT,
+    subject TEXT,
+    valid_from REAL,
+    valid_to REAL,
+    result TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS notams_fir ON notams(fir);
+CREATE INDEX IF NOT EXISTS notams_subject ON notams(subject);
+CREATE INDEX IF NOT EXISTS notams_validity ON notams(valid_from, valid_to);
+CREATE VIRTUAL TABLE IF NOT EXISTS notam_boxes USING rtree(id, min_lat, max_lat, min_lon, max_lon);
+CREATE TABLE IF NOT EXISTS changes (version INTEGER PRIMARY KEY, id TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value);
+"""
+
+UPSERT = """
+INSERT INTO notams (id, hash, fir, subject, valid_from, valid_to, result) VALUES (?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT(id) DO UPDATE SET hash = excluded.hash, fir = excluded.fir, subject = excluded.subject,
+    valid_from = excluded.valid_from, valid_to = excluded.valid_to, result = excluded.result
+"""
+
+# SQLite's default limit on host parameters is 999 in older builds
+IN_CHUNK = 500
+
+
+def content_hash(encoded: str) -> bytes:
+    return hashlib.blake2b(encoded.encode('utf-8'), digest_size=16).digest()
+
+
+def _row(notam_id: str, notam: Dict[str, Any]) -> Tuple[Tuple[Any, ...], Optional[BBox]]:
+    """(notams row, bounding box) for a parse result."""
+    encoded = dumps(notam)
+    interval = validity_interval(notam)
+    geometry = notam.get('geometry')
+    row = (
+        notam_id, content_hash(encoded), q_line_value(notam, 'fir'), q_line_value(notam, 'subject'),
+        interval[0] if interval else None, interval[1] if interval else None, encoded,
+    )
+    return row, geometry_bounds(geometry) if geometry else None
+
+
+class SqliteNotamStore:
+    """
+    NotamStore persisted in a SQLite database (WAL mode).
+
+    Queries are answered from the database rather than from memory; results
+    are the stored parse results as plain dicts. The store version and the
+    change log are persisted too, so clients polling changes_since keep
+    working across restarts.
+    """
+
+    def __init__(self, path: str, log_size: int = CHANGE_LOG_SIZE):
+        self.path = path
+        self.log_size = log_size
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(SCHEMA)
+        row = self._db.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()
+        self.version = row[0] if row else 0
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+    def __len__(self):
+        with self._lock:
+            return self._db.execute("SELECT count(*) FROM notams").fetchone()[0]
+
+    def __contains__(self, notam_id):
+        with self._lock:
+            return self._db.execute("SELECT 1 FROM notams WHERE id = ?", (notam_id,)).fetchone() is not None
+
+    def get(self, notam_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._db.execute("SELECT result FROM notams WHERE id = ?", (notam_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def _hashes(self, ids: Sequence[str]) -> Dict[str, bytes]:
+        # Caller holds the lock
+        found = {}
+        for i in range(0, len(ids), IN_CHUNK):
+            chunk = ids[i:i + IN_CHUNK]
+            query = f"SELECT id, hash FROM notams WHERE id IN ({','.join('?' * len(chunk))})"
+            found.update(self._db.execute(query, chunk))
+        return found
+
+    def apply(self, notam: Dict[str, Any]) -> int:
+        """
+        Apply one parse result. Returns the number of changes it caused (0
+        when the NOTAM is already known with the same content).
+        Raises ValueError if the NOTAM has no ID to key it on.
+        """
+        notam_key(notam)
+        return self.apply_all([notam])["changes"]
+
+    def apply_all(self, notams: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Apply parse results in order; returns {"version", "changes", "errors"}.
+        The whole batch is written in one transaction.
+        """
+        keyed = []
+        errors = []
+        for index, notam in enumerate(notams):
+            try:
+                key = notam_key(notam)
+                # Serialized and hashed outside the lock
+                keyed.append((key, _row(key[0], notam) if key[1] != 'C' else None))
+            except ValueError as e:
+                errors.append({"index": index, "raw_text": notam.get('raw_text', ''), "error": str(e)})
+
+        with self._lock:
+            ids = list({i for (notam_id, _, ref), _ in keyed for i in (notam_id, ref) if i is not None})
+            # Hash of every touched NOTAM as the batch goes (None: not stored)
+            state: Dict[str, Optional[bytes]] = dict.fromkeys(ids)
+            state.update(self._hashes(ids))
+            rows: Dict[str, Tuple[Tuple[Any, ...], Optional[BBox]]] = {}
+            removed = set()
+            log = []
+
+            def delete(notam_id):
+                if notam_id is None or state.get(notam_id) is None:
+                    return 0
+                state[notam_id] = None
+                rows.pop(notam_id, None)
+                removed.add(notam_id)
+                log.append(notam_id)
+                return 1
+
+            changes = 0
+            for (notam_id, kind, ref), row in keyed:
+                if kind == 'C':
+                    changes += delete(ref)
+                    continue
+                if kind == 'R' and ref != notam_id:
+                    changes += delete(ref)
+                if state[notam_id] == row[0][1]:
+                    continue
+                state[notam_id] = row[0][1]
+                rows[notam_id] = row
+                log.append(notam_id)
+                changes += 1
+
+            if log:
+                self._write(rows, removed, log)
+            return {"version": self.version, "changes": changes, "errors": errors}
+
+    def _write(self, rows: Dict[str, Tuple[Tuple[Any, ...], Optional[BBox]]], removed: Iterable[str], log: List[str]):
+        # Caller holds the lock
+        db = self._db
+        first = self.version + 1
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            touched = [(notam_id,) for notam_id in set(rows).union(removed)]
+            db.executemany("DELETE FROM notam_boxes WHERE id = (SELECT rowid FROM notams WHERE id = ?)", touched)
+            # Deleted and re-added within the batch: a new row id, so the
+            # NOTAM moves to the end like it does in the in-memory store
+            db.executemany("DELETE FROM notams WHERE id = ?", [(notam_id,) for notam_id in removed])
+            db.executemany(UPSERT, [row for row, _ in rows.values()])
+            db.executemany(
+                "INSERT INTO notam_boxes SELECT rowid, ?, ?, ?, ? FROM notams WHERE id = ?",
+                [(box[0], box[2], box[1], box[3], notam_id) for notam_id, (_, box) in rows.items() if box],
+            )
+            db.executemany("INSERT INTO changes (version, id) VALUES (?, ?)",
+                           [(first + i, notam_id) for i, notam_id in enumerate(log)])
+            version = first + len(log) - 1
+            db.execute("DELETE FROM changes WHERE version <= ?", (version - self.log_size,))
+            db.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('version', ?)", (version,))
+            db.execute("COMMIT")
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+        self.version = version
+
+    def all(self) -> List[Dict[str, Any]]:
+        return self.query()
+
+    def changes_since(self, version: int) -> Dict[str, Any]:
+        """
+        Delta for a client that last saw `version`:
+        {"version", "reset", "upserts": [notam, ...], "deletes": [id, ...]}.
+        See NotamStore.changes_since.
+        """
+        with self._lock:
+            db = self._db
+            oldest = db.execute("SELECT min(version) FROM changes").fetchone()[0] or self.version + 1
+            if version > self.version or version < oldest - 1:
+                upserts = [json.loads(r) for r, in db.execute("SELECT result FROM notams ORDER BY rowid")]
+                return {"version": self.version, "reset": True, "upserts": upserts, "deletes": []}
+
+            rows = db.execute(
+                "SELECT c.id, n.result FROM changes c LEFT JOIN notams n ON n.id = c.id "
+                "WHERE c.version > ? GROUP BY c.id ORDER BY max(c.version)", (version,)
+            ).fetchall()
+            return {
+                "version": self.version,
+                "reset": False,
+                "upserts": [json.loads(result) for _, result in rows if result is not None],
+                "deletes": [notam_id for notam_id, result in rows if result is None],
+            }
+
+    def query(self, bbox: Optional[BBox] = None, active: Optional[Tuple[float, float]] = None,
+              subjects: Optional[Iterable[str]] = None, fir: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        NOTAMs whose geometry intersects bbox (min_lat, min_lon, max_lat,
+        max_lon), whose validity overlaps active (t1, t2, epoch seconds),
+        whose Q-code subject is one of subjects and/or whose Q-line FIR is
+        fir (see NotamStore.query), in the order they were first stored.
+        """
+        sql = "SELECT n.result FROM notams n"
+        where = []
+        params: List[Any] = []
+        if bbox is not None:
+            sql += " JOIN notam_boxes b ON b.id = n.rowid"
+            where.append("b.min_lat <= ? AND b.max_lat >= ? AND b.min_lon <= ? AND b.max_lon >= ?")
+            params += [bbox[2], bbox[0], bbox[3], bbox[1]]
+        if active is not None:
+            where.append("n.valid_from <= ? AND n.valid_to >= ?")
+            params += [active[1], active[0]]
+        if subjects is not None:
+            wanted = sorted({subject.upper() for subject in subjects})
+            if not wanted:
+                return []
+            where.append(f"n.subject IN ({','.join('?' * len(wanted))})")
+            params += wanted
+        if fir is not None:
+            where.append("n.fir = ?")
+            params.append(fir.upper())
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY n.rowid"
+        with self._lock:
+            results = [r for r, in self._db.execute(sql, params)]
+        return [json.loads(result) for result in results]
+
+    def query_bbox(self, min_lat: float, min_lon: float, max_lat: float, max_lon: float) -> List[Dict[str, Any]]:
+        """NOTAMs whose geometry intersects the box."""
+        return self.query(bbox=(min_lat, min_lon, max_lat, max_lon))
+
+    def query_time(self, t1: float, t2: Optional[float] = None) -> List[Dict[str, Any]]:
+        """NOTAMs valid at any time between t1 and t2 (epoch seconds; t2 defaults to t1)."""
+        return self.query(active=(t1, t1 if t2 is None else t2))
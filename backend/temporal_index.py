@@ -0,0 +1,88 @@
+import math
+from bisect import bisect_right
+from typing import List, Dict, Any, Optional, Sequence, Tuple
+
+# (start, end) in epoch seconds; open ends are -inf / +inf
+Interval = Tuple[float, float]
+
+
+def validity_interval(notam: Dict[str, Any]) -> Optional[Interval]:
+    """
+    (start, end) of a parse result's validity. A missing start is treated as
+    "always was" and a missing or PERM end as "never ends"; None when the
+    NOTAM has no validity at all.
+    """
+    validity = notam.get('validity') or {}
+    start = validity.get('start')
+    end = validity.get('end')
+    if start is None and end is None and not validity.get('permanent'):
+        return None
+    return (
+        -math.inf if start is None else start,
+        math.inf if end is None else end,
+    )
+
+
+class TemporalIndex:
+    """
+    Static index over validity windows answering "which NOTAMs are active
+    at some point between t1 and t2".
+
+    Intervals are sorted by start, and a max-heap-shaped tree stores the
+    latest end under every node. A query bisects to the intervals that
+    start by t2, then walks only the subtrees whose latest end reaches t1,
+    so it costs O(log n + k) for k matches. NOTAMs without validity are not
+    indexed. Rebuild the index when the set of NOTAMs changes.
+    """
+
+    def __init__(self, items: Sequence[Dict[str, Any]]):
+        intervals = []
+        for position, item in enumerate(items):
+            interval = validity_interval(item)
+            if interval is not None:
+                intervals.append((interval[0], interval[1], position))
+        intervals.sort()
+
+        self._starts = [i[0] for i in intervals]
+        self._ends = [i[1] for i in intervals]
+        self._positions = [i[2] for i in intervals]
+
+        # Leaves at [size, size + n); node k covers its children 2k and 2k + 1
+        size = 1
+        while size < len(intervals):
+            size *= 2
+        self._size = size
+        max_end = [-math.inf] * (2 * size)
+        max_end[size:size + len(intervals)] = self._ends
+        for node in range(size - 1, 0, -1):
+            max_end[node] = max(max_end[2 * node], max_end[2 * node + 1])
+        self._max_end = max_end
+
+    def __len__(self) -> int:
+        return len(self._positions)
+
+    def query(self, t1: float, t2: Optional[float] = None) -> List[int]:
+        """Positions (in input order) of items valid at any time in [t1, t2]; t2 defaults to t1."""
+        if t2 is None:
+            t2 = t1
+        count = bisect_right(self._starts, t2)
+        if count == 0:
+            return []
+
+        size = self._size
+        max_end = self._max_end
+        found = []
+        # (node, first leaf, leaf count) for nodes overlapping leaves [0, count)
+        stack = [(1, 0, size)]
+        while stack:
+            node, first, width = stack.pop()
+            if first >= count or max_end[node] < t1:
+                continue
+            if width == 1:
+                found.append(self._positions[first])
+                continue
+            half = width // 2
+            stack.append((2 * node + 1, first + half, half))
+            stack.append((2 * node, first, half))
+        found.sort()
+        return found
@@ -0,0 +1,88 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from admission import Admission, Overloaded
+
+
+def test_run_and_overload():
+    async def scenario():
+        admission = Admission(limit=1, queue=1, timeout=None)
+        assert await admission.run(sum, [1, 2, 3]) == 6
+        with pytest.raises(ZeroDivisionError):
+            await admission.run(lambda: 1 / 0)
+
+        release = threading.Event()
+        running = asyncio.ensure_future(admission.run(release.wait))
+        queued = asyncio.ensure_future(admission.run(lambda: "queued"))
+        await asyncio.sleep(0.05)
+        with pytest.raises(Overloaded) as excinfo:
+            await admission.run(lambda: "rejected")
+        assert excinfo.value.status_code == 429
+        release.set()
+        assert await queued == "queued"
+        await running
+        return admission
+
+    admission = asyncio.run(scenario())
+    assert admission.active == 0 and admission.rejected == 1
+
+
+def test_queued_too_long():
+    async def scenario():
+        admission = Admission(limit=1, queue=5, timeout=0.05)
+        slow = asyncio.ensure_future(admission.run(time.sleep, 0.2))
+        await asyncio.sleep(0.01)
+        with pytest.raises(Overloaded) as excinfo:
+            await admission.run(lambda: "late")
+        await slow
+        return admission, excinfo.value
+
+    admission, error = asyncio.run(scenario())
+    assert error.status_code == 503
+    assert admission.timeouts == 1 and admission.active == 0
+
+
+def test_stream_batches_and_releases():
+    closed = []
+
+    def lines():
+        try:
+            for i in range(200):
+                yield f"{i}\n"
+        finally:
+            closed.append(True)
+
+    async def scenario():
+        admission = Admission(limit=1, queue=0)
+        stream = await admission.stream(lines())
+        assert admission.active == 1
+        with pytest.raises(Overloaded):
+            await admission.stream(iter(["x"]))
+        text = "".join([chunk async for chunk in stream])
+        return admission, text
+
+    admission, text = asyncio.run(scenario())
+    assert text == "".join(f"{i}\n" for i in range(200))
+    assert admission.active == 0 and closed == [True]
+
+
+def test_http_limits(monkeypatch):
+    from fastapi.testclient import TestClient
+    import main
+    client = TestClient(main.app)
+
+    big = {"text": "A" * (11 * 1024 * 1024)}
+    assert client.post("/api/parse", json=big).status_code == 413
+
+    monkeypatch.setattr(main, "cpu", Admission(limit=1, queue=0))
+    main.cpu._active = 1
+    response = client.post("/api/parse", json={"text": "A0001/24 NOTAMN E) TEST"})
+    assert response.status_code == 429 and response.headers["Retry-After"] == "1"
+    assert client.post("/api/parse/stream", json={"text": "A0001/24 NOTAMN E) TEST"}).status_code == 429
+    assert client.get("/api/tiles/0/0/0.mvt").status_code == 429
+    main.cpu._active = 0
+    assert client.post("/api/parse/stream", json={"text": "A0001/24 NOTAMN E) TEST"}).status_code == 200
+    assert client.get("/").status_code == 200
@@ -0,0 +1,130 @@
+import json
+import os
+from batch import split_notams, parse_batch, parse_feed, parse_batch_parallel, shutdown_pool, iter_feed_ndjson
+
+SAMPLE_PATH = os.path.join(os.path.dirname(__file__), "..", "sample_notams.txt")
+
+
+def load_sample():
+    with open(SAMPLE_PATH) as f:
+        return f.read()
+
+
+def test_split_on_headers():
+    entries = split_notams(load_sample())
+    assert len(entries) == 2
+    assert entries[0].startswith("A0123/23 NOTAMN")
+    assert entries[1].startswith("A0456/23 NOTAMN")
+
+
+def test_split_replace_and_cancel_headers():
+    text = "A0124/23 NOTAMR A0100/23\nE) ONE\n(A0125/23 NOTAMC A0099/23\nE) TWO"
+    entries = split_notams(text)
+    assert len(entries) == 2
+    assert entries[1].startswith("(A0125/23 NOTAMC")
+
+
+def test_split_on_q_lines_without_headers():
+    text = "Q) OMMM/QRTCA/IV/BO/W/000/040/2515N05522E005\nE) ONE\nQ) OMMM/QWULW/IV/BO/W/000/005/2500N05530E002\nE) TWO"
+    assert len(split_notams(text)) == 2
+
+
+def test_split_without_headers_keeps_text():
+    text = "TFR AREA DEFINED AS 45.5N 90.5W TO 46.5N 91.5W TO 46.0N 92.0W"
+    assert split_notams(text) == [text]
+    assert split_notams("   \n ") == []
+
+
+def test_parse_feed_one_result_per_notam():
+    out = parse_feed(load_sample())
+    assert out["errors"] == []
+    types = [r["geometry"]["type"] for r in out["results"]]
+    assert types == ["polygon", "circle"]
+    assert out["results"][0]["ids"] == ["A0123/23"]
+
+
+def test_parse_batch_reports_errors_per_item():
+    class FlakyParser:
+        def parse(self, text):
+            if "BAD" in text:
+                raise ValueError("boom")
+            return {"raw_text": text}
+
+    out = parse_batch(["GOOD", "BAD", "GOOD AGAIN"], FlakyParser())
+    assert [r["raw_text"] for r in out["results"]] == ["GOOD", "GOOD AGAIN"]
+    assert out["errors"] == [{"index": 1, "raw_text": "BAD", "error": "boom"}]
+
+
+def test_parse_batch_parallel_keeps_order():
+    texts = split_notams(load_sample()) * 5
+    try:
+        out = parse_batch_parallel(texts, workers=2, chunk_size=3, threshold=0)
+    finally:
+        shutdown_pool()
+    assert out == parse_batch(texts)
+
+
+def test_pool_follows_data_changes():
+    import waypoint_db
+    from parse_cache import ParseCache
+    from waypoint_db import WaypointStore
+    text = (
+        "A0001/24 NOTAMN\n"
+        "Q) YBBB/QARLC/IV/NBO/E/000/999/1000N02000E050\n"
+        "E) ATS RTE SEGMENT CLOSED: A123 ZULUA - ZULUB"
+    )
+    cache = ParseCache()
+
+    def route(y):
+        waypoint_db.set_store(WaypointStore.from_rows([("ZULUA", y, 20.0), ("ZULUB", 11.0, 21.0)]))
+        out = parse_batch_parallel([text] * 4, workers=2, chunk_size=1, threshold=0, cache=cache)
+        assert out["errors"] == []
+        return {tuple(r["geometry"]["coordinates"][0][0]) for r in out["results"]}
+
+    try:
+        assert route(10.0) == {(10.0, 20.0)}
+        # Warm workers are replaced, and the cache is not fed old results
+        assert route(12.0) == {(12.0, 20.0)}
+        assert cache.parse(text)["geometry"]["coordinates"][0][0] == [12.0, 20.0]
+    finally:
+        shutdown_pool()
+        waypoint_db.set_store(None)
+
+
+def test_cached_outcomes_skip_stale_results():
+    from batch import iter_outcomes_cached
+    from parse_cache import ParseCache, data_version
+    cache = ParseCache()
+    stale = data_version()[:-1] + (-1,)
+
+    def run(texts):
+        for text in texts:
+            yield (stale if "OLD" in text else data_version()), True, {"raw_text": text}
+
+    outcomes = list(iter_outcomes_cached(["OLD DATA", "NEW DATA"], cache, run))
+    assert [item["raw_text"] for _, item in outcomes] == ["OLD DATA", "NEW DATA"]
+    assert cache.get("OLD DATA") is None
+    assert cache.get("NEW DATA") == {"raw_text": "NEW DATA"}
+
+
+def test_iter_feed_ndjson_one_line_per_notam():
+    lines = list(iter_feed_ndjson(load_sample()))
+    assert len(lines) == 2
+    assert all(line.endswith("\n") for line in lines)
+    assert [json.loads(line)["ids"] for line in lines] == [["A0123/23"], ["A0456/23"]]
+
+
+def test_parse_feed_fields():
+    out = parse_feed(load_sample(), fields=["ids"])
+    assert [set(r) for r in out["results"]] == [{"raw_text", "ids"}] * 2
+    lines = [json.loads(line) for line in iter_feed_ndjson(load_sample(), parallel=True, fields=["ids"])]
+    assert [set(r) for r in lines] == [{"raw_text", "ids"}] * 2
+
+
+def test_http_fields():
+    from fastapi.testclient import TestClient
+    import main
+    client = TestClient(main.app)
+    out = client.post("/api/parse", json={"text": load_sample(), "batch": True, "fields": ["ids", "validity"]}).json()
+    assert [sorted(r) for r in out["results"]] == [["ids", "raw_text", "validity"]] * 2
+    assert client.post("/api/parse", json={"text": load_sample(), "fields": ["nope"]}).status_code == 400
@@ -0,0 +1,144 @@
+import json
+import math
+import os
+import pickle
+
+import pytest
+
+import fir_data
+from fir_data import FirStore, LOD_TOLERANCES, get_fir_boundary, set_store, with_tolerance
+from parser_universal import NotamParser
+from simplify import simplify_ring
+
+
+def wobbly_ring(lat, lon, radius, n=2000):
+    """GeoJSON ring ([lon, lat]) with a lot of small-scale detail."""
+    ring = []
+    for i in range(n):
+        a = 2 * math.pi * i / n
+        r = radius * (1 + 0.002 * math.sin(40 * a))
+        ring.append([lon + r * math.cos(a), lat + r * math.sin(a)])
+    ring.append(ring[0])
+    return ring
+
+
+def write_firs(tmp_path):
+    features = [
+        {"type": "Feature", "properties": {"ICAOCODE": "OMAE"},
+         "geometry": {"type": "Polygon", "coordinates": [wobbly_ring(24.0, 54.0, 2.0)]}},
+        {"type": "Feature", "properties": {"ICAOCODE": "OPKR"},
+         "geometry": {"type": "MultiPolygon", "coordinates": [
+             [wobbly_ring(25.0, 60.0, 0.1, 50)], [wobbly_ring(26.0, 67.0, 3.0, 200)]]}},
+        {"type": "Feature", "properties": {"name": "NO CODE"},
+         "geometry": {"type": "Polygon", "coordinates": [wobbly_ring(0.0, 0.0, 1.0, 10)]}},
+    ]
+    path = tmp_path / "firs.geojson"
+    path.write_text(json.dumps({"type": "FeatureCollection", "features": features}))
+    return str(path)
+
+
+def test_levels_of_detail(tmp_path):
+    store = FirStore.from_geojson(write_firs(tmp_path))
+    assert store.codes() == ["OMAE", "OPKR"]
+    sizes = [len(store.boundary("OMAE", t)) for t in LOD_TOLERANCES]
+    assert sizes[0] == 2001
+    assert sizes == sorted(sizes, reverse=True) and sizes[-1] < 200
+    ring = store.boundary("omae", 1.0)
+    assert ring[0] == ring[-1]
+    # Every level is simplified from the published ring, not the level before
+    base = store.boundary("OMAE")
+    for tolerance in LOD_TOLERANCES:
+        assert store.boundary("OMAE", tolerance) == simplify_ring(base, tolerance)
+    # Largest part of a MultiPolygon, converted to [lat, lon]
+    assert abs(store.boundary("OPKR")[0][0] - 26.0) < 0.01
+    assert store.boundary("XXXX") is None
+
+
+def test_binary_cache_is_reused(tmp_path):
+    path = write_firs(tmp_path)
+    store = FirStore.open(path)
+    cache = os.path.splitext(path)[0] + ".bin"
+    assert os.path.exists(cache)
+    cached = FirStore.from_cache(cache)
+    assert cached.codes() == store.codes()
+    for tolerance in LOD_TOLERANCES:
+        assert cached.boundary("OPKR", tolerance) == store.boundary("OPKR", tolerance)
+
+    # Anything else under the cache's name is ignored, not loaded
+    with open(cache, "wb") as f:
+        f.write(pickle.dumps({"format": 1, "boundaries": {}}))
+    with pytest.raises(ValueError):
+        FirStore.from_cache(cache)
+    assert FirStore.open(path).codes() == ["OMAE", "OPKR"]
+    with open(cache, "r+b") as f:
+        f.truncate(os.path.getsize(cache) - 8)
+    with pytest.raises(ValueError):
+        FirStore.from_cache(cache)
+
+
+def test_prebuilt_snapshots(tmp_path, monkeypatch):
+    import build_snapshots
+    from waypoint_db import WaypointStore
+    path = write_firs(tmp_path)
+    csv_path = tmp_path / "nav.csv"
+    csv_path.write_text("ALPHA,10.0,20.0\n")
+    build_snapshots.main(["--firs", path, "--waypoints", str(csv_path)])
+    os.remove(path)
+    os.remove(csv_path)
+
+    # Deployed without the sources: the snapshots are opened directly
+    monkeypatch.setenv("NOTAM_FIRS", str(tmp_path / "firs.bin"))
+    set_store(None)
+    try:
+        assert fir_data.get_store().codes() == ["OMAE", "OPKR"]
+    finally:
+        set_store(None)
+    store = WaypointStore.open(str(tmp_path / "nav.bin"))
+    try:
+        assert store.lookup("ALPHA") == [10.0, 20.0]
+    finally:
+        store.close()
+
+
+def test_fir_wide_notam_uses_boundary(tmp_path):
+    text = "A0001/24 NOTAMN\nQ) OMAE/QRTCA/IV/BO/W/000/999/2400N05400E999\nE) RESTRICTED AREA"
+    set_store(FirStore.open(write_firs(tmp_path)))
+    try:
+        result = NotamParser().parse(text)
+        assert result["geometry"]["type"] == "polygon"
+        assert result["geometry"]["fir"] == "OMAE"
+        assert len(result["geometry"]["coordinates"]) == 2001
+
+        # The FIR comes from the decoded Q-line; a malformed Q-line still names it
+        parser = NotamParser()
+        parser.extract_issuing_fir = None
+        assert parser.parse(text)["geometry"]["fir"] == "OMAE"
+        assert NotamParser().parse("A0003/24 NOTAMN\nQ) OMAE/QRTCA/IV\nE) FIR CLSD")["geometry"]["fir"] == "OMAE"
+
+        coarse = with_tolerance(result, 0.1)
+        assert coarse["geometry"]["coordinates"] == get_fir_boundary("OMAE", 0.1)
+        assert len(result["geometry"]["coordinates"]) == 2001
+        assert with_tolerance(result, None) is result
+    finally:
+        set_store(None)
+
+
+def test_fir_subject_skips_area_coordinates(tmp_path):
+    text = ("A0002/24 NOTAMN\nQ) OMAE/QAFXX/IV/NBO/E/000/999/2400N05400E999\n"
+            "E) FIR SERVICES LTD WI 251600N 0552000E - 251400N 0552400E - 251200N 0552000E")
+
+    class Counting(NotamParser):
+        calls = 0
+
+        def extract_coordinates(self, text):
+            Counting.calls += 1
+            return super().extract_coordinates(text)
+
+    set_store(FirStore.open(write_firs(tmp_path)))
+    try:
+        geometry = Counting().parse(text)["geometry"]
+        assert geometry["fir"] == "OMAE" and Counting.calls == 0
+        area = Counting().parse(text.replace("QAFXX", "QRTCA"))["geometry"]
+        assert area["type"] == "polygon" and "fir" not in area and Counting.calls == 1
+    finally:
+        set_store(None)
@@ -0,0 +1,49 @@
+import json
+from geometry import circle_polygon, circle_polygons, circle_bounds, circle_vertex_count, tessellate
+from geojson_export import generate_geojson
+from spatial_index import distance_nm
+from batch import parse_feed
+from test_batch import load_sample
+
+
+def test_vertices_are_on_the_geodesic_circle():
+    for lat, lon, radius in [(25.0, 55.0, 5.0), (65.0, -20.0, 100.0), (-33.9, 151.2, 0.5)]:
+        ring = circle_polygon(lat, lon, radius)
+        assert ring[0] == ring[-1]
+        for p in ring:
+            assert abs(distance_nm(lat, lon, p[0], p[1]) - radius) < 1e-6
+
+
+def test_vertex_count_adapts_to_radius_and_tolerance():
+    assert circle_vertex_count(0.5) < circle_vertex_count(5) < circle_vertex_count(100)
+    assert circle_vertex_count(100, tolerance_nm=1.0) < circle_vertex_count(100)
+    assert circle_vertex_count(100) % 8 == 0
+
+
+def test_batch_matches_single_and_keeps_order():
+    circles = [(10.0, 20.0, 50.0), (0.0, 179.9, 30.0), (10.0, 20.0, 2.0)]
+    rings = circle_polygons(circles)
+    assert rings == [circle_polygon(*c) for c in circles]
+    # Longitudes wrap at the antimeridian
+    assert all(-180.0 <= p[1] < 180.0 for p in rings[1])
+
+
+def test_bounds_contain_ring():
+    lat, lon, radius = 60.0, 10.0, 120.0
+    min_lat, min_lon, max_lat, max_lon = circle_bounds(lat, lon, radius)
+    for p in circle_polygon(lat, lon, radius, tolerance_nm=0.001):
+        assert min_lat - 1e-9 <= p[0] <= max_lat + 1e-9
+        assert min_lon - 1e-9 <= p[1] <= max_lon + 1e-9
+    assert circle_bounds(89.0, 0.0, 120.0)[1:4:2] == (-180.0, 180.0)
+
+
+def test_geojson_export():
+    notams = parse_feed(load_sample())["results"]
+    collection = json.loads(generate_geojson(notams))
+    polygon, circle = collection["features"]
+    assert polygon["geometry"]["type"] == "Polygon"
+    first = notams[0]["geometry"]["coordinates"][0]
+    assert polygon["geometry"]["coordinates"][0][0] == [first[1], first[0]]
+    assert circle["geometry"]["coordinates"][0] == [[p[1], p[0]] for p in tessellate(notams)[1]]
+    assert circle["properties"]["ids"] == ["A0456/23"]
+    assert json.loads(generate_geojson([])) == {"type": "FeatureCollection", "features": []}
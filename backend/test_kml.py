@@ -0,0 +1,66 @@
+import json
+import xml.etree.ElementTree as ET
+from kml import generate_kml, iter_kml
+from geometry import circle_vertex_count
+from parser_universal import default_parser
+from batch import parse_feed
+from test_batch import load_sample
+
+NS = {"kml": "http://www.opengis.net/kml/2.2"}
+
+
+def test_kml_is_well_formed_with_one_placemark_per_notam():
+    notams = parse_feed(load_sample())["results"]
+    root = ET.fromstring(generate_kml(notams))
+    placemarks = root.findall(".//kml:Placemark", NS)
+    assert [p.find("kml:name", NS).text for p in placemarks] == ["A0123/23", "A0456/23"]
+    # Polygon closes on itself; circle is tessellated into a closed ring
+    rings = [p.find(".//kml:coordinates", NS).text.split() for p in placemarks]
+    assert rings[0][0] == rings[0][-1]
+    assert rings[1][0] == rings[1][-1]
+    assert len(rings[1]) == circle_vertex_count(notams[1]["geometry"]["radius_nm"]) + 1
+
+
+def test_kml_escapes_text():
+    # Parse results are read-only; override the description on a copy
+    notam = dict(default_parser.parse("A0001/24 NOTAMN E) R&D <TEST> AREA ]]> 251600N 0552000E"),
+                 description="R&D <TEST> ]]> AREA")
+    root = ET.fromstring(generate_kml([notam]))
+    data = {d.get("name"): d.find("kml:value", NS).text for d in root.iter("{http://www.opengis.net/kml/2.2}Data")}
+    assert data["Description"] == "R&D <TEST> ]]> AREA"
+    assert "&lt;TEST&gt;" in root.find(".//kml:Placemark/kml:description", NS).text.replace("\n", "")
+
+
+def test_iter_kml_streams_one_chunk_per_placemark():
+    notams = parse_feed(load_sample())["results"] * 3
+    chunks = list(iter_kml(notams))
+    assert len(chunks) == len(notams) + 2
+    assert all("<Placemark>" in chunk for chunk in chunks[1:-1])
+    ET.fromstring("".join(chunks))
+
+
+def test_kml_time_span_from_validity():
+    notams = parse_feed(load_sample())["results"]
+    root = ET.fromstring(generate_kml(notams))
+    span = root.find(".//kml:Placemark/kml:TimeSpan", NS)
+    assert span.find("kml:begin", NS).text == "2023-11-23T06:00:00Z"
+    assert span.find("kml:end", NS).text == "2023-11-23T10:00:00Z"
+
+
+def test_http_export_validates_coordinates():
+    from fastapi.testclient import TestClient
+    import main
+    from results import dumps
+    client = TestClient(main.app)
+    good = json.loads(dumps(parse_feed(load_sample())["results"][0]))
+    notams = [good, {"geometry": {"type": "point", "coordinates": [["12.5", 45]]}}]
+    response = client.post("/api/export/kml", json={"notams": notams})
+    assert response.status_code == 200
+    root = ET.fromstring(response.text)
+    assert len(root.findall(".//kml:Placemark", NS)) == 2
+    assert root.find(".//kml:TimeSpan", NS) is not None
+
+    for geometry in ({"type": "polygon", "coordinates": [["north", 45]]}, {"type": "point", "coordinates": [[1]]}):
+        bad = {"notams": notams + [{"ids": ["A0001/24"], "geometry": geometry}]}
+        assert client.post("/api/export/kml", json=bad).status_code == 422
+        assert client.post("/api/export/geojson", json=bad).status_code == 422
@@ -0,0 +1,55 @@
+import pytest
+
+import metrics
+from metrics import Registry, InstrumentedNotamParser, timed_stream
+
+CIRCLE = "A0100/23 NOTAMN\nQ) OMMM/QRTCA/IV/BO/W/000/040/2515N05522E005\nE) TEMPO RESTRICTED AREA"
+
+
+def test_histogram_and_counter_render():
+    registry = Registry()
+    hist = registry.histogram("test_seconds", "Test timings.", ("stage",), buckets=(0.1, 1.0))
+    count = registry.counter("test_total", "Test count.", ("kind",))
+    registry.gauge("test_size", "Test size.", lambda: 3)
+    hist.observe(0.05, "a")
+    hist.observe(0.5, "a")
+    hist.observe(5, "a")
+    count.inc('say "hi"')
+    count.inc('say "hi"', value=2)
+
+    text = registry.render()
+    assert '# TYPE test_seconds histogram' in text
+    assert 'test_seconds_bucket{stage="a",le="0.1"} 1' in text
+    assert 'test_seconds_bucket{stage="a",le="1"} 2' in text
+    assert 'test_seconds_bucket{stage="a",le="+Inf"} 3' in text
+    assert 'test_seconds_count{stage="a"} 3' in text
+    assert 'test_total{kind="say \\"hi\\""} 3' in text
+    assert 'test_size 3' in text
+    with pytest.raises(ValueError):
+        registry.counter("test_total", "Again.")
+
+
+def test_instrumented_parser_records_stages():
+    stage = metrics.PARSE_STAGE_SECONDS.labels("extract_coordinates")
+    before_stage = stage.count
+    before_circles = metrics.PARSE_TOTAL.value("circle")
+    result = InstrumentedNotamParser().parse(CIRCLE)
+    assert result["geometry"]["type"] == "circle"
+    assert stage.count == before_stage + 1
+    assert metrics.PARSE_TOTAL.value("circle") == before_circles + 1
+    assert 'notam_parse_stage_seconds_count{stage="parse_q_line"}' in metrics.REGISTRY.render()
+
+
+def test_timed_stream():
+    series = metrics.EXPORT_BYTES.labels("test")
+    assert "".join(timed_stream(iter(["<a>", "é</a>"]), "test")) == "<a>é</a>"
+    assert series.count == 1 and series.sum == 9
+
+
+def test_http_metrics():
+    from fastapi.testclient import TestClient
+    import main
+    response = TestClient(main.app).get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert "notam_parse_cache_hits_total" in response.text
@@ -0,0 +1,30 @@
+import pytest
+
+import fir_data
+import waypoint_db
+from notam_corpus import GEOMETRY_TYPES, KINDS, generate
+from parser_universal import NotamParser
+
+
+def test_generate_is_deterministic():
+    first = generate(50, seed=4)
+    assert first.notams == generate(50, seed=4).notams
+    assert first.notams != generate(50, seed=5).notams
+    assert [kind for kind, _ in first.notams[:len(KINDS)]] == list(KINDS)
+    assert len(first.texts('route')) == len([k for k, _ in first.notams if k == 'route'])
+    with pytest.raises(ValueError):
+        generate(1, kinds=('hexagon',))
+
+
+def test_every_kind_parses_to_its_geometry():
+    corpus = generate(len(KINDS) * 10, seed=9)
+    corpus.install()
+    try:
+        parser = NotamParser()
+        for kind, text in corpus.notams:
+            result = parser.parse(text)
+            assert result["geometry"]["type"] == GEOMETRY_TYPES[kind], text
+            assert result["validity"]["start"] is not None
+    finally:
+        waypoint_db.set_store(None)
+        fir_data.set_store(None)
@@ -0,0 +1,123 @@
+from notam_store import NotamStore, parse_header
+from parser_universal import default_parser
+
+NEW = "A0100/23 NOTAMN\nQ) OMMM/QRTCA/IV/BO/W/000/040/2515N05522E005\nB) 2311230600 C) 2311231000\nE) AREA ONE"
+OTHER = "A0101/23 NOTAMN\nQ) OMMM/QRTCA/IV/BO/W/000/040/1000N02000E005\nB) 2311240000 C) PERM\nE) AREA TWO"
+REPLACE = "A0124/23 NOTAMR A0100/23\nQ) OMMM/QRTCA/IV/BO/W/000/040/2515N05522E010\nE) AREA ONE WIDER"
+CANCEL = "A0125/23 NOTAMC A0124/23\nQ) OMMM/QRTCA/IV/BO/W/000/040/2515N05522E010\nE) CNL"
+
+
+def parse(text):
+    return default_parser.parse(text)
+
+
+def test_parse_header():
+    assert parse_header(REPLACE) == ("A0124/23", "R", "A0100/23")
+    assert parse_header("(A0100/23 NOTAMN\nE) X") == ("A0100/23", "N", None)
+    assert parse_header("E) NO HEADER A0100/23") is None
+
+
+def test_lifecycle_and_deltas():
+    store = NotamStore()
+    assert store.apply_all([parse(NEW), parse(OTHER)])["changes"] == 2
+    assert store.version == 2
+    # Same content again is not a change
+    assert store.apply(parse(NEW)) == 0
+
+    store.apply(parse(REPLACE))
+    assert "A0100/23" not in store and "A0124/23" in store
+    delta = store.changes_since(2)
+    assert delta["version"] == 4 and not delta["reset"]
+    assert [n["ids"][0] for n in delta["upserts"]] == ["A0124/23"]
+    assert delta["deletes"] == ["A0100/23"]
+
+    store.apply(parse(CANCEL))
+    delta = store.changes_since(2)
+    assert delta["upserts"] == []
+    assert sorted(delta["deletes"]) == ["A0100/23", "A0124/23"]
+    assert store.changes_since(store.version)["upserts"] == []
+    assert len(store) == 1
+
+
+def test_old_or_unknown_versions_reset():
+    store = NotamStore(log_size=2)
+    store.apply_all([parse(NEW), parse(OTHER), parse(REPLACE)])
+    assert store.changes_since(0)["reset"]
+    assert not store.changes_since(2)["reset"]
+    delta = store.changes_since(99)
+    assert delta["reset"] and len(delta["upserts"]) == 2
+
+
+def test_errors_for_notams_without_ids():
+    out = NotamStore().apply_all([parse("E) NOTHING TO KEY ON")])
+    assert out["changes"] == 0
+    assert out["errors"][0]["index"] == 0
+
+
+def test_bbox_query_follows_changes():
+    store = NotamStore()
+    store.apply_all([parse(NEW), parse(OTHER)])
+    assert [n["ids"][0] for n in store.query_bbox(24, 54, 26, 56)] == ["A0100/23"]
+    store.apply(parse(REPLACE))
+    assert [n["ids"][0] for n in store.query_bbox(24, 54, 26, 56)] == ["A0124/23"]
+
+
+def test_http_delta_polling():
+    from fastapi.testclient import TestClient
+    import main
+    main.notam_store = NotamStore()
+    client = TestClient(main.app)
+
+    first = client.post("/api/notams", json={"text": NEW + "\n" + OTHER}).json()
+    assert first["changes"] == 2 and first["errors"] == []
+    client.post("/api/notams", json={"text": REPLACE})
+    delta = client.get("/api/notams/changes", params={"since": first["version"]}).json()
+    assert [n["ids"][0] for n in delta["upserts"]] == ["A0124/23"]
+    assert delta["deletes"] == ["A0100/23"]
+
+    inside = client.get("/api/notams", params={"bbox": "9,19,11,21"}).json()
+    assert [n["ids"][0] for n in inside["notams"]] == ["A0101/23"]
+    assert client.get("/api/notams", params={"bbox": "1,2"}).status_code == 422
+    later = client.get("/api/notams", params={"active_from": "2024-06-01T00:00:00Z"}).json()
+    assert [n["ids"][0] for n in later["notams"]] == ["A0101/23"]
+
+
+def test_http_ingest_error_indices(monkeypatch):
+    from fastapi.testclient import TestClient
+    import main
+
+    class Parser:
+        def parse(self, text):
+            if "BOOM" in text:
+                raise ValueError("boom")
+            if "NOKEY" in text:
+                return {"raw_text": "E) NOKEY", "ids": []}
+            return default_parser.parse(text)
+
+    monkeypatch.setattr(main, "parse_cache", Parser())
+    monkeypatch.setattr(main, "notam_store", NotamStore())
+    client = TestClient(main.app)
+    feed = "\n".join([NEW, "A0102/23 NOTAMN\nE) BOOM", OTHER, "A0103/23 NOTAMN\nE) NOKEY"])
+    out = client.post("/api/notams", json={"text": feed}).json()
+    assert out["changes"] == 2
+    # Both refer to positions in the feed
+    assert [(e["index"], e["error"]) for e in out["errors"]] == [(1, "boom"), (3, "NOTAM has no identifier")]
+
+
+def test_time_query():
+    store = NotamStore()
+    store.apply_all([parse(NEW), parse(OTHER)])
+    nov23_0800 = 1700726400
+    assert [n["ids"][0] for n in store.query_time(nov23_0800)] == ["A0100/23"]
+    assert [n["ids"][0] for n in store.query_time(nov23_0800, nov23_0800 + 86400)] == ["A0100/23", "A0101/23"]
+    assert [n["ids"][0] for n in store.query(bbox=(9, 19, 11, 21), active=(nov23_0800, nov23_0800))] == []
+
+
+def test_subject_query():
+    store = NotamStore()
+    closed = "A0102/23 NOTAMN\nQ) OMMM/QMRLC/IV/NBO/A/000/999/2515N05522E005\nE) RWY 12/30 CLSD"
+    store.apply_all([parse(NEW), parse(closed), {"raw_text": "X", "ids": ["A0103/23"], "q_line": None}])
+    assert [n["ids"][0] for n in store.query(subjects=["mr"])] == ["A0102/23"]
+    assert len(store.query(subjects=["RT", "MR"])) == 2
+    assert store.query(subjects=[]) == []
+    assert [n["ids"][0] for n in store.query(fir="ommm", subjects=["RT"])] == ["A0100/23"]
@@ -0,0 +1,70 @@
+import waypoint_db
+from parse_cache import ParseCache
+from batch import parse_batch_parallel, shutdown_pool, split_notams
+from test_batch import load_sample
+
+TEXT = "A0456/23 NOTAMN\nE) UAS ACT WI 2NM RADIUS OF 250000N 0553000E"
+
+
+def test_hit_on_normalized_text():
+    cache = ParseCache(maxsize=10)
+    first = cache.parse(TEXT)
+    again = cache.parse(TEXT.replace("\n", "\n\n  "))
+    assert again["geometry"] == first["geometry"]
+    # raw_text is always the text that was passed in
+    assert again["raw_text"] == TEXT.replace("\n", "\n\n  ")
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+
+def test_lru_eviction():
+    cache = ParseCache(maxsize=2)
+    cache.parse("A0001/24 NOTAMN E) ONE")
+    cache.parse("A0002/24 NOTAMN E) TWO")
+    cache.parse("A0001/24 NOTAMN E) ONE")  # ONE is now most recent
+    cache.parse("A0003/24 NOTAMN E) THREE")
+    assert cache.get("A0002/24 NOTAMN E) TWO") is None
+    assert cache.get("A0001/24 NOTAMN E) ONE") is not None
+    assert cache.stats()["evictions"] == 1
+
+
+def test_ttl_expiry():
+    cache = ParseCache(maxsize=10, ttl=0)
+    cache.parse(TEXT)
+    assert cache.get(TEXT) is None
+
+
+def test_waypoint_change_invalidates():
+    cache = ParseCache(maxsize=10)
+    cache.parse(TEXT)
+    waypoint_db.add_waypoint("TESTFIX", 1.0, 2.0)
+    try:
+        assert cache.get(TEXT) is None
+        assert cache.stats()["size"] == 0
+    finally:
+        del waypoint_db.WAYPOINTS["TESTFIX"]
+
+
+def test_batch_only_parses_misses():
+    cache = ParseCache(maxsize=100)
+    texts = split_notams(load_sample())
+    cache.parse(texts[0])
+    try:
+        out = parse_batch_parallel(texts * 2, workers=2, chunk_size=1, threshold=0, cache=cache)
+    finally:
+        shutdown_pool()
+    assert [r["ids"] for r in out["results"]] == [["A0123/23"], ["A0456/23"]] * 2
+    stats = cache.stats()
+    # texts[0] was cached up front; both copies of texts[1] miss in the same batch
+    assert stats["size"] == 2
+    assert stats["hits"] == 2
+
+
+def test_fields_projected_from_cache():
+    cache = ParseCache(maxsize=10)
+    # A partial parse is not cached
+    assert set(cache.parse(TEXT, ["ids"])) == {"raw_text", "ids"}
+    assert cache.stats()["size"] == 0
+    full = cache.parse(TEXT)
+    assert cache.parse(TEXT, ["geometry"]) == {"raw_text": TEXT, "geometry": full["geometry"]}
+    assert cache.stats()["hits"] == 1
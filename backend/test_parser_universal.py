@@ -0,0 +1,117 @@
+import pytest
+
+import parser as legacy_parser
+from parser_universal import NotamParser, decode_q_line, scan_text
+from benchmark import polygon_notam
+from test_batch import load_sample
+
+parser = NotamParser()
+
+
+def test_coordinates_match_sequential_sweeps():
+    legacy = legacy_parser.NotamParser()
+    for text in [
+        load_sample(),
+        "WI AN AREA DEFINED AS 444200N0902000W TO 444800N0902200W TO 444100N0895500W",
+        "BOUNDED BY 35-00N 075-00W, 35-00N 074-00W, 34-00N 074-00W, 34-00N 075-00W",
+        "TFR AREA DEFINED AS 45.5N 90.5W TO 46.5N 91.5W TO 46.0N 92.0W",
+        "4510.5S 09030.5W 4520.5N 09040.5E 4530.0N 09050.5W",
+    ]:
+        assert parser.extract_coordinates(text) == legacy.extract_coordinates(text)
+
+
+def test_coordinates_prefix_format_in_text_order():
+    coords = parser.extract_coordinates("N251600 E0552000 - N251400 E0552400 - S251200 W0552200")
+    assert [[round(c, 4) for c in p] for p in coords] == [
+        [25.2667, 55.3333],
+        [25.2333, 55.4],
+        [-25.2, -55.3667],
+    ]
+
+
+def test_description_cut_at_earliest_stop_word():
+    text = "A0001/24 NOTAMN E) PJE CENTERED ON 2516N 05522E WI AN AREA DEFINED AS: F) SFC"
+    assert parser.extract_description(text) == "PJE"
+    assert parser.extract_description("A0001/24 NOTAMN E) RESTRICTED AREA - BOUNDED BY 2516N 05522E") == "RESTRICTED AREA"
+
+
+def test_coordinates_overlapping_formats_converted_once():
+    # 45.55N could also be read as DMS 45 deg 55 min; decimal wins
+    assert parser.extract_coordinates("45.55N 090.5W") == [[45.55, -90.5]]
+    # Decimal minutes are not mistaken for DMS with "." as separator
+    assert parser.extract_coordinates("4510.5N 09030.5W") == [[45.175, -90.50833333333334]]
+    (lat, lon), = parser.extract_coordinates("3755.86N 00145.60E")
+    assert abs(lat - 37.931) < 1e-9 and abs(lon - 1.76) < 1e-9
+    # Whole minutes read the same either way
+    assert parser.extract_coordinates("2516N 05522E") == [[25 + 16 / 60, 55 + 22 / 60]]
+
+
+def test_long_polygon():
+    result = parser.parse(polygon_notam(200))
+    assert result["geometry"]["type"] == "polygon"
+    # 200 vertices + the Q-line centre, closed
+    assert len(result["geometry"]["coordinates"]) == 202
+
+
+def test_validity_window():
+    parser = NotamParser()
+    validity = parser.parse("A0001/23 NOTAMN\nB) 2311230600 C) 2311231000 EST\nE) TEST")["validity"]
+    assert validity == {"start": 1700719200, "end": 1700733600, "estimated": True, "permanent": False}
+    assert parser.extract_validity("B) 2401010000 C) PERM")["permanent"]
+    assert parser.extract_validity("B) 2402300000 C) 2401011200")["start"] is None
+    assert parser.extract_validity("E) NO FIELDS")["start"] is None
+
+
+def test_fields_projection():
+    text = load_sample()
+    full = parser.parse(text)
+    assert list(full) == ["raw_text", "geometry", "altitude", "validity", "description", "ids", "q_line"]
+    partial = parser.parse(text, fields=["ids", "altitude"])
+    assert partial == {"raw_text": text, "altitude": full["altitude"], "ids": full["ids"]}
+    assert parser.parse(text, fields=["geometry"])["geometry"] == full["geometry"]
+    with pytest.raises(ValueError):
+        parser.parse(text, fields=["color"])
+
+
+def test_route_geometry_skips_area_stages():
+    class Counting(NotamParser):
+        calls = 0
+
+        def extract_coordinates(self, text):
+            Counting.calls += 1
+            return super().extract_coordinates(text)
+
+    result = Counting().parse("A0001/24 NOTAMN\nE) ATS RTE SEGMENTS CLSD 251600N 0552000E - 251400N 0552400E")
+    assert result["geometry"]["type"] == "line"
+    assert Counting.calls == 0
+
+
+def test_text_scan_shared_between_stages():
+    text = "A0001/24 NOTAMN\nQ) OMAE/QRTCA/IV/BO/W/000/040/2515N05522E999\nE) ENTIRE  Flight\nInformation Region\tCLSD"
+    scan = scan_text(text)
+    assert scan is scan_text(text)
+    assert scan.clean == parser.clean_text(text) == " ".join(text.split())
+    assert scan.fir and not scan.route
+    assert scan_text("E) FLW   ROUTE\nPORTION CLSD").route
+
+
+def test_q_line_decoded():
+    q_line = decode_q_line("A0100/23 NOTAMN\nQ) OMMM/QRTCA/IV/BO/W/000/040/2515S05522W005\nE) AREA")
+    assert q_line == {
+        "fir": "OMMM", "code": "QRTCA", "subject": "RT", "condition": "CA", "traffic": "IV",
+        "purpose": "BO", "scope": "W", "lower": 0, "upper": 40, "center": [-25.25, -55.36666666666667],
+        "radius_nm": 5.0,
+    }
+    loose = decode_q_line("Q) ommm/XX1/IV / NBO/W/00A/040/2515N05522E005")
+    assert loose["fir"] == "OMMM" and loose["code"] is None and loose["subject"] is None
+    assert loose["scope"] == "W" and loose["purpose"] == "NBO" and loose["lower"] is None
+    assert decode_q_line("E) NO Q-LINE") is None
+    assert parser.parse(load_sample())["q_line"]["subject"] == "RT"
+
+
+def test_altitude_from_q_line_without_f_and_g():
+    text = "A0100/23 NOTAMN\nQ) OMMM/QRTCA/IV/BO/W/050/245/2515N05522E005\nE) AREA ACT FL300"
+    assert parser.extract_altitude(text) == {"lower": "FL050", "upper": "FL245"}
+    assert parser.extract_altitude(text.replace("050/245", "000/999")) == {"lower": "SFC", "upper": "UNL"}
+    limits = text.replace(" FL300", "\nF) FL100 G) FL200")
+    assert parser.extract_altitude(limits) == {"lower": "FL100", "upper": "FL200"}
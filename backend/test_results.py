@@ -0,0 +1,45 @@
+import json
+import pickle
+
+import pytest
+
+from parser_universal import default_parser
+from results import Geometry, NotamResult, dumps
+from test_batch import load_sample
+
+
+def test_mapping_matches_dict_shape():
+    result = default_parser.parse(load_sample())
+    plain = result.to_dict()
+    assert list(result) == ["raw_text", "geometry", "altitude", "validity", "description", "ids", "q_line"]
+    assert result == plain and plain == result
+    assert isinstance(plain["geometry"], dict)
+    assert result["geometry"]["coordinates"] == plain["geometry"]["coordinates"]
+    assert result["altitude"] == {"lower": "GND", "upper": "UNL"}
+    assert json.loads(dumps(result)) == json.loads(json.dumps(plain))
+    with pytest.raises(TypeError):
+        result["description"] = "changed"
+
+
+def test_multiline_and_fir_geometry():
+    segments = [[[25.0, 55.0], [25.5, 55.5]], [[26.0, 56.0], [26.5, 56.5], [27.0, 57.0]]]
+    geometry = Geometry.from_points("multiline", segments)
+    assert geometry["coordinates"] == segments
+    assert geometry.vertex_count() == 5
+    assert "fir" not in geometry
+
+    fir = NotamResult.from_fields("X", {"geometry": {"type": "polygon", "coordinates": [[1.0, 2.0]],
+                                                     "radius_nm": None, "fir": "OMAE"}})
+    assert fir["geometry"]["fir"] == "OMAE"
+    assert list(fir) == ["raw_text", "geometry"]
+
+
+def test_replace_project_and_pickle():
+    result = default_parser.parse(load_sample())
+    other = result.replace(raw_text="other")
+    assert other["raw_text"] == "other" and other.geometry is result.geometry
+    projected = result.project(["ids"])
+    assert projected == {"raw_text": result.raw_text, "ids": result["ids"]}
+    with pytest.raises(KeyError):
+        projected["geometry"]
+    assert pickle.loads(pickle.dumps(result)) == result
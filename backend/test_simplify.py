@@ -0,0 +1,59 @@
+import math
+from simplify import simplify_line, simplify_ring
+
+
+def test_line_drops_collinear_points():
+    line = [[0.0, float(i)] for i in range(10)]
+    assert simplify_line(line, 0.01) == [[0.0, 0.0], [0.0, 9.0]]
+    assert simplify_line(line, 0) == line
+
+
+def test_ring_stays_closed_and_keeps_corners():
+    square = [[0.0, 0.0]]
+    for side in ([0.0, 1.0], [1.0, 0.0], [0.0, -1.0], [-1.0, 0.0]):
+        last = square[-1]
+        square += [[last[0] + side[0] * t / 10, last[1] + side[1] * t / 10] for t in range(1, 11)]
+    ring = simplify_ring(square, 0.01)
+    assert ring[0] == ring[-1]
+    assert sorted(map(tuple, ring[:-1])) == [(0.0, 0.0), (0.0, 1.0), (1.0, 0.0), (1.0, 1.0)]
+
+
+def test_ring_does_not_collapse():
+    circle = [[math.cos(a / 100 * 2 * math.pi), math.sin(a / 100 * 2 * math.pi)] for a in range(101)]
+    assert len(simplify_ring(circle, 10.0)) >= 4
+
+
+def test_vectorized_matches_scalar(monkeypatch):
+    import random
+    import simplify
+    rng = random.Random(3)
+    line = [[i * 0.01, rng.uniform(-0.05, 0.05)] for i in range(2000)]
+    fast = simplify_line(line, 0.02)
+    monkeypatch.setattr(simplify, "VECTOR_MIN_SPAN", 10 ** 9)
+    simplify._memo.clear()
+    assert simplify_line(line, 0.02) == fast
+    assert 2 < len(fast) < len(line)
+
+
+def test_results_are_memoized():
+    import simplify
+    circle = [[math.cos(a / 500 * 2 * math.pi), math.sin(a / 500 * 2 * math.pi)] for a in range(501)]
+    simplify._memo.clear()
+    first = simplify_ring(circle, 0.01)
+    assert len(simplify._memo) == 1
+    assert simplify_ring([list(p) for p in circle], 0.01) == first
+    assert len(simplify._memo) == 1
+    simplify_ring(circle, 0.1)
+    assert len(simplify._memo) == 2
+
+
+def test_simplify_result_leaves_input_alone():
+    from geometry import simplify_result
+    from simplify import tolerance_for_zoom
+    ring = [[math.cos(a / 500 * 2 * math.pi), math.sin(a / 500 * 2 * math.pi)] for a in range(501)]
+    result = {"geometry": {"type": "polygon", "coordinates": ring, "radius_nm": None}, "ids": []}
+    coarse = simplify_result(result, tolerance_for_zoom(5))
+    assert len(coarse["geometry"]["coordinates"]) < 100
+    assert len(result["geometry"]["coordinates"]) == 501
+    assert simplify_result(result, None) is result
+    assert tolerance_for_zoom(0) == 360 / 256
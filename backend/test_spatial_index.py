@@ -0,0 +1,59 @@
+import random
+from spatial_index import SpatialIndex, geometry_bounds
+
+
+def random_items(n, seed=7):
+    rng = random.Random(seed)
+    items = []
+    for i in range(n):
+        lat = rng.uniform(-60, 60)
+        lon = rng.uniform(-170, 170)
+        kind = i % 4
+        if kind == 0:
+            geometry = {"type": "polygon", "coordinates": [
+                [lat, lon], [lat + 1, lon], [lat + 1, lon + 1], [lat, lon + 1], [lat, lon]]}
+        elif kind == 1:
+            geometry = {"type": "circle", "coordinates": [[lat, lon]], "radius_nm": rng.uniform(1, 50)}
+        elif kind == 2:
+            geometry = {"type": "multiline", "coordinates": [[[lat, lon], [lat + 2, lon + 3]]]}
+        else:
+            geometry = {"type": "point", "coordinates": []}
+        items.append({"geometry": geometry})
+    return items
+
+
+def brute_force(items, box):
+    out = []
+    for i, item in enumerate(items):
+        b = geometry_bounds(item["geometry"])
+        if b and not (b[0] > box[2] or b[2] < box[0] or b[1] > box[3] or b[3] < box[1]):
+            out.append(i)
+    return out
+
+
+def test_bbox_query_matches_linear_scan():
+    items = random_items(3000)
+    index = SpatialIndex(items)
+    assert len(index) == 3000 * 3 // 4
+    rng = random.Random(1)
+    for _ in range(50):
+        lat, lon = rng.uniform(-60, 60), rng.uniform(-170, 170)
+        box = (lat, lon, lat + rng.uniform(0, 20), lon + rng.uniform(0, 20))
+        assert index.query_bbox(*box) == brute_force(items, box)
+
+
+def test_point_query_is_exact_for_polygons_and_circles():
+    items = [
+        {"geometry": {"type": "polygon", "coordinates": [[0, 0], [0, 10], [10, 0], [0, 0]]}},
+        {"geometry": {"type": "circle", "coordinates": [[5, 5]], "radius_nm": 60}},
+    ]
+    index = SpatialIndex(items)
+    # Inside the bbox of the triangle but beyond its hypotenuse
+    assert index.query_point(8, 8, exact=False) == [0]
+    assert index.query_point(8, 8) == []
+    assert index.query_point(1, 1) == [0]
+    assert index.query_point(4.5, 4.5) == [0, 1]
+
+
+def test_empty_index():
+    assert SpatialIndex([]).query_bbox(-90, -180, 90, 180) == []
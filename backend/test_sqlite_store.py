@@ -0,0 +1,53 @@
+from notam_store import NotamStore
+from sqlite_store import SqliteNotamStore
+from test_notam_store import NEW, OTHER, REPLACE, CANCEL, parse
+
+CLOSED = "A0102/23 NOTAMN\nQ) OPKR/QMRLC/IV/NBO/A/000/999/2515N06700E005\nE) RWY 07/25 CLSD"
+
+
+def open_store(tmp_path):
+    return SqliteNotamStore(str(tmp_path / "notams.db"))
+
+
+def test_matches_in_memory_store(tmp_path):
+    disk = open_store(tmp_path)
+    memory = NotamStore()
+    batches = [[parse(NEW), parse(OTHER)], [parse(REPLACE)], [parse(NEW), parse(CANCEL), parse(NEW)], [parse(NEW)]]
+    for batch in batches:
+        assert disk.apply_all(batch) == memory.apply_all(batch)
+    assert disk.version == memory.version == 6
+    plain = lambda notams: [dict(n, geometry=dict(n["geometry"])) for n in notams]
+    assert disk.all() == plain(memory.all())
+    for since in range(-1, 8):
+        want = memory.changes_since(since)
+        got = disk.changes_since(since)
+        assert got["reset"] == want["reset"] and got["deletes"] == want["deletes"]
+        assert got["upserts"] == plain(want["upserts"])
+
+
+def test_reopen_and_unchanged_reingest(tmp_path):
+    store = open_store(tmp_path)
+    store.apply_all([parse(NEW), parse(OTHER), {"raw_text": "no id"}])
+    store.close()
+
+    store = open_store(tmp_path)
+    assert store.version == 2 and len(store) == 2 and "A0100/23" in store
+    assert store.get("A0101/23")["q_line"]["subject"] == "RT"
+    applied = store.apply_all([parse(NEW), parse(OTHER)])
+    assert applied["changes"] == 0 and applied["version"] == 2
+    assert store.changes_since(2) == {"version": 2, "reset": False, "upserts": [], "deletes": []}
+
+
+def test_indexed_queries(tmp_path):
+    store = open_store(tmp_path)
+    store.apply_all([parse(NEW), parse(OTHER), parse(CLOSED)])
+    ids = lambda notams: [n["ids"][0] for n in notams]
+    assert ids(store.query_bbox(24, 54, 26, 56)) == ["A0100/23"]
+    nov23_0800 = 1700726400
+    assert ids(store.query_time(nov23_0800, nov23_0800 + 86400)) == ["A0100/23", "A0101/23"]
+    assert ids(store.query(subjects=["mr"])) == ["A0102/23"]
+    assert ids(store.query(fir="opkr")) == ["A0102/23"]
+    assert ids(store.query(bbox=(9, 19, 11, 21), subjects=["RT"])) == ["A0101/23"]
+    assert store.query(subjects=[]) == []
+    store.apply(parse(REPLACE))
+    assert ids(store.query_bbox(24, 54, 26, 56)) == ["A0124/23"]
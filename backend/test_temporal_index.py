@@ -0,0 +1,39 @@
+import math
+import random
+from temporal_index import TemporalIndex, validity_interval
+
+
+def notam(start, end, permanent=False):
+    return {"validity": {"start": start, "end": end, "estimated": False, "permanent": permanent}}
+
+
+def test_matches_linear_scan():
+    rng = random.Random(4)
+    items = []
+    for _ in range(500):
+        start = rng.randrange(0, 10000)
+        kind = rng.random()
+        if kind < 0.1:
+            items.append(notam(start, None, permanent=True))
+        elif kind < 0.15:
+            items.append({"validity": None})
+        else:
+            items.append(notam(start, start + rng.randrange(0, 500)))
+    index = TemporalIndex(items)
+    for _ in range(200):
+        t1 = rng.randrange(-100, 10500)
+        t2 = t1 + rng.choice([0, 10, 1000])
+        expected = [i for i, item in enumerate(items)
+                    if validity_interval(item) and validity_interval(item)[0] <= t2 and validity_interval(item)[1] >= t1]
+        assert index.query(t1, t2) == expected
+
+
+def test_open_ended_and_empty():
+    assert validity_interval(notam(None, 100)) == (-math.inf, 100)
+    assert validity_interval(notam(5, None, permanent=True)) == (5, math.inf)
+    assert validity_interval(notam(None, None)) is None
+    assert TemporalIndex([]).query(0) == []
+    index = TemporalIndex([notam(10, 20), notam(30, None, permanent=True)])
+    assert index.query(20) == [0]
+    assert index.query(21, 29) == []
+    assert index.query(10 ** 12) == [1]
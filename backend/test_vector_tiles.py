@@ -0,0 +1,124 @@
+from notam_store import NotamStore
+from parser_universal import default_parser
+from vector_tiles import (
+    TileCache, clip_line, clip_polygon, encode_tile, project, render_tile, tile_bounds,
+)
+
+
+def read_varint(data, pos):
+    value = shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        value |= (byte & 0x7F) << shift
+        shift += 7
+        if byte < 0x80:
+            return value, pos
+
+
+def read_message(data):
+    """{field number: [values]} for a protobuf message (varint and length-delimited fields only)."""
+    fields = {}
+    pos = 0
+    while pos < len(data):
+        key, pos = read_varint(data, pos)
+        number, wire_type = key >> 3, key & 7
+        if wire_type == 0:
+            value, pos = read_varint(data, pos)
+        elif wire_type == 2:
+            length, pos = read_varint(data, pos)
+            value = data[pos:pos + length]
+            pos += length
+        else:
+            value = data[pos:pos + 8]
+            pos += 8
+        fields.setdefault(number, []).append(value)
+    return fields
+
+
+def packed(data):
+    values, pos = [], 0
+    while pos < len(data):
+        value, pos = read_varint(data, pos)
+        values.append(value)
+    return values
+
+
+def decode_layer(tile):
+    layer = read_message(read_message(tile)[3][0])
+    keys = [k.decode() for k in layer[3]]
+    values = [read_message(v) for v in layer[4]]
+    features = []
+    for raw in layer[2]:
+        feature = read_message(raw)
+        tags = packed(feature[2][0])
+        properties = {}
+        for k, v in zip(tags[::2], tags[1::2]):
+            value = values[v]
+            properties[keys[k]] = value[1][0].decode() if 1 in value else value
+        features.append({"type": feature[3][0], "geometry": packed(feature[4][0]), "properties": properties})
+    return layer, features
+
+
+POLYGON = "A0001/24 NOTAMN\nE) AREA 250000N 0550000E 250000N 0560000E 240000N 0560000E 240000N 0550000E"
+CIRCLE = "A0002/24 NOTAMN\nE) UAS WI 5NM RADIUS OF 250000N 0553000E"
+
+
+def make_store():
+    store = NotamStore()
+    store.apply_all([default_parser.parse(POLYGON), default_parser.parse(CIRCLE)])
+    return store
+
+
+def test_projection_and_bounds():
+    min_lat, min_lon, max_lat, max_lon = tile_bounds(1, 1, 0)
+    assert (min_lon, max_lon) == (0.0, 180.0)
+    assert abs(min_lat) < 1e-9 and abs(max_lat - 85.0511287798) < 1e-6
+    (x, y), = project([[0.0, 90.0]], 1, 1, 0)
+    assert abs(x - 2048) < 1e-6 and abs(y - 4096) < 1e-6
+
+
+def test_clipping():
+    square = [(-100.0, -100.0), (100.0, -100.0), (100.0, 100.0), (-100.0, 100.0)]
+    clipped = clip_polygon(square, 0.0, 50.0)
+    assert sorted(set(clipped)) == [(0.0, 0.0), (0.0, 50.0), (50.0, 0.0), (50.0, 50.0)]
+    assert clip_line([(-10.0, 5.0), (20.0, 5.0), (20.0, 30.0), (5.0, 30.0)], 0.0, 10.0) == [[(0.0, 5.0), (10.0, 5.0)]]
+
+
+def test_tile_contents():
+    store = make_store()
+    tile = encode_tile(store.all(), 6, 41, 27)
+    layer, features = decode_layer(tile)
+    assert layer[1][0] == b"notams" and layer[5][0] == 4096 and layer[15][0] == 2
+    assert [f["properties"]["id"] for f in features] == ["A0001/24", "A0002/24"]
+    assert [f["type"] for f in features] == [3, 3]
+    polygon = features[0]["geometry"]
+    # MoveTo(1), 2 params, LineTo(3), 6 params, ClosePath
+    assert polygon[0] == 9 and polygon[3] == (3 << 3) | 2 and polygon[-1] == 15
+    assert features[1]["properties"]["type"] == "circle"
+    assert encode_tile(store.all(), 6, 0, 0) == b""
+
+
+def test_tile_cache_follows_store_version():
+    store = make_store()
+    cache = TileCache(maxsize=8)
+    first = render_tile(store, 6, 41, 27, cache)
+    assert render_tile(store, 6, 41, 27, cache) is first
+    assert cache.stats()["hits"] == 1
+
+    store.apply(default_parser.parse("A0003/24 NOTAMC A0002/24\nE) CNL"))
+    _, features = decode_layer(render_tile(store, 6, 41, 27, cache))
+    assert [f["properties"]["id"] for f in features] == ["A0001/24"]
+    assert cache.stats()["size"] == 1
+
+
+def test_tile_endpoint():
+    from fastapi.testclient import TestClient
+    import main
+    main.notam_store = make_store()
+    client = TestClient(main.app)
+    response = client.get("/api/tiles/6/41/27.mvt")
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/vnd.mapbox-vector-tile"
+    assert len(decode_layer(response.content)[1]) == 2
+    assert client.get("/api/tiles/2/4/0.mvt").status_code == 404
@@ -0,0 +1,98 @@
+import os
+
+import pytest
+
+import waypoint_db
+from waypoint_db import WaypointStore, get_waypoint_coords, load_waypoints, set_store
+from parser_universal import NotamParser
+
+CSV = """ident,lat,lon,type
+ALPHA,10.0,20.0,FIX
+BRAVO,11.0,21.0,FIX
+TWINS,50.0,5.0,FIX
+TWINS,-30.0,150.0,FIX
+VOR,12.5,-45.25,VOR
+BAD,abc,1.0,FIX
+"""
+
+
+def write_csv(tmp_path):
+    path = tmp_path / "waypoints.csv"
+    path.write_text(CSV)
+    return str(path)
+
+
+def test_csv_lookup_and_duplicates(tmp_path):
+    store = WaypointStore.from_csv(write_csv(tmp_path))
+    assert len(store) == 5
+    assert store.lookup("alpha") == [10.0, 20.0]
+    assert store.lookup("VOR") == [12.5, -45.25]
+    assert store.lookup("BAD") is None
+    assert store.lookup("NOPE") is None
+    assert sorted(store.candidates("TWINS")) == [[-30.0, 150.0], [50.0, 5.0]]
+    assert store.lookup("TWINS", near=[-25.0, 145.0]) == [-30.0, 150.0]
+    assert store.lookup("TWINS", near=[45.0, 0.0]) == [50.0, 5.0]
+
+
+def test_snapshot_round_trip(tmp_path):
+    csv_path = write_csv(tmp_path)
+    store = WaypointStore.open(csv_path)
+    snapshot = os.path.splitext(csv_path)[0] + ".bin"
+    assert os.path.exists(snapshot)
+
+    mapped = WaypointStore.open(csv_path)
+    try:
+        assert mapped._mmap is not None
+        assert list(mapped.items()) == list(store.items())
+        assert mapped.lookup("TWINS", near=[-25.0, 145.0]) == [-30.0, 150.0]
+        assert "BRAVO" in mapped and "BRAV" not in mapped
+    finally:
+        mapped.close()
+
+
+def test_truncated_snapshot_falls_back_to_csv(tmp_path):
+    csv_path = write_csv(tmp_path)
+    WaypointStore.open(csv_path)
+    snapshot = os.path.splitext(csv_path)[0] + ".bin"
+    for size in (10, os.path.getsize(snapshot) - 8):
+        with open(snapshot, "r+b") as f:
+            f.truncate(size)
+        with pytest.raises(ValueError):
+            WaypointStore.from_snapshot(snapshot)
+        # Newer than the CSV, but unreadable: the CSV is loaded and the snapshot rewritten
+        store = WaypointStore.open(csv_path)
+        assert store.lookup("ALPHA") == [10.0, 20.0] and store._mmap is None
+        rewritten = WaypointStore.from_snapshot(snapshot)
+        assert rewritten.lookup("ALPHA") == [10.0, 20.0]
+        rewritten.close()
+
+
+def test_route_fixes_resolved_near_q_line(tmp_path):
+    text = (
+        "A0001/24 NOTAMN\n"
+        "Q) YBBB/QARLC/IV/NBO/E/000/999/3000S15000E050\n"
+        "E) ATS RTE SEGMENT CLOSED: A123 TWINS - ALPHA"
+    )
+    load_waypoints(write_csv(tmp_path))
+    try:
+        result = NotamParser().parse(text)
+        assert result["geometry"]["type"] == "multiline"
+        assert result["geometry"]["coordinates"] == [[[-30.0, 150.0], [10.0, 20.0]]]
+    finally:
+        set_store(None)
+
+
+def test_builtin_waypoints_still_resolve():
+    assert get_waypoint_coords("SAKVU") == [24.5, 55.8]
+    assert "SAKVU" in waypoint_db.get_all_waypoints()
+
+
+def test_find_fixes_follows_data_version(tmp_path):
+    text = "E) CLSD BTN ALPHA AND BRAVO, AREA ALPHAX VOR"
+    assert waypoint_db.find_fixes(text) == []
+    load_waypoints(write_csv(tmp_path))
+    try:
+        assert NotamParser().extract_fixes(text) == ["ALPHA", "BRAVO", "VOR"]
+    finally:
+        set_store(None)
+    assert waypoint_db.find_fixes("SAKVU-SAJAN") == ["SAKVU", "SAJAN"]
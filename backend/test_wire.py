@@ -0,0 +1,74 @@
+import json
+
+import pytest
+
+from wire import (
+    encode_polyline, decode_polyline, encode_f32, decode_f32,
+    requested_encoding, encode_result, decode_result,
+)
+from parser_universal import default_parser
+
+RING = [[25.25, 55.3667], [25.5, 55.5], [25.1, 55.9], [24.9, 55.4], [25.25, 55.3667]]
+CIRCLE = "A0100/23 NOTAMN\nQ) OMMM/QRTCA/IV/BO/W/000/040/2515N05522E005\nE) TEMPO RESTRICTED AREA"
+
+
+def close(a, b, tol):
+    return len(a) == len(b) and all(abs(p[0] - q[0]) <= tol and abs(p[1] - q[1]) <= tol for p, q in zip(a, b))
+
+
+def test_polyline_round_trip():
+    # Reference value from the polyline algorithm description
+    assert encode_polyline([[38.5, -120.2], [40.7, -120.95], [43.252, -126.453]]) == "_p~iF~ps|U_ulLnnqC_mqNvxq`@"
+    assert close(decode_polyline(encode_polyline(RING)), RING, 1e-5)
+    assert decode_polyline("") == []
+
+
+def test_f32_round_trip():
+    assert close(decode_f32(encode_f32(RING)), RING, 1e-4)
+    assert decode_f32(encode_f32([])) == []
+
+
+def test_requested_encoding():
+    assert requested_encoding() is None
+    assert requested_encoding("json") is None
+    assert requested_encoding("POLYLINE") == "polyline"
+    assert requested_encoding("JSON") is None
+    assert requested_encoding(None, "application/json; geometry=JSON") is None
+    assert requested_encoding(None, "application/json; geometry=f32") == "f32"
+    # The query parameter wins over the header
+    assert requested_encoding("polyline", "application/json; geometry=f32") == "polyline"
+    with pytest.raises(ValueError):
+        requested_encoding("wkb")
+
+
+def test_encode_result():
+    result = default_parser.parse(CIRCLE)
+    encoded = encode_result(result, "polyline")
+    assert encoded["geometry"]["encoding"] == "polyline"
+    assert isinstance(encoded["geometry"]["coordinates"], str)
+    assert encoded["geometry"]["radius_nm"] == result["geometry"]["radius_nm"]
+    # The input is left alone
+    assert isinstance(result["geometry"]["coordinates"], list)
+    assert close(decode_result(encoded)["geometry"]["coordinates"], result["geometry"]["coordinates"], 1e-5)
+    assert encode_result(result, None) is result
+
+    multiline = {"geometry": {"type": "multiline", "coordinates": [RING[:2], RING[2:]]}}
+    decoded = decode_result(encode_result(multiline, "f32"))["geometry"]["coordinates"]
+    assert len(decoded) == 2 and close(decoded[1], RING[2:], 1e-4)
+
+
+def test_http_encoding():
+    from fastapi.testclient import TestClient
+    import main
+    client = TestClient(main.app)
+
+    plain = client.post("/api/parse", json={"text": CIRCLE}).json()["results"][0]
+    encoded = client.post("/api/parse", params={"encoding": "polyline"}, json={"text": CIRCLE}).json()["results"][0]
+    assert close(decode_result(encoded)["geometry"]["coordinates"], plain["geometry"]["coordinates"], 1e-5)
+
+    response = client.post("/api/parse/stream", json={"text": CIRCLE},
+                           headers={"Accept": "application/x-ndjson; geometry=f32"})
+    line = json.loads(response.text.splitlines()[0])
+    assert line["geometry"]["encoding"] == "f32"
+
+    assert client.post("/api/parse", params={"encoding": "wkb"}, json={"text": CIRCLE}).status_code == 400
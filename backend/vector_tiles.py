@@ -0,0 +1,378 @@
+# Mapbox Vector Tiles (MVT 2.1) for the NOTAM store.
+# Geometries are simplified for the tile's zoom, projected to Web Mercator,
+# clipped to the tile plus a small buffer and encoded as protobuf by hand
+# (the format only needs varints and length-delimited fields).
+
+import math
+import struct
+import threading
+from collections import OrderedDict
+from typing import List, Dict, Any, Optional, Sequence, Tuple
+
+from geometry import tessellate, simplify_result, circle_tolerance_nm
+from simplify import tolerance_for_zoom
+
+EXTENT = 4096
+# Geometry kept outside the tile edge (tile units) so strokes join up seamlessly
+BUFFER = 64
+LAYER_NAME = 'notams'
+MAX_ZOOM = 24
+MAX_LAT = 85.0511287798
+
+# MVT GeomType
+POINT, LINESTRING, POLYGON = 1, 2, 3
+MOVE_TO, LINE_TO, CLOSE_PATH = 1, 2, 7
+
+TilePoint = Tuple[float, float]
+
+
+# --- Protobuf encoding ---
+
+def _varint(value: int, out: bytearray):
+    while value > 0x7F:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def _zigzag(value: int) -> int:
+    return (value << 1) ^ (value >> 63)
+
+
+def _field(number: int, wire_type: int, out: bytearray):
+    _varint((number << 3) | wire_type, out)
+
+
+def _bytes_field(number: int, payload: bytes, out: bytearray):
+    _field(number, 2, out)
+    _varint(len(payload), out)
+    out += payload
+
+
+def _value(value: Any) -> bytes:
+    """Encode a Layer.Value message."""
+    out = bytearray()
+    if isinstance(value, bool):
+        _field(7, 0, out)
+        _varint(int(value), out)
+    elif isinstance(value, int):
+        _field(6, 0, out)
+        _varint(_zigzag(value), out)
+    elif isinstance(value, float):
+        _field(3, 1, out)
+        out += struct.pack('<d', value)
+    else:
+        _bytes_field(1, str(value).encode('utf-8'), out)
+    return bytes(out)
+
+
+# --- Projection and clipping ---
+
+def tile_bounds(z: int, x: int, y: int) -> Tuple[float, float, float, float]:
+    """(min_lat, min_lon, max_lat, max_lon) of a tile."""
+    n = 2 ** z
+
+    def lat(row):
+        return math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * row / n))))
+
+    return (lat(y + 1), x / n * 360.0 - 180.0, lat(y), (x + 1) / n * 360.0 - 180.0)
+
+
+def project(points: Sequence[Sequence[float]], z: int, x: int, y: int) -> List[TilePoint]:
+    """[lat, lon] points to (x, y) tile units, y pointing down."""
+    scale = 2 ** z
+    out = []
+    for p in points:
+        lat = max(-MAX_LAT, min(MAX_LAT, p[0]))
+        sin_lat = math.sin(math.radians(lat))
+        world_x = (p[1] + 180.0) / 360.0 * scale
+        world_y = (0.5 - math.log((1 + sin_lat) / (1 - sin_lat)) / (4 * math.pi)) * scale
+        out.append(((world_x - x) * EXTENT, (world_y - y) * EXTENT))
+    return out
+
+
+def clip_polygon(ring: List[TilePoint], lo: float, hi: float) -> List[TilePoint]:
+    """Sutherland-Hodgman clip of a ring (without the closing point) to the square [lo, hi]."""
+    for axis, bound, keep_below in ((0, lo, False), (0, hi, True), (1, lo, False), (1, hi, True)):
+        if not ring:
+            break
+        clipped = []
+        prev = ring[-1]
+        prev_in = prev[axis] <= bound if keep_below else prev[axis] >= bound
+        for cur in ring:
+            cur_in = cur[axis] <= bound if keep_below else cur[axis] >= bound
+            if cur_in != prev_in:
+                t = (bound - prev[axis]) / (cur[axis] - prev[axis])
+                clipped.append((prev[0] + t * (cur[0] - prev[0]), prev[1] + t * (cur[1] - prev[1])))
+            if cur_in:
+                clipped.append(cur)
+            prev, prev_in = cur, cur_in
+        ring = clipped
+    return ring
+
+
+def clip_line(line: List[TilePoint], lo: float, hi: float) -> List[List[TilePoint]]:
+    """Liang-Barsky clip of a polyline to the square [lo, hi]; returns the visible parts."""
+    parts: List[List[TilePoint]] = []
+    current: List[TilePoint] = []
+    for a, b in zip(line, line[1:]):
+        t0, t1 = 0.0, 1.0
+        dx, dy = b[0] - a[0], b[1] - a[1]
+        visible = True
+        for p, q in ((-dx, a[0] - lo), (dx, hi - a[0]), (-dy, a[1] - lo), (dy, hi - a[1])):
+            if p == 0:
+                if q < 0:
+                    visible = False
+                    break
+            else:
+                t = q / p
+                if p < 0:
+                    t0 = max(t0, t)
+                else:
+                    t1 = min(t1, t)
+                if t0 > t1:
+                    visible = False
+                    break
+        if not visible:
+            if current:
+                parts.append(current)
+                current = []
+            continue
+        start = (a[0] + t0 * dx, a[1] + t0 * dy)
+        end = (a[0] + t1 * dx, a[1] + t1 * dy)
+        if not current:
+            current = [start]
+        current.append(end)
+        if t1 < 1.0:
+            parts.append(current)
+            current = []
+    if current:
+        parts.append(current)
+    return parts
+
+
+# --- Geometry commands ---
+
+def _quantize(points: Sequence[TilePoint]) -> List[Tuple[int, int]]:
+    out: List[Tuple[int, int]] = []
+    for px, py in points:
+        q = (int(round(px)), int(round(py)))
+        if not out or out[-1] != q:
+            out.append(q)
+    return out
+
+
+def _path(points: List[Tuple[int, int]], closed: bool, cursor: List[int], out: List[int]):
+    """Append MoveTo/LineTo(/ClosePath) commands for one path, relative to cursor."""
+    out.append((1 << 3) | MOVE_TO)
+    for i, (px, py) in enumerate(points):
+        if i == 1:
+            out.append(((len(points) - 1) << 3) | LINE_TO)
+        out.append(_zigzag(px - cursor[0]))
+        out.append(_zigzag(py - cursor[1]))
+        cursor[0], cursor[1] = px, py
+    if closed:
+        out.append((1 << 3) | CLOSE_PATH)
+
+
+def _ring_area(points: List[Tuple[int, int]]) -> int:
+    return sum(points[i - 1][0] * points[i][1] - points[i][0] * points[i - 1][1] for i in range(len(points)))
+
+
+def encode_geometry(notam: Dict[str, Any], ring: Optional[List[List[float]]], z: int, x: int, y: int) -> Optional[Tuple[int, List[int]]]:
+    """(GeomType, command integers) of a NOTAM within a tile, or None if nothing of it is visible."""
+    geom = notam.get('geometry') or {}
+    geom_type = geom.get('type')
+    coords = geom.get('coordinates') or []
+    lo, hi = -BUFFER, EXTENT + BUFFER
+    cursor = [0, 0]
+    commands: List[int] = []
+
+    if geom_type == 'circle' and ring is not None:
+        coords, geom_type = ring, 'polygon'
+
+    if geom_type == 'polygon' and len(coords) > 2:
+        projected = project(coords, z, x, y)
+        if projected[0] == projected[-1]:
+            projected.pop()
+        points = _quantize(clip_polygon(projected, lo, hi))
+        if len(points) > 1 and points[0] == points[-1]:
+            points.pop()
+        if len(points) < 3:
+            return None
+        # Exterior rings are clockwise on screen (positive area with y down)
+        area = _ring_area(points)
+        if area == 0:
+            return None
+        if area < 0:
+            points.reverse()
+        _path(points, True, cursor, commands)
+        return POLYGON, commands
+
+    if geom_type in ('line', 'multiline'):
+        lines = coords if geom_type == 'multiline' else [coords]
+        for line in lines:
+            for part in clip_line(project(line, z, x, y), lo, hi):
+                points = _quantize(part)
+                if len(points) >= 2:
+                    _path(points, False, cursor, commands)
+        return (LINESTRING, commands) if commands else None
+
+    if coords:
+        (px, py), = project(coords[:1], z, x, y)
+        if lo <= px <= hi and lo <= py <= hi:
+            _path(_quantize([(px, py)]), False, cursor, commands)
+            return POINT, commands
+    return None
+
+
+def feature_properties(notam: Dict[str, Any]) -> Dict[str, Any]:
+    geom = notam.get('geometry') or {}
+    altitude = notam.get('altitude') or {}
+    validity = notam.get('validity') or {}
+    ids = notam.get('ids') or []
+    properties = {
+        'id': ids[0] if ids else '',
+        'type': geom.get('type') or 'unknown',
+        'lower': altitude.get('lower', 'SFC'),
+        'upper': altitude.get('upper', 'UNL'),
+    }
+    if geom.get('radius_nm'):
+        properties['radius_nm'] = float(geom['radius_nm'])
+    if validity.get('start') is not None:
+        properties['start'] = int(validity['start'])
+    if validity.get('end') is not None:
+        properties['end'] = int(validity['end'])
+    return properties
+
+
+def encode_tile(notams: Sequence[Dict[str, Any]], z: int, x: int, y: int) -> bytes:
+    """
+    One-layer vector tile for the NOTAMs that may touch tile z/x/y.
+    Geometries are simplified to about one pixel at this zoom first.
+    """
+    tolerance = tolerance_for_zoom(z)
+    notams = [simplify_result(notam, tolerance) for notam in notams]
+    rings = tessellate(notams, circle_tolerance_nm(tolerance))
+
+    keys: Dict[str, int] = {}
+    values: Dict[Any, int] = {}
+    features = bytearray()
+    feature_id = 0
+    for notam, ring in zip(notams, rings):
+        encoded = encode_geometry(notam, ring, z, x, y)
+        if encoded is None:
+            continue
+        geom_type, commands = encoded
+        tags: List[int] = []
+        for key, value in feature_properties(notam).items():
+            tags.append(keys.setdefault(key, len(keys)))
+            # Keep 1 and 1.0 (and True) apart in the values table
+            tags.append(values.setdefault((type(value).__name__, value), len(values)))
+
+        feature_id += 1
+        feature = bytearray()
+        _field(1, 0, feature)
+        _varint(feature_id, feature)
+        packed = bytearray()
+        for tag in tags:
+            _varint(tag, packed)
+        _bytes_field(2, bytes(packed), feature)
+        _field(3, 0, feature)
+        _varint(geom_type, feature)
+        packed = bytearray()
+        for command in commands:
+            _varint(command, packed)
+        _bytes_field(4, bytes(packed), feature)
+        _bytes_field(2, bytes(feature), features)
+
+    if not feature_id:
+        return b''
+
+    layer = bytearray()
+    _field(15, 0, layer)
+    _varint(2, layer)
+    _bytes_field(1, LAYER_NAME.encode('utf-8'), layer)
+    layer += features
+    for key in keys:
+        _bytes_field(3, key.encode('utf-8'), layer)
+    for _, value in values:
+        _bytes_field(4, _value(value), layer)
+    _field(5, 0, layer)
+    _varint(EXTENT, layer)
+
+    tile = bytearray()
+    _bytes_field(3, bytes(layer), tile)
+    return bytes(tile)
+
+
+def query_bounds(z: int, x: int, y: int) -> Tuple[float, float, float, float]:
+    """Tile bounds grown by the clip buffer, for looking up candidate NOTAMs."""
+    min_lat, min_lon, max_lat, max_lon = tile_bounds(z, x, y)
+    pad_lon = (max_lon - min_lon) * BUFFER / EXTENT
+    pad_lat = (max_lat - min_lat) * BUFFER / EXTENT
+    return (min_lat - pad_lat, min_lon - pad_lon, max_lat + pad_lat, max_lon + pad_lon)
+
+
+class TileCache:
+    """
+    LRU cache of encoded tiles for one version of the NOTAM store. Looking
+    up a tile with a newer store version empties the cache, so tiles never
+    outlive the data they were drawn from.
+    """
+
+    def __init__(self, maxsize: int = 4096):
+        self.maxsize = maxsize
+        self.version = None
+        self.hits = 0
+        self.misses = 0
+        self._tiles: "OrderedDict[Tuple[int, int, int], bytes]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _check_version(self, version):
+        # Caller holds the lock
+        if version != self.version:
+            self._tiles.clear()
+            self.version = version
+
+    def get(self, key: Tuple[int, int, int], version) -> Optional[bytes]:
+        with self._lock:
+            self._check_version(version)
+            tile = self._tiles.get(key)
+            if tile is None:
+                self.misses += 1
+                return None
+            self._tiles.move_to_end(key)
+            self.hits += 1
+            return tile
+
+    def put(self, key: Tuple[int, int, int], version, tile: bytes):
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            # Drawn from a store version that has since been replaced
+            if version != self.version:
+                return
+            self._tiles[key] = tile
+            self._tiles.move_to_end(key)
+            while len(self._tiles) > self.maxsize:
+                self._tiles.popitem(last=False)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"size": len(self._tiles), "maxsize": self.maxsize, "version": self.version,
+                    "hits": self.hits, "misses": self.misses}
+
+
+def render_tile(store, z: int, x: int, y: int, cache: Optional[TileCache] = None) -> bytes:
+    """Encoded tile z/x/y of a NotamStore, through cache if given."""
+    version = store.version
+    key = (z, x, y)
+    if cache is not None:
+        tile = cache.get(key, version)
+        if tile is not None:
+            return tile
+    tile = encode_tile(store.query(bbox=query_bounds(z, x, y)), z, x, y)
+    if cache is not None:
+        cache.put(key, version, tile)
+    return tile
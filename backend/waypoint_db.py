@@ -1,6 +1,22 @@
 # Aviation Waypoint Database
 # Coordinates in decimal degrees [latitude, longitude]
 # Sources: OurAirports, OpenNav, AIP data
+#
+# The global set of fixes, navaids and aerodromes is loaded from a CSV file
+# (ident,lat,lon per line; NOTAM_WAYPOINTS or data/waypoints.csv) into a
+# WaypointStore. WAYPOINTS below holds the built-in entries and anything
+# added at runtime; they are consulted alongside the file.
+
+import mmap
+import os
+import re
+import struct
+import sys
+import threading
+from array import array
+from math import cos, radians
+from typing import List, Dict, Iterable, Iterator, Optional, Sequence, Tuple
+
 
 WAYPOINTS = {
     # Real coordinates from search results
@@ -45,17 +61,322 @@ WAYPOINTS = {
     "UXENI": [21.5, 72.0],
 }
 
-def get_waypoint_coords(ident):
+# Snapshot layout: header, then `count` idents of `width` bytes (space
+# padded, sorted), then `count` latitudes and `count` longitudes as float64
+SNAPSHOT_MAGIC = b'NGSWPT01'
+SNAPSHOT_HEADER = struct.Struct('<8sIIB7x')
+BYTE_ORDER = 0 if sys.byteorder == 'little' else 1
+
+# Candidate fix identifiers in free text: 2-5 letters standing alone
+FIX_TOKEN = re.compile(r'(?<![A-Z0-9])[A-Z]{2,5}(?![A-Z0-9])')
+
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'waypoints.csv')
+
+
+def _squared_distance(lat1, lon1, lat2, lon2):
+    # Equirectangular approximation; only used to rank nearby candidates
+    dlon = (lon2 - lon1 + 180.0) % 360.0 - 180.0
+    dx = dlon * cos(radians((lat1 + lat2) / 2))
+    dy = lat2 - lat1
+    return dx * dx + dy * dy
+
+
+def nearest(candidates, near):
+    """
+    Pick the candidate closest to near ([lat, lon]).
+
+    Args:
+        candidates: List of [lat, lon] positions sharing one identifier
+        near: Reference position, or None to take the first candidate
+
+    Returns:
+        [lat, lon], or None if there are no candidates
+    """
+    if not candidates:
+        return None
+    if near is None or len(candidates) == 1:
+        return candidates[0]
+    return min(candidates, key=lambda c: _squared_distance(near[0], near[1], c[0], c[1]))
+
+
+class WaypointStore:
+    """
+    Read-only, array-backed table of waypoints.
+
+    Identifiers are kept as one sorted block of fixed-width byte records and
+    coordinates in two float64 arrays, so a few hundred thousand entries take
+    a few megabytes instead of a dict of lists. Lookups are a binary search;
+    identifiers that occur more than once (the same five-letter name is reused
+    in different regions) are kept side by side and returned together.
+
+    A store can be built from rows or a CSV file, written out as a binary
+    snapshot, and reopened from that snapshot with mmap, which makes startup
+    almost free: nothing is parsed or copied until it is looked up.
+    """
+
+    def __init__(self, idents: bytes, width: int, lats: Sequence[float], lons: Sequence[float], offset: int = 0):
+        # idents may be a larger buffer (the mmap) with the table at offset
+        self._idents = idents
+        self._offset = offset
+        self.width = width
+        self._lats = lats
+        self._lons = lons
+        self._mmap = None
+
+    def __len__(self):
+        return len(self._lats)
+
+    def __contains__(self, ident):
+        start, end = self._range(ident)
+        return end > start
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[Tuple[str, float, float]]) -> 'WaypointStore':
+        """Build a store from (ident, lat, lon) rows in any order."""
+        keys = []
+        lats = array('d')
+        lons = array('d')
+        for ident, lat, lon in rows:
+            keys.append(ident.strip().upper().encode('ascii'))
+            lats.append(float(lat))
+            lons.append(float(lon))
+
+        width = max((len(k) for k in keys), default=1)
+        keys = [k.ljust(width) for k in keys]
+        order = sorted(range(len(keys)), key=keys.__getitem__)
+        return cls(
+            b''.join([keys[i] for i in order]),
+            width,
+            array('d', [lats[i] for i in order]),
+            array('d', [lons[i] for i in order]),
+        )
+
+    @classmethod
+    def from_csv(cls, path: str) -> 'WaypointStore':
+        """
+        Load ident,lat,lon rows from a CSV file. Extra columns, a header row
+        and rows that cannot be read (bad numbers, non-ASCII identifiers)
+        are skipped.
+        """
+        def rows():
+            with open(path, encoding='utf-8') as f:
+                for line in f:
+                    fields = line.split(',', 3)
+                    if len(fields) < 3:
+                        continue
+                    ident = fields[0].strip()
+                    if not ident or not ident.isascii():
+                        continue
+                    try:
+                        lat = float(fields[1])
+                        lon = float(fields[2])
+                    except ValueError:
+                        continue
+                    if -90.0 <= lat <= 90.0 and -180.0 <= lon <= 180.0:
+                        yield ident, lat, lon
+
+        return cls.from_rows(rows())
+
+    @classmethod
+    def from_snapshot(cls, path: str) -> 'WaypointStore':
+        """Memory-map a snapshot written by write_snapshot."""
+        with open(path, 'rb') as f:
+            try:
+                mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                # Empty file
+                raise ValueError(f"{path}: not a waypoint snapshot")
+
+        if len(mm) < SNAPSHOT_HEADER.size:
+            mm.close()
+            raise ValueError(f"{path}: not a waypoint snapshot")
+        magic, count, width, byte_order = SNAPSHOT_HEADER.unpack_from(mm, 0)
+        ident_end = SNAPSHOT_HEADER.size + count * width
+        # Float arrays start on an 8-byte boundary
+        lat_start = (ident_end + 7) & ~7
+        lon_start = lat_start + count * 8
+        if magic != SNAPSHOT_MAGIC or byte_order != BYTE_ORDER or len(mm) < lon_start + count * 8:
+            mm.close()
+            raise ValueError(f"{path}: not a waypoint snapshot for this platform")
+
+        view = memoryview(mm)
+        store = cls(
+            mm,
+            width,
+            view[lat_start:lon_start].cast('d'),
+            view[lon_start:lon_start + count * 8].cast('d'),
+            offset=SNAPSHOT_HEADER.size,
+        )
+        view.release()
+        store._mmap = mm
+        return store
+
+    @classmethod
+    def open(cls, path: str) -> 'WaypointStore':
+        """
+        Open a CSV file or a snapshot. For a CSV file the snapshot next to it
+        (same name, .bin) is used when it is newer than the CSV; otherwise the
+        CSV is loaded and the snapshot is (re)written if the directory allows.
+        """
+        root, ext = os.path.splitext(path)
+        if ext.lower() == '.bin':
+            return cls.from_snapshot(path)
+
+        snapshot = root + '.bin'
+        try:
+            if os.path.getmtime(snapshot) >= os.path.getmtime(path):
+                return cls.from_snapshot(snapshot)
+        except (OSError, ValueError):
+            pass
+
+        store = cls.from_csv(path)
+        try:
+            store.write_snapshot(snapshot)
+        except OSError:
+            pass
+        return store
+
+    def write_snapshot(self, path: str):
+        """Write the store in the binary layout read by from_snapshot."""
+        count = len(self)
+        tmp = f'{path}.{os.getpid()}.tmp'
+        with open(tmp, 'wb') as f:
+            f.write(SNAPSHOT_HEADER.pack(SNAPSHOT_MAGIC, count, self.width, BYTE_ORDER))
+            f.write(self._idents[self._offset:self._offset + count * self.width])
+            f.write(b'\0' * (-(SNAPSHOT_HEADER.size + count * self.width) % 8))
+            f.write(bytes(self._lats))
+            f.write(bytes(self._lons))
+        os.replace(tmp, path)
+
+    def close(self):
+        if self._mmap is not None:
+            self._lats.release()
+            self._lons.release()
+            self._idents = b''
+            self._offset = 0
+            self._lats = self._lons = array('d')
+            self._mmap.close()
+            self._mmap = None
+
+    def _range(self, ident: str) -> Tuple[int, int]:
+        """[start, end) of the records for ident in the sorted table."""
+        key = ident.upper().encode('ascii', 'replace')
+        width = self.width
+        if len(key) > width:
+            return 0, 0
+        key = key.ljust(width)
+        idents = self._idents
+        base = self._offset
+        count = len(self._lats)
+
+        lo, hi = 0, count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if idents[base + mid * width:base + (mid + 1) * width] < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        end = lo
+        while end < count and idents[base + end * width:base + (end + 1) * width] == key:
+            end += 1
+        return lo, end
+
+    def candidates(self, ident: str) -> List[List[float]]:
+        """Every [lat, lon] recorded for ident."""
+        start, end = self._range(ident)
+        return [[self._lats[i], self._lons[i]] for i in range(start, end)]
+
+    def lookup(self, ident: str, near: Optional[Sequence[float]] = None) -> Optional[List[float]]:
+        """[lat, lon] for ident (the one closest to near if it is ambiguous), or None."""
+        return nearest(self.candidates(ident), near)
+
+    def items(self) -> Iterator[Tuple[str, List[float]]]:
+        width = self.width
+        base = self._offset
+        for i in range(len(self)):
+            ident = self._idents[base + i * width:base + (i + 1) * width].decode('ascii').rstrip()
+            yield ident, [self._lats[i], self._lons[i]]
+
+
+# Incremented on every change so caches of parse results can be invalidated
+_version = 0
+_store: Optional[WaypointStore] = None
+_store_lock = threading.Lock()
+
+def data_version():
+    """Version of the waypoint data; changes whenever waypoints are added or loaded."""
+    return _version
+
+def get_store():
+    """
+    The waypoint file database, opened on first use.
+
+    Reads NOTAM_WAYPOINTS (a CSV file or snapshot), falling back to
+    data/waypoints.csv; an empty store is used when neither exists.
+    """
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                path = os.environ.get('NOTAM_WAYPOINTS') or DEFAULT_PATH
+                if os.path.exists(path):
+                    _store = WaypointStore.open(path)
+                else:
+                    _store = WaypointStore.from_rows([])
+    return _store
+
+def set_store(store):
+    """
+    Replace the waypoint file database.
+
+    Args:
+        store: WaypointStore, or None to reopen the configured file on next use
+    """
+    global _store, _version
+    with _store_lock:
+        _store = store
+        _version += 1
+
+def load_waypoints(path):
+    """
+    Load the waypoint file database from a CSV file or snapshot.
+
+    Args:
+        path: Path to an ident,lat,lon CSV file or a .bin snapshot
+
+    Returns:
+        The loaded WaypointStore
+    """
+    store = WaypointStore.open(path)
+    set_store(store)
+    return store
+
+def get_waypoint_candidates(ident):
+    """Every [lat, lon] known for ident, built-in/added entries first."""
+    ident = ident.upper()
+    candidates = get_store().candidates(ident)
+    extra = WAYPOINTS.get(ident)
+    if extra is not None:
+        candidates.insert(0, extra)
+    return candidates
+
+def get_waypoint_coords(ident, near=None):
     """
     Get coordinates for a waypoint identifier.
     
     Args:
         ident: Waypoint identifier (e.g., 'SAKVU', 'BBI')
+        near: Optional [lat, lon] used to choose between waypoints that share
+            the identifier (e.g. the NOTAM's Q-line position)
         
     Returns:
         [lat, lon] if found, None otherwise
     """
-    return WAYPOINTS.get(ident.upper())
+    if near is None:
+        coords = WAYPOINTS.get(ident.upper())
+        if coords is not None:
+            return coords
+    return nearest(get_waypoint_candidates(ident), near)
 
 def add_waypoint(ident, lat, lon):
     """
@@ -66,8 +387,54 @@ def add_waypoint(ident, lat, lon):
         lat: Latitude in decimal degrees
         lon: Longitude in decimal degrees
     """
+    global _version
     WAYPOINTS[ident.upper()] = [lat, lon]
+    _version += 1
+
+class FixMatcher:
+    """
+    Finds known waypoint identifiers in text, for one version of the
+    waypoint data. Every word shaped like an identifier is looked up once
+    and the answer remembered, so the words NOTAMs keep repeating
+    ("AREA", "TEMPO", ...) cost a dict lookup rather than a binary search.
+    """
+
+    MAX_MEMO = 65536
+
+    def __init__(self, version: int):
+        self.version = version
+        self._known: Dict[str, bool] = {}
+
+    def find(self, text: str) -> List[str]:
+        known = self._known
+        found = []
+        for token in FIX_TOKEN.findall(text):
+            hit = known.get(token)
+            if hit is None:
+                if len(known) >= self.MAX_MEMO:
+                    known.clear()
+                hit = known[token] = token in WAYPOINTS or token in get_store()
+            if hit:
+                found.append(token)
+        return found
+
+_fix_matcher = FixMatcher(-1)
+
+def find_fixes(text):
+    """Identifiers of known waypoints occurring in text, in order of appearance."""
+    global _fix_matcher
+    matcher = _fix_matcher
+    if matcher.version != _version:
+        matcher = _fix_matcher = FixMatcher(_version)
+    return matcher.find(text)
 
 def get_all_waypoints():
-    """Return all waypoints in the database."""
-    return WAYPOINTS.copy()
+    """
+    Return all waypoints in the database as {ident: [lat, lon]}.
+
+    Where an identifier is used more than once only one position is kept;
+    use get_waypoint_candidates for the full list.
+    """
+    waypoints = dict(get_store().items())
+    waypoints.update(WAYPOINTS)
+    return waypoints
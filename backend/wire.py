@@ -0,0 +1,127 @@
+import base64
+import re
+import sys
+from array import array
+from typing import List, Dict, Any, Optional, Sequence
+
+# Compact coordinate encodings for parse results, selected per request.
+#   polyline: Google encoded polyline (precision 5, ~1 m), delta encoded text
+#   f32:      base64 of little-endian float32 lat, lon pairs (~2 m at worst)
+ENCODINGS = ('polyline', 'f32')
+
+POLYLINE_PRECISION = 5
+
+# "Accept: application/json; geometry=polyline"
+ACCEPT_GEOMETRY = re.compile(r'geometry\s*=\s*"?([a-z0-9]+)', re.IGNORECASE)
+
+
+def encode_polyline(points: Sequence[Sequence[float]], precision: int = POLYLINE_PRECISION) -> str:
+    """Encode [lat, lon] points as a polyline string."""
+    factor = 10 ** precision
+    out = []
+    prev_lat = prev_lon = 0
+    for p in points:
+        lat = int(round(p[0] * factor))
+        lon = int(round(p[1] * factor))
+        for delta in (lat - prev_lat, lon - prev_lon):
+            value = ~(delta << 1) if delta < 0 else delta << 1
+            while value >= 0x20:
+                out.append(chr((0x20 | (value & 0x1F)) + 63))
+                value >>= 5
+            out.append(chr(value + 63))
+        prev_lat, prev_lon = lat, lon
+    return ''.join(out)
+
+
+def decode_polyline(text: str, precision: int = POLYLINE_PRECISION) -> List[List[float]]:
+    factor = 10 ** precision
+    points = []
+    values = []
+    value = shift = 0
+    for char in text:
+        byte = ord(char) - 63
+        value |= (byte & 0x1F) << shift
+        shift += 5
+        if byte < 0x20:
+            values.append(~(value >> 1) if value & 1 else value >> 1)
+            value = shift = 0
+    lat = lon = 0
+    for i in range(0, len(values) - 1, 2):
+        lat += values[i]
+        lon += values[i + 1]
+        points.append([lat / factor, lon / factor])
+    return points
+
+
+def encode_f32(points: Sequence[Sequence[float]]) -> str:
+    """Encode [lat, lon] points as base64 little-endian float32 pairs."""
+    packed = array('f', [value for p in points for value in (p[0], p[1])])
+    if sys.byteorder != 'little':
+        packed.byteswap()
+    return base64.b64encode(packed.tobytes()).decode('ascii')
+
+
+def decode_f32(text: str) -> List[List[float]]:
+    packed = array('f')
+    packed.frombytes(base64.b64decode(text))
+    if sys.byteorder != 'little':
+        packed.byteswap()
+    return [[packed[i], packed[i + 1]] for i in range(0, len(packed) - 1, 2)]
+
+
+ENCODERS = {'polyline': encode_polyline, 'f32': encode_f32}
+DECODERS = {'polyline': decode_polyline, 'f32': decode_f32}
+
+
+def requested_encoding(encoding: Optional[str] = None, accept: Optional[str] = None) -> Optional[str]:
+    """
+    Encoding asked for by a query parameter or, failing that, a
+    "geometry=..." parameter of the Accept header. None means plain JSON.
+    Raises ValueError for unknown encodings.
+    """
+    if not encoding and accept:
+        match = ACCEPT_GEOMETRY.search(accept)
+        encoding = match.group(1) if match else None
+    if not encoding:
+        return None
+    encoding = encoding.lower()
+    if encoding == 'json':
+        return None
+    if encoding not in ENCODINGS:
+        raise ValueError(f"Unknown geometry encoding '{encoding}', expected one of: json, {', '.join(ENCODINGS)}")
+    return encoding
+
+
+def encode_result(result: Dict[str, Any], encoding: Optional[str]) -> Dict[str, Any]:
+    """
+    Parse result with its coordinates encoded. geometry.coordinates becomes
+    a string (a list of strings for multiline) and geometry.encoding names
+    the encoding. Returns a new dict; the input is not modified.
+    """
+    if not encoding or 'geometry' not in result:
+        return result
+    encode = ENCODERS[encoding]
+    geom = result.get('geometry') or {}
+    coords = geom.get('coordinates') or []
+    if geom.get('type') == 'multiline':
+        encoded = [encode(segment) for segment in coords]
+    else:
+        encoded = encode(coords)
+    return dict(result, geometry=dict(geom, coordinates=encoded, encoding=encoding))
+
+
+def decode_result(result: Dict[str, Any]) -> Dict[str, Any]:
+    """Inverse of encode_result (up to the encoding's precision)."""
+    geom = result.get('geometry') or {}
+    encoding = geom.get('encoding')
+    if not encoding:
+        return result
+    decode = DECODERS[encoding]
+    coords = geom.get('coordinates')
+    if isinstance(coords, list):
+        decoded = [decode(segment) for segment in coords]
+    else:
+        decoded = decode(coords or '')
+    geom = {k: v for k, v in geom.items() if k != 'encoding'}
+    geom['coordinates'] = decoded
+    return dict(result, geometry=geom)
@@ -3,6 +3,7 @@ import Tesseract from 'tesseract.js';
 import { Upload, Layers, Eye, EyeOff, Download, Trash2 } from 'lucide-react';
 import axios from 'axios';
 import type { Notam } from '../types';
+import { decodeGeometry } from '../geometryEncoding';
 
 interface Props {
     notams: Notam[];
@@ -18,6 +19,7 @@ export const Sidebar: React.FC<Props> = ({ notams, setNotams, onSelect, onExport
                 notams: notams.map(n => ({
                     geometry: n.geometry,
                     altitude: n.altitude,
+                    validity: n.validity,
                     ids: n.ids,
                     description: n.description,
                     raw_text: n.raw_text
@@ -65,33 +67,73 @@ ew Date().toISOString().replace(/[:.]/g, '-')}.kml`;
         }
     };
 
+    const toNotam = (item: any): Notam => ({
+        id: crypto.randomUUID(),
+        raw_text: item.raw_text,
+        geometry: decodeGeometry(item.geometry),
+        altitude: item.altitude,
+        validity: item.validity,
+        description: item.description,
+        ids: item.ids,
+        visible: true,
+        color: '#fa5252'
+    });
+
     const handleParse = async () => {
         if (!textInput.trim()) return;
         setLoading(true);
         setStatus('Parsing...');
+        setNotams([]);
         try {
-            const response = await axios.post("https://web-production-8c73.up.railway.app/api/parse", { text: textInput });
-            const result = response.data;
-
-            const newNotams = result.results.map((item: any) => ({
-                id: crypto.randomUUID(),
-                raw_text: item.raw_text,
-                geometry: item.geometry,
-                altitude: item.altitude,
-                description: item.description,
-                ids: item.ids,
-                visible: true,
-                color: '#fa5252'
-            }));
-
-            setNotams(newNotams);
-            setStatus(`Parsed ${newNotams.length} NOTAMs.`);
-            setActiveTab('list');
-
-            // Auto-select the first new NOTAM to zoom the map
-            if (newNotams.length > 0) {
-                onSelect(newNotams[0].id);
+            // One JSON line per NOTAM, so the map fills in while a large feed is still parsing
+            const response = await fetch("https://web-production-8c73.up.railway.app/api/parse/stream?encoding=polyline", {
+                method: 'POST',
+                headers: { 'Content-Type': 'application/json' },
+                body: JSON.stringify({ text: textInput })
+            });
+            if (!response.ok || !response.body) {
+                throw new Error(`HTTP ${response.status}`);
             }
+
+            const reader = response.body.getReader();
+            const decoder = new TextDecoder();
+            let buffer = '';
+            let parsed = 0;
+            let failed = 0;
+
+            const addLines = (lines: string[]) => {
+                const batch: Notam[] = [];
+                for (const line of lines) {
+                    if (!line.trim()) continue;
+                    const item = JSON.parse(line);
+                    if (item.error) {
+                        failed++;
+                        continue;
+                    }
+                    batch.push(toNotam(item));
+                }
+                if (batch.length === 0) return;
+                if (parsed === 0) {
+                    setActiveTab('list');
+                    // Auto-select the first NOTAM to zoom the map
+                    onSelect(batch[0].id);
+                }
+                parsed += batch.length;
+                setNotams(prev => [...prev, ...batch]);
+                setStatus(`Parsed ${parsed} NOTAMs...`);
+            };
+
+            while (true) {
+                const { done, value } = await reader.read();
+                if (done) break;
+                buffer += decoder.decode(value, { stream: true });
+                const lines = buffer.split('\n');
+                buffer = lines.pop() ?? '';
+                addLines(lines);
+            }
+            addLines([buffer]);
+
+            setStatus(`Parsed ${parsed} NOTAMs.` + (failed > 0 ? ` ${failed} failed.` : ''));
         } catch (err) {
             setStatus('Parsing failed. Is backend running?');
             console.error(err);
@@ -0,0 +1,57 @@
+import type { Geometry, GeometryEncoding } from './types';
+
+// Decoders for the compact coordinate encodings the backend sends when
+// asked with ?encoding=polyline or ?encoding=f32 (see backend/wire.py).
+
+export const decodePolyline = (text: string, precision = 5): number[][] => {
+    const factor = 10 ** precision;
+    const points: number[][] = [];
+    let lat = 0;
+    let lng = 0;
+    let index = 0;
+    const next = () => {
+        let result = 0;
+        let shift = 0;
+        let byte: number;
+        do {
+            byte = text.charCodeAt(index++) - 63;
+            result += (byte & 0x1f) * 2 ** shift;
+            shift += 5;
+        } while (byte >= 0x20);
+        return result % 2 ? -(result + 1) / 2 : result / 2;
+    };
+    while (index < text.length) {
+        lat += next();
+        lng += next();
+        points.push([lat / factor, lng / factor]);
+    }
+    return points;
+};
+
+export const decodeF32 = (text: string): number[][] => {
+    const binary = atob(text);
+    const view = new DataView(new ArrayBuffer(binary.length));
+    for (let i = 0; i < binary.length; i++) view.setUint8(i, binary.charCodeAt(i));
+    const points: number[][] = [];
+    for (let offset = 0; offset + 8 <= binary.length; offset += 8) {
+        points.push([view.getFloat32(offset, true), view.getFloat32(offset + 4, true)]);
+    }
+    return points;
+};
+
+const DECODERS: Record<GeometryEncoding, (text: string) => number[][]> = {
+    polyline: decodePolyline,
+    f32: decodeF32,
+};
+
+// Geometry with plain [lat, lng] coordinates, whatever encoding it arrived in.
+// Multiline geometries decode to one array of points per segment.
+export const decodeGeometry = (geometry: any): Geometry => {
+    if (!geometry?.encoding) return geometry;
+    const { encoding, coordinates, ...rest } = geometry;
+    const decode = DECODERS[encoding as GeometryEncoding];
+    const decoded = Array.isArray(coordinates)
+        ? (coordinates.map((segment: string) => decode(segment)) as any)
+        : decode(coordinates ?? '');
+    return { ...rest, coordinates: decoded };
+};
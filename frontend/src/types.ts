@@ -3,12 +3,23 @@ export interface Coordinate {
     lng: number;
 }
 
+// Compact coordinate encodings the parse endpoints can send (?encoding=...)
+export type GeometryEncoding = 'polyline' | 'f32';
+
 export interface Geometry {
     type: 'polygon' | 'circle' | 'line' | 'multiline' | 'point' | 'unknown';
     coordinates: number[][]; // [lat, lng]
     radius_nm?: number;
 }
 
+// B)/C) validity window as epoch seconds (null if missing)
+export interface Validity {
+    start: number | null;
+    end: number | null;
+    estimated: boolean;
+    permanent: boolean;
+}
+
 export interface Notam {
     id: string; // Internal UUID
     raw_text: string;
@@ -17,6 +28,7 @@ export interface Notam {
         lower: string;
         upper: string;
     };
+    validity?: Validity;
     description?: string;
     ids: string[]; // Extracted NOTAM IDs
     visible: boolean;